@@ -0,0 +1,348 @@
+"""Banco de pruebas de rendimiento sin hardware ni pantalla.
+
+Cada caso prepara sus datos con los dispositivos simulados de fakeDevices
+(o con grabaciones en --fixtures) y mide una función real de la GUI o de las
+herramientas. Reporta latencia (p50/p95/p99) y rendimiento, y compara contra
+una línea base guardada para que una regresión aparezca como diferencia numérica.
+
+    python benchmarkSuite.py                        # correr todo
+    python benchmarkSuite.py --save-baseline        # guardar la línea base
+    python benchmarkSuite.py --baseline benchmark_baseline.json --only lidar
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")  # Sin pantalla: las figuras se dibujan en memoria
+import cv2
+import numpy as np
+
+import fakeDevices
+
+BENCH_WARMUP: int = 5  # iteraciones descartadas antes de medir
+BENCH_MIN_ITERATIONS: int = 20
+BENCH_MIN_TIME: float = 1.0  # segundos mínimos medidos por caso
+BENCH_MAX_ITERATIONS: int = 2000
+REGRESSION_THRESHOLD: float = 0.10  # 10 % más lento que la línea base
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+BENCHMARKS = []  # (nombre, función de preparación)
+
+
+class BenchmarkSkipped(Exception):
+    """El caso no se puede correr aquí (falta una librería o un archivo)."""
+
+
+def benchmark(name):
+    """Registra un caso: la función recibe los fixtures y devuelve el paso a medir."""
+    def decorator(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return decorator
+
+
+def load_fixtures(directory):
+    """Grabaciones opcionales: video.*, scans.npz, serial.log y thermal.npy."""
+    fixtures = {}
+    if directory is None:
+        return fixtures
+    for name in sorted(os.listdir(directory)):
+        full = os.path.join(directory, name)
+        if name.startswith("video."):
+            fixtures["video"] = full
+        elif name == "scans.npz":
+            from slamEngine import load_scans
+            fixtures["scans"] = load_scans(full)[0]
+        elif name == "serial.log":
+            with open(full) as f:
+                fixtures["serial"] = [line for line in f if line.strip()]
+        elif name == "thermal.npy":
+            fixtures["thermal"] = np.load(full)
+    return fixtures
+
+
+def camera_frames(fixtures, count=60, qr_text=None):
+    cap = fakeDevices.FakeVideoCapture(source=fixtures.get("video"), qr_text=qr_text)
+    return [cap.read()[1] for _ in range(count)]
+
+
+def require(module):
+    try:
+        return __import__(module)
+    except ImportError as e:
+        raise BenchmarkSkipped(f"falta {module} ({e})")
+
+
+@benchmark("sensores.handle_serial_line")
+def bench_serial_lines(fixtures):
+    import main
+    from ioCore import LineSplitter
+    ser = fakeDevices.FakeSerial(lines=fixtures.get("serial"))
+    splitter = LineSplitter()
+
+    def step():
+        ser.arrive(20)  # Una tanda típica de lo que trae una lectura del puerto
+        for line in splitter.feed(ser.read(ser.in_waiting)):
+            main.handle_serial_line(line)
+    return step
+
+
+def lidar_plot():
+    """Mismo gráfico polar que configure_lidar_plot, sobre el backend Agg."""
+    import main
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(4.5, 4.5), facecolor='black', dpi=100)
+    FigureCanvasAgg(fig)  # Sin canvas propio, fig.canvas.draw() no rasteriza nada
+    ax = fig.add_subplot(111, projection='polar')
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.set_rmax(main.LIDAR_D_MAX)
+    line = ax.scatter([], [], c=np.empty(0), s=main.LIDAR_POINT_SIZE, cmap='gist_ncar',
+                      vmin=main.LIDAR_I_MIN, vmax=main.LIDAR_I_MAX, alpha=0.9, edgecolors='none')
+    fig.colorbar(line, ax=ax, pad=0.08, fraction=0.046)
+    fig.canvas.draw()
+    main.lidar_fig, main.lidar_ax, main.lidar_line = fig, ax, line
+    return fig
+
+
+@benchmark("lidar.update_frame_lidar")
+def bench_update_frame_lidar(fixtures):
+    import main
+    lidar_plot()
+    lidar = fakeDevices.FakeRPLidar(scans=fixtures.get("scans"))
+    return lambda: main.update_frame_lidar(*main.lidar_scan_arrays(lidar.next_scan()))
+
+
+@benchmark("lidar.update_frame_lidar+dibujo")
+def bench_update_frame_lidar_draw(fixtures):
+    import main
+    fig = lidar_plot()
+    lidar = fakeDevices.FakeRPLidar(scans=fixtures.get("scans"))
+
+    def step():
+        main.update_frame_lidar(*main.lidar_scan_arrays(lidar.next_scan()))
+        fig.canvas.draw()
+    return step
+
+
+@benchmark("lidarCTk.render_radar")
+def bench_lidar_ctk(fixtures):
+    import lidarCTk
+    lidar = fakeDevices.FakeRPLidar(scans=fixtures.get("scans"))
+    scans = [lidar.next_scan() for _ in range(10)]
+    counter = iter(range(10 ** 9))
+    return lambda: lidarCTk.render_radar(scans[next(counter) % len(scans)], 800, 800)
+
+
+@benchmark("termica.normalizar+zoom")
+def bench_thermal(fixtures):
+    import thermalCamera
+    sensor = fakeDevices.FakeMLX90640(frames=fixtures.get("thermal"))
+
+    def step():
+        frame = thermalCamera.get_thermal_frame(sensor)
+        thermalCamera.apply_virtual_zoom(thermalCamera.normalize_thermal_data(frame), 1.5)
+    return step
+
+
+@benchmark("termica.superposicion")
+def bench_thermal_overlay(fixtures):
+    import thermalCamera
+    sensor = fakeDevices.FakeMLX90640(frames=fixtures.get("thermal"))
+    frames = camera_frames(fixtures, 30)
+    counter = iter(range(10 ** 9))
+
+    def step():
+        webcam = frames[next(counter) % len(frames)]
+        thermalCamera.compose_overlay(webcam, thermalCamera.get_thermal_frame(sensor), (640, 480), 1.5)
+    return step
+
+
+def jpeg_frames(fixtures, count=30):
+    """Cuadros de 1280x720 comprimidos como los entrega una cámara MJPG."""
+    cap = fakeDevices.FakeVideoCapture(width=1280, height=720, source=fixtures.get("video"))
+    cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+    return [cap.read()[1].reshape(-1) for _ in range(count)]
+
+
+@benchmark("jpeg.decodificar completo")
+def bench_jpeg_full(fixtures):
+    from cameraCapture import decode_jpeg
+    frames = jpeg_frames(fixtures)
+    counter = iter(range(10 ** 9))
+    return lambda: decode_jpeg(frames[next(counter) % len(frames)])
+
+
+@benchmark("jpeg.decodificar miniatura 320x180")
+def bench_jpeg_thumbnail(fixtures):
+    from cameraCapture import CameraFrame
+    frames = jpeg_frames(fixtures)
+    counter = iter(range(10 ** 9))
+    return lambda: CameraFrame(jpeg=frames[next(counter) % len(frames)], size=(1280, 720)).fit(320, 180)
+
+
+@benchmark("mosaico.4 cámaras 1600x900")
+def bench_mosaic(fixtures):
+    from cameraCapture import CameraFrame
+    from cameraMosaic import MosaicRenderer
+    frames = jpeg_frames(fixtures)
+    mosaic = MosaicRenderer()
+    mosaic.configure(1600, 900, 4)
+    counter = iter(range(10 ** 9))
+
+    def step():
+        n = next(counter)
+        for i in range(4):
+            mosaic.draw(i, CameraFrame(jpeg=frames[(n + i) % len(frames)], size=(1280, 720)))
+            mosaic.draw_text(i, f"Cámara {i}  30 FPS")
+        mosaic.finish()
+    return step
+
+
+@benchmark("movimiento.process")
+def bench_motion(fixtures):
+    from movementDetection import MotionDetector
+    detector = MotionDetector()
+    frames = camera_frames(fixtures)
+    counter = iter(range(10 ** 9))
+    # Copia por cuadro: el detector dibuja sobre la imagen que recibe
+    return lambda: detector.process(frames[next(counter) % len(frames)].copy())
+
+
+@benchmark("qr.process")
+def bench_qr(fixtures):
+    from qrDetector import QrDetector
+    detector = QrDetector()
+    frames = camera_frames(fixtures, 30, qr_text="RRL-2025")
+    counter = iter(range(10 ** 9))
+    return lambda: detector.process(frames[next(counter) % len(frames)].copy())
+
+
+@benchmark("yolo.anotacion")
+def bench_yolo_annotation(fixtures):
+    sv = require("supervision")
+    frames = camera_frames(fixtures, 30)
+    rng = np.random.default_rng(fakeDevices.FAKE_SEED)
+    xy = rng.uniform(0, 400, (20, 2))
+    detections = sv.Detections(xyxy=np.hstack((xy, xy + rng.uniform(20, 200, (20, 2)))),
+                               confidence=rng.uniform(0.3, 1.0, 20), class_id=rng.integers(0, 5, 20))
+    box, label = sv.BoundingBoxAnnotator(), sv.LabelAnnotator()
+    counter = iter(range(10 ** 9))
+
+    def step():
+        frame = frames[next(counter) % len(frames)].copy()
+        label.annotate(scene=box.annotate(scene=frame, detections=detections), detections=detections)
+    return step
+
+
+@benchmark("yolo.process")
+def bench_yolo(fixtures):
+    require("ultralytics")
+    require("supervision")
+    import runyolov10
+    if not os.path.exists(runyolov10.MODEL_PATH):
+        raise BenchmarkSkipped(f"falta el modelo {runyolov10.MODEL_PATH}")
+    detector = runyolov10.YoloDetector()
+    frames = camera_frames(fixtures, 30)
+    counter = iter(range(10 ** 9))
+    return lambda: detector.process(frames[next(counter) % len(frames)].copy())
+
+
+@benchmark("slam.process_scan")
+def bench_slam(fixtures):
+    from slamEngine import SlamEngine
+    engine = SlamEngine()
+    lidar = fakeDevices.FakeRPLidar(scans=fixtures.get("scans"))
+
+    def step():
+        scan = np.array(lidar.next_scan(), dtype=np.float64)
+        engine.process_scan(np.radians(scan[:, 1]), scan[:, 2])
+    return step
+
+
+def run_benchmark(step):
+    for _ in range(BENCH_WARMUP):
+        step()
+    durations = []
+    start = time.perf_counter()
+    while (len(durations) < BENCH_MIN_ITERATIONS or time.perf_counter() - start < BENCH_MIN_TIME) \
+            and len(durations) < BENCH_MAX_ITERATIONS:
+        t0 = time.perf_counter_ns()
+        step()
+        durations.append(time.perf_counter_ns() - t0)
+    values = np.array(durations) / 1e6
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return {"n": len(values), "mean_ms": values.mean(), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+            "max_ms": values.max(), "ops_s": 1000 / values.mean()}
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Imprime las diferencias contra la línea base; devuelve los casos que empeoraron."""
+    regressions = []
+    print(f"\nComparación con la línea base ({baseline.get('machine', '?')}):")
+    print(f"{'caso':<34}{'p50 base':>10}{'p50':>10}{'Δp50':>9}{'Δp95':>9}{'Δops/s':>9}")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None or "p50_ms" not in result:
+            continue
+        deltas = [result[k] / base[k] - 1 for k in ("p50_ms", "p95_ms", "ops_s")]
+        flag = ""
+        if deltas[0] > threshold:
+            regressions.append(name)
+            flag = "  REGRESIÓN"
+        print(f"{name:<34}{base['p50_ms']:10.3f}{result['p50_ms']:10.3f}"
+              f"{deltas[0]:+9.1%}{deltas[1]:+9.1%}{deltas[2]:+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento sin hardware")
+    parser.add_argument("--only", action="append", help="solo los casos que contienen este texto")
+    parser.add_argument("--fixtures", help="carpeta con video.*, scans.npz, serial.log, thermal.npy")
+    parser.add_argument("--baseline", help="línea base JSON contra la cual comparar")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help=f"guardar los resultados como línea base (por defecto {DEFAULT_BASELINE})")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    results = {}
+    print(f"{'caso':<34}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'ops/s':>10}  (ms)")
+    for name, setup in BENCHMARKS:
+        if args.only and not any(text in name for text in args.only):
+            continue
+        try:
+            result = run_benchmark(setup(fixtures))
+        except BenchmarkSkipped as e:
+            print(f"{name:<34} omitido: {e}")
+            results[name] = {"skipped": str(e)}
+            continue
+        except Exception as e:
+            print(f"{name:<34} error: {e}")
+            results[name] = {"error": str(e)}
+            continue
+        results[name] = result
+        print(f"{name:<34}{result['n']:6d}{result['p50_ms']:9.3f}{result['p95_ms']:9.3f}"
+              f"{result['p99_ms']:9.3f}{result['ops_s']:10.1f}")
+
+    report = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "machine": platform.node(),
+              "python": platform.python_version(), "fixtures": args.fixtures, "results": results}
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import fcntl
+import os
+import struct
+import sys
+
+import cv2
+
+from runReplay import current_replay
+
+try:
+    from turbojpeg import TurboJPEG  # PyTurboJPEG: decodificación escalada de libjpeg-turbo
+except ImportError:
+    TurboJPEG = None
+
+CAPTURE_FOURCC: str = "MJPG"  # comprimido: varias cámaras caben en un mismo controlador USB
+CAPTURE_FPS: float = 30.0
+CAPTURE_BUFFER_SIZE: int = 1  # un solo cuadro en el driver: siempre se lee el más reciente
+DETECTOR_CAPTURE_SIZE: tuple = (640, 480)  # resolución con la que trabajan los detectores
+CAPTURE_READ_TIMEOUT_MS: int = 500  # un grab sin cuadro falla a tiempo (V4L2 espera 10 s por defecto)
+
+# ioctl de V4L2 para enumerar formatos, tamaños e intervalos (linux/videodev2.h)
+VIDIOC_ENUM_FMT = 0xC0405602
+VIDIOC_ENUM_FRAMESIZES = 0xC02C564A
+VIDIOC_ENUM_FRAMEINTERVALS = 0xC034564B
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_FRMSIZE_TYPE_DISCRETE = 1
+FMTDESC = struct.Struct("III32sII12x")  # index, type, flags, description, pixelformat, mbus_code
+FRMSIZE = struct.Struct("III6I8x")  # index, pixel_format, type, discreto (w, h) o escalonado (6 campos)
+FRMIVAL = struct.Struct("IIIII6I8x")  # index, pixel_format, width, height, type, fracción(es)
+
+# Escalas que libjpeg decodifica directamente (1/1, 1/2, 1/4, 1/8) y su bandera de cv2.imdecode
+JPEG_SCALES = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4,
+               8: cv2.IMREAD_REDUCED_COLOR_8}
+
+_turbo = None
+
+
+class CaptureMode:
+    """Modo de captura: formato (FOURCC), resolución y cuadros por segundo."""
+
+    __slots__ = ("fourcc", "width", "height", "fps")
+
+    def __init__(self, fourcc, width, height, fps):
+        self.fourcc = fourcc
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+    def __eq__(self, other):
+        return (isinstance(other, CaptureMode) and self.fourcc == other.fourcc
+                and (self.width, self.height) == (other.width, other.height) and abs(self.fps - other.fps) < 1)
+
+    def __repr__(self):
+        return f"{self.fourcc} {self.width}x{self.height}@{self.fps:g}"
+
+
+def fourcc_to_str(code):
+    return "".join(chr((int(code) >> 8 * i) & 0xFF) for i in range(4))
+
+
+def str_to_fourcc(text):
+    return cv2.VideoWriter_fourcc(*text)
+
+
+def enumerate_ioctl(fd, request, layout, *fields):
+    """Entradas de una enumeración V4L2: se pide índice 0, 1, ... hasta que el driver dice EINVAL."""
+    entries = []
+    for index in range(256):
+        buffer = bytearray(layout.size)
+        struct.pack_into(f"{1 + len(fields)}I", buffer, 0, index, *fields)  # Los campos de entrada van al principio
+        try:
+            fcntl.ioctl(fd, request, buffer, True)
+        except OSError:
+            break
+        entries.append(layout.unpack(buffer))
+    return entries
+
+
+def max_fps(fd, pixelformat, width, height):
+    best = 0.0
+    for entry in enumerate_ioctl(fd, VIDIOC_ENUM_FRAMEINTERVALS, FRMIVAL, pixelformat, width, height):
+        numerator, denominator = entry[5], entry[6]  # Intervalo discreto, o el mínimo si es escalonado
+        if numerator:
+            best = max(best, denominator / numerator)
+    return best
+
+
+def probe_modes(index):
+    """Modos que anuncia el driver de /dev/video<index>; lista vacía si no se pueden consultar.
+
+    Los tamaños continuos o escalonados se reportan por sus extremos.
+    """
+    if not sys.platform.startswith("linux"):
+        return []
+    try:
+        fd = os.open(f"/dev/video{index}", os.O_RDWR | os.O_NONBLOCK)
+    except OSError:
+        return []
+    modes = []
+    try:
+        for fmt in enumerate_ioctl(fd, VIDIOC_ENUM_FMT, FMTDESC, V4L2_BUF_TYPE_VIDEO_CAPTURE):
+            pixelformat = fmt[4]
+            for size in enumerate_ioctl(fd, VIDIOC_ENUM_FRAMESIZES, FRMSIZE, pixelformat):
+                if size[2] == V4L2_FRMSIZE_TYPE_DISCRETE:
+                    sizes = [(size[3], size[4])]
+                else:
+                    sizes = [(size[3], size[6]), (size[4], size[7])]  # (mín ancho, mín alto), (máx ancho, máx alto)
+                for width, height in sizes:
+                    modes.append(CaptureMode(fourcc_to_str(pixelformat), width, height,
+                                             max_fps(fd, pixelformat, width, height)))
+    finally:
+        os.close(fd)
+    return modes
+
+
+def choose_mode(modes, width, height, fps=CAPTURE_FPS, fourcc=CAPTURE_FOURCC):
+    """El modo más chico que cubre width x height a fps, preferentemente en `fourcc`.
+
+    Si ninguno alcanza, el que más se acerca (más área útil, luego más fps).
+    None si no hay modos (driver sin enumeración): se piden los valores tal cual.
+    """
+    candidates = [mode for mode in modes if mode.fourcc == fourcc] or modes
+    if not candidates:
+        return None
+    covering = [mode for mode in candidates
+                if mode.width >= width and mode.height >= height and mode.fps >= fps - 0.5]
+    if covering:
+        return min(covering, key=lambda mode: (mode.width * mode.height, -mode.fps))
+    return max(candidates, key=lambda mode: (min(mode.width, width) * min(mode.height, height), min(mode.fps, fps)))
+
+
+def jpeg_decoder():
+    """Instancia compartida de TurboJPEG, o None si falta el módulo o la biblioteca."""
+    global _turbo, TurboJPEG
+    if _turbo is None and TurboJPEG is not None:
+        try:
+            _turbo = TurboJPEG()
+        except OSError as e:
+            print(f"libjpeg-turbo no disponible, se usa cv2.imdecode: {e}")
+            TurboJPEG = None
+    return _turbo
+
+
+def decode_jpeg(data, scale=1):
+    """Decodifica un JPEG a 1/scale de su tamaño sin pasar por la resolución completa."""
+    turbo = jpeg_decoder()
+    if turbo is not None:
+        return turbo.decode(data, scaling_factor=(1, scale))
+    return cv2.imdecode(data, JPEG_SCALES[scale])
+
+
+def jpeg_scale_for(width, height, target_width, target_height):
+    """La mayor escala 1/s que todavía cubre target_width x target_height."""
+    scale = 1
+    for candidate in JPEG_SCALES:
+        if width // candidate >= target_width and height // candidate >= target_height:
+            scale = candidate
+    return scale
+
+
+def fit_size(width, height, max_width, max_height):
+    """Tamaño que conserva la proporción y cabe en max_width x max_height."""
+    ratio = min(max_width / width, max_height / height)
+    return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+
+class CameraFrame:
+    """Un cuadro capturado: el JPEG comprimido tal como llegó, o la imagen ya decodificada.
+
+    Cada consumidor pide el tamaño que necesita: `image(scale)` decodifica
+    (una vez por escala) a 1/scale y `fit(ancho, alto)` elige la escala más
+    reducida que todavía cubre su vista. Un detector que necesita resolución
+    completa la pide al mismo cuadro solo cuando la usa.
+    """
+
+    __slots__ = ("jpeg", "width", "height", "decoded")
+
+    def __init__(self, jpeg=None, image=None, size=None):
+        self.jpeg = jpeg
+        self.width, self.height = size if image is None else (image.shape[1], image.shape[0])
+        self.decoded = {} if image is None else {1: image}
+
+    def image(self, scale=1):
+        image = self.decoded.get(scale)
+        if image is None:
+            if self.jpeg is not None:
+                image = decode_jpeg(self.jpeg, scale)
+            else:
+                # Ya llegó decodificado: solo queda reducirlo
+                image = cv2.resize(self.decoded[1], (self.width // scale, self.height // scale),
+                                   interpolation=cv2.INTER_AREA)
+            self.decoded[scale] = image
+        return image
+
+    def fit(self, width, height):
+        return self.image(jpeg_scale_for(self.width, self.height, width, height))
+
+
+class CameraCapture:
+    """Cámara abierta en el modo que necesita quien la usa, no en el del driver.
+
+    `open()` consulta los modos del dispositivo, elige con `choose_mode` el
+    más chico que cubre la resolución pedida (MJPG si lo hay), lo configura
+    con un búfer de un cuadro y lee de vuelta lo que el driver aceptó en
+    `mode`. Expone read/grab/retrieve/get/set/release como cv2.VideoCapture.
+
+    Con `raw=True` y MJPG negociado, el driver entrega los bytes JPEG sin
+    decodificar y `read_frame()` los devuelve en un CameraFrame para que cada
+    vista decodifique directamente a su tamaño.
+
+    Si hay una reproducción activa (runReplay) la cámara sale de la
+    grabación en vez del dispositivo.
+    """
+
+    def __init__(self, index, width, height, fps=CAPTURE_FPS, fourcc=CAPTURE_FOURCC,
+                 buffer_size=CAPTURE_BUFFER_SIZE, raw=False):
+        self.index = index
+        self.requested = CaptureMode(fourcc, width, height, fps)
+        self.buffer_size = buffer_size
+        self.raw = raw
+        self.mode = None  # Modo negociado con el driver
+        self.cap = None
+
+    def open(self, mode=None):
+        """Abre y configura la cámara; con `mode` se pide ese modo sin volver a consultar el driver."""
+        replay = current_replay()
+        if replay is not None:
+            # Reproducción de una corrida: la grabación tiene un solo modo y lo reporta como el driver
+            target = mode or self.requested
+            cap = replay.video_capture(self.index)
+        else:
+            target = mode or choose_mode(probe_modes(self.index), self.requested.width, self.requested.height,
+                                         self.requested.fps, self.requested.fourcc) or self.requested
+            backend = cv2.CAP_V4L2 if sys.platform.startswith("linux") else cv2.CAP_ANY
+            cap = cv2.VideoCapture(self.index, backend)
+        if not cap.isOpened():
+            cap.release()
+            return False
+
+        # En V4L2 el formato va antes que la resolución: cambiarlo puede reiniciar el tamaño
+        cap.set(cv2.CAP_PROP_FOURCC, str_to_fourcc(target.fourcc))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, target.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, target.height)
+        cap.set(cv2.CAP_PROP_FPS, target.fps)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        if hasattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC"):
+            cap.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, CAPTURE_READ_TIMEOUT_MS)
+
+        self.mode = CaptureMode(fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                                int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), cap.get(cv2.CAP_PROP_FPS))
+        if self.mode != target:
+            print(f"Cámara {self.index}: se pidió {target}, el driver entregó {self.mode}")
+        else:
+            print(f"Cámara {self.index}: {self.mode}")
+        if self.raw and self.mode.fourcc == "MJPG":
+            # Sin conversión a BGR: read() devuelve el JPEG crudo como una fila de bytes
+            cap.set(cv2.CAP_PROP_FORMAT, -1)
+            cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        self.cap = cap
+        return True
+
+    def read_frame(self):
+        """El siguiente cuadro como CameraFrame (JPEG crudo si el driver lo entrega), o None."""
+        if not self.cap.grab():
+            return None
+        return self.retrieve_frame()
+
+    def retrieve_frame(self):
+        """El cuadro ya tomado con grab() como CameraFrame, o None."""
+        ret, data = self.cap.retrieve()
+        if not ret or data is None:
+            return None
+        if data.ndim == 1 or data.shape[0] == 1:
+            return CameraFrame(jpeg=data.reshape(-1), size=(self.mode.width, self.mode.height))
+        return CameraFrame(image=data)
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def grab(self):
+        return self.cap.grab()
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
@@ -0,0 +1,254 @@
+import threading
+import time
+
+import cv2
+
+from cameraCapture import CameraCapture, fit_size
+from sharedFrames import SharedFrameWriter
+
+THUMBNAIL_FPS: float = 10.0  # cuadros por segundo que se toman de las cámaras en miniatura
+RECONNECT_MIN_DELAY: float = 0.1  # segundos antes del primer reintento tras perder la cámara
+RECONNECT_MAX_DELAY: float = 2.0  # tope de la espera entre reintentos (se duplica en cada fallo)
+
+
+class ManagedCamera:
+    """Una cámara abierta con su hilo de captura y el último cuadro tomado.
+
+    El hilo hace grab() de cada cuadro para vaciar el búfer del driver (con
+    MJPG crudo no cuesta una decodificación) pero solo lo retira a la
+    frecuencia que le toca: completa si es la principal, THUMBNAIL_FPS si es
+    miniatura. Si conoce el tamaño de su mosaico deja el cuadro ya
+    decodificado a esa escala, fuera del hilo de Tk.
+
+    Mientras `recorder` graba se retira cada cuadro para la grabación (con
+    MJPG solo se copian los bytes), pero la vista sigue recibiendo el ritmo
+    de siempre.
+
+    Cada cuadro retirado se publica en memoria compartida (sharedFrames) para
+    los detectores; si alguno la está leyendo, también las miniaturas retiran
+    cada cuadro.
+
+    Si un grab falla (cable flojo, cámara desconectada) libera el
+    dispositivo, pasa a "reconectando" y reintenta en el modo ya negociado
+    con espera exponencial; `device_changed()` (aviso del vigilante de /dev)
+    adelanta el reintento en cuanto el nodo vuelve a aparecer.
+    """
+
+    def __init__(self, number, capture, on_fps=None):
+        self.number = number  # posición en la lista configurada (1, 2, ...)
+        self.capture = capture
+        self.on_fps = on_fps
+        self.recorder = None
+        self.focused = False
+        self.view_size = None  # (ancho, alto) del mosaico donde se muestra
+        self.state = "activa"
+        self.frame = None
+        self.sequence = 0  # sube con cada cuadro nuevo
+        self.fps = 0.0
+        self.lock = threading.Lock()
+        self.running = True
+        self.wake = threading.Event()  # Interrumpe la espera entre reintentos
+        self.backoff = RECONNECT_MIN_DELAY
+        self.lost_at = None
+        try:
+            self.shared = SharedFrameWriter(capture.index)
+        except OSError as e:
+            print(f"Cámara {capture.index}: sin memoria compartida para los detectores ({e})")
+            self.shared = None
+        self.thread = threading.Thread(target=self.run, name=f"cámara{capture.index}", daemon=True)
+
+    @property
+    def index(self):
+        return self.capture.index
+
+    def latest(self):
+        """(cuadro, secuencia, estado) más recientes."""
+        with self.lock:
+            return self.frame, self.sequence, self.state
+
+    def run(self):
+        last_retrieve = 0.0
+        while self.running:
+            if not self.capture.isOpened():
+                self.reconnect()
+                continue
+            if not self.capture.grab():
+                self.lost()
+                continue
+            grabbed_ns = time.monotonic_ns()
+            now = grabbed_ns / 1e9
+            shown = self.focused or now - last_retrieve >= 1 / THUMBNAIL_FPS
+            recorder = self.recorder
+            recording = recorder is not None and recorder.active
+            shared = self.shared is not None and self.shared.wanted(grabbed_ns)
+            if not shown and not recording and not shared:
+                continue
+            frame = self.capture.retrieve_frame()
+            if frame is None:
+                continue
+            if recording or shared or frame.jpeg is not None:
+                jpeg = self.jpeg_of(frame)
+                if recording and jpeg is not None:
+                    recorder.add_frame(self.index, jpeg, grabbed_ns)
+                if self.shared is not None and jpeg is not None:
+                    self.shared.publish(jpeg, frame.width, frame.height, grabbed_ns)
+            if not shown:
+                continue
+            view_size = self.view_size
+            if view_size is not None:
+                frame.fit(*fit_size(frame.width, frame.height, *view_size))  # Queda en la caché del cuadro
+            if last_retrieve and now > last_retrieve:
+                self.fps = 0.9 * self.fps + 0.1 / (now - last_retrieve)
+                if self.on_fps is not None:
+                    self.on_fps(self.number, self.fps, now)
+            last_retrieve = now
+            with self.lock:
+                self.frame = frame
+                self.sequence += 1
+                self.state = "activa"
+
+    @staticmethod
+    def jpeg_of(frame):
+        """JPEG del cuadro para grabar o compartir, o None si no se pudo comprimir."""
+        if frame.jpeg is not None:
+            return frame.jpeg
+        # El driver no entregó MJPG: comprimir aquí, en el hilo de la cámara
+        ok, jpeg = cv2.imencode(".jpg", frame.image())
+        return jpeg if ok else None
+
+    def set_state(self, state):
+        with self.lock:
+            self.state = state
+
+    def lost(self):
+        print(f"Cámara {self.index}: sin señal, reconectando...")
+        # Liberar ya el nodo: si sigue abierto, el kernel le da otro /dev/videoN a la cámara al volver
+        self.capture.release()
+        self.set_state("reconectando")
+        self.backoff = RECONNECT_MIN_DELAY
+        self.lost_at = time.monotonic()
+
+    def reconnect(self):
+        self.wake.wait(self.backoff)
+        self.wake.clear()
+        if not self.running:
+            return
+        if self.capture.open(self.capture.mode):
+            print(f"Cámara {self.index}: reconectada en {time.monotonic() - self.lost_at:.2f} s")
+            self.set_state("activa")
+        else:
+            self.backoff = min(self.backoff * 2, RECONNECT_MAX_DELAY)
+
+    def device_changed(self, present):
+        if present and not self.capture.isOpened():
+            self.wake.set()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.capture.release()
+        shared, self.shared = self.shared, None
+        if shared is not None and not self.thread.is_alive():
+            shared.close()  # Si el hilo sigue vivo, el bloque se libera al salir del proceso
+
+
+class CameraManager:
+    """Cámaras abiertas una sola vez, con una principal y el resto en miniatura.
+
+    `configure(índices)` abre solo las que faltan y libera las que ya no se
+    piden; las que siguen configuradas no se reabren. `set_focus` cambia la
+    cámara principal al instante: solo cambia qué hilo retira cada cuadro.
+    `layout_version` sube cada vez que cambia el orden de la vista.
+    """
+
+    def __init__(self, width, height, on_fps=None, recorder=None):
+        self.width = width
+        self.height = height
+        self.on_fps = on_fps
+        self.recorder = recorder
+        self.cameras = {}  # índice -> ManagedCamera
+        self.order = []  # índices en el orden configurado
+        self.focus = None
+        self.layout_version = 0
+        self.lock = threading.Lock()
+        self.configure_lock = threading.Lock()  # Dos configuraciones seguidas se atienden en orden
+
+    def configure(self, indices):
+        """Ajusta las cámaras abiertas a `indices`; bloquea mientras abre las nuevas (hilo de fondo)."""
+        with self.configure_lock:
+            return self._configure(indices)
+
+    def _configure(self, indices):
+        with self.lock:
+            removed = [camera for index, camera in self.cameras.items() if index not in indices]
+            missing = [index for index in indices if index not in self.cameras]
+        for camera in removed:
+            camera.stop()
+
+        opened = {}
+        for index in missing:
+            capture = CameraCapture(index, self.width, self.height, raw=True)
+            if capture.open():
+                opened[index] = capture
+            else:
+                print(f"Error al abrir la cámara con índice {index}")
+
+        with self.lock:
+            for camera in removed:
+                self.cameras.pop(camera.index, None)
+            for index, capture in opened.items():
+                camera = ManagedCamera(0, capture, self.on_fps)
+                camera.recorder = self.recorder
+                self.cameras[index] = camera
+                camera.thread.start()
+            self.order = [index for index in indices if index in self.cameras]
+            for number, index in enumerate(self.order, start=1):
+                self.cameras[index].number = number
+            if self.focus not in self.cameras:
+                self.focus = self.order[0] if self.order else None
+            self.apply_focus()
+        return len(self.order)
+
+    def set_focus(self, index):
+        with self.lock:
+            if index in self.cameras and index != self.focus:
+                self.focus = index
+                self.apply_focus()
+
+    def apply_focus(self):
+        for index, camera in self.cameras.items():
+            camera.focused = index == self.focus
+        self.layout_version += 1
+
+    def view_order(self):
+        """Cámaras en el orden de la vista: la principal primero, luego las miniaturas."""
+        with self.lock:
+            return [self.cameras[self.focus]] + [self.cameras[i] for i in self.order if i != self.focus] \
+                if self.focus is not None else []
+
+    def recording_info(self):
+        """[(número, índice, modo)] de las cámaras abiertas, para los metadatos de una grabación."""
+        with self.lock:
+            return [(camera.number, camera.index, camera.capture.mode) for camera in self.cameras.values()]
+
+    def device_event(self, name, present):
+        """Aviso del vigilante de dispositivos para el nodo /dev/<name> (p. ej. "video2")."""
+        try:
+            index = int(name[len("video"):])
+        except ValueError:
+            return
+        with self.lock:
+            camera = self.cameras.get(index)
+        if camera is not None:
+            camera.device_changed(present)
+
+    def shutdown(self):
+        with self.lock:
+            cameras = list(self.cameras.values())
+            self.cameras.clear()
+            self.order = []
+            self.focus = None
+        for camera in cameras:
+            camera.stop()
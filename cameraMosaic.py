@@ -0,0 +1,143 @@
+import math
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+from cameraCapture import fit_size
+
+MOSAIC_GAP: int = 8  # px entre mosaicos
+MOSAIC_BACKGROUND = (30, 30, 30)  # BGR del fondo y de las franjas de ajuste
+MOSAIC_TEXT_COLOR = (53, 254, 18)  # BGR del texto sobre los mosaicos (colorTheme)
+THUMBNAIL_HEIGHT: float = 0.22  # fracción del alto de la vista para la tira de miniaturas
+
+
+def grid_layout(count, width, height, gap=MOSAIC_GAP):
+    """Rectángulos (x, y, ancho, alto) de `count` mosaicos en una cuadrícula casi cuadrada."""
+    if count <= 0:
+        return []
+    cols = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / cols)
+    cell_w = (width - gap * (cols + 1)) // cols
+    cell_h = (height - gap * (rows + 1)) // rows
+    return [(gap + (i % cols) * (cell_w + gap), gap + (i // cols) * (cell_h + gap), max(cell_w, 1), max(cell_h, 1))
+            for i in range(count)]
+
+
+def focus_layout(count, width, height, gap=MOSAIC_GAP):
+    """La primera cámara grande y las demás como miniaturas 16:9 en una tira inferior."""
+    if count <= 1:
+        return grid_layout(count, width, height, gap)
+    thumbs = count - 1
+    thumb_h = max(int(height * THUMBNAIL_HEIGHT), 1)
+    thumb_w = max(min((width - gap * (thumbs + 1)) // thumbs, thumb_h * 16 // 9), 1)
+    slots = [(gap, gap, width - 2 * gap, max(height - thumb_h - 3 * gap, 1))]
+    slots += [(gap + i * (thumb_w + gap), height - gap - thumb_h, thumb_w, thumb_h) for i in range(thumbs)]
+    return slots
+
+
+class MosaicRenderer:
+    """Compone todas las cámaras en una sola imagen por cuadro.
+
+    El lienzo se reserva una vez por tamaño de vista; cada cámara se escala
+    directamente dentro de su rectángulo con cv2.resize(dst=...) y al final
+    se convierte a RGBA en otro búfer preasignado que la imagen de PIL
+    comparte (RGB de 3 bytes no se puede compartir). `present` actualiza una
+    única PhotoImage con paste, así Tk recibe una imagen por cuadro sin
+    importar cuántas cámaras haya.
+    """
+
+    def __init__(self, layout=grid_layout):
+        self.layout = layout
+        self.size = None
+        self.count = 0
+        self.canvas = None  # BGR
+        self.rgba = None
+        self.slots = []
+        self.placements = {}  # índice -> rectángulo ocupado por la imagen dentro de su mosaico
+        self.image = None
+        self.photo = None
+
+    def configure(self, width, height, count, force=False):
+        """Ajusta lienzo y rectángulos a la vista; devuelve True si hay que redibujar todo.
+
+        Solo reserva memoria si cambió el tamaño. `force` limpia el lienzo
+        aunque nada cambie (p. ej. otra cámara pasó a ser la principal).
+        """
+        width, height = max(width, 1), max(height, 1)
+        if (width, height) == self.size and count == self.count and not force:
+            return False
+        if (width, height) != self.size:
+            self.canvas = np.empty((height, width, 3), dtype=np.uint8)
+            self.rgba = np.empty((height, width, 4), dtype=np.uint8)
+            self.image = Image.frombuffer("RGBA", (width, height), self.rgba, "raw", "RGBA", 0, 1)
+            self.photo = None
+        self.size = (width, height)
+        self.count = count
+        self.canvas[:] = MOSAIC_BACKGROUND
+        self.slots = self.layout(count, width, height)
+        self.placements = {}
+        return True
+
+    def slot_at(self, x, y):
+        """Índice del mosaico que contiene el punto (x, y) de la vista, o None."""
+        for index, (sx, sy, w, h) in enumerate(self.slots):
+            if sx <= x < sx + w and sy <= y < sy + h:
+                return index
+        return None
+
+    def draw(self, index, frame):
+        """Escala `frame` (CameraFrame o imagen BGR) dentro de su mosaico conservando la proporción."""
+        x, y, w, h = self.slots[index]
+        if isinstance(frame, np.ndarray):
+            src_w, src_h = frame.shape[1], frame.shape[0]
+            image = frame
+        else:
+            src_w, src_h = frame.width, frame.height
+        fit_w, fit_h = fit_size(src_w, src_h, w, h)
+        if not isinstance(frame, np.ndarray):
+            image = frame.fit(fit_w, fit_h)  # JPEG decodificado a la escala más chica que alcanza
+
+        placement = (x + (w - fit_w) // 2, y + (h - fit_h) // 2, fit_w, fit_h)
+        if self.placements.get(index) != placement:
+            # Cambió el ajuste: repintar las franjas del mosaico una sola vez
+            self.canvas[y:y + h, x:x + w] = MOSAIC_BACKGROUND
+            self.placements[index] = placement
+        px, py = placement[:2]
+        view = self.canvas[py:py + fit_h, px:px + fit_w]
+        if image.shape[:2] == (fit_h, fit_w):
+            view[:] = image
+        else:
+            # La decodificación escalada ya dejó la imagen a menos del doble: lineal alcanza y es ~7x más rápido
+            interpolation = cv2.INTER_AREA if image.shape[1] >= 2 * fit_w else cv2.INTER_LINEAR
+            cv2.resize(image, (fit_w, fit_h), dst=view, interpolation=interpolation)
+
+    def clear(self, index, text=None):
+        """Vacía un mosaico (cámara sin cuadro) y opcionalmente escribe un estado centrado."""
+        x, y, w, h = self.slots[index]
+        self.canvas[y:y + h, x:x + w] = MOSAIC_BACKGROUND
+        self.placements.pop(index, None)
+        if text:
+            (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+            cv2.putText(self.canvas, text, (x + (w - text_w) // 2, y + (h + text_h) // 2),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, MOSAIC_TEXT_COLOR, 2, cv2.LINE_AA)
+
+    def draw_text(self, index, text):
+        """Rótulo en la esquina superior izquierda del mosaico (nombre, FPS)."""
+        x, y = self.placements.get(index, self.slots[index])[:2]  # Sobre la imagen: se repinta cada cuadro
+        cv2.putText(self.canvas, text, (x + 8, y + 24), cv2.FONT_HERSHEY_SIMPLEX, 0.6, MOSAIC_TEXT_COLOR, 1,
+                    cv2.LINE_AA)
+
+    def finish(self):
+        """Convierte el lienzo terminado a RGBA en el búfer que comparte la imagen de PIL."""
+        cv2.cvtColor(self.canvas, cv2.COLOR_BGR2RGBA, dst=self.rgba)
+
+    def present(self, label):
+        """Muestra el lienzo en `label` con una sola actualización de imagen."""
+        self.finish()
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage(self.image)
+            label.configure(image=self.photo)
+            label.image = self.photo
+        else:
+            self.photo.paste(self.image)
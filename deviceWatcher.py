@@ -0,0 +1,89 @@
+import asyncio
+import ctypes
+import os
+import struct
+
+DEVICE_DIRECTORY = "/dev"
+DEVICE_POLL_INTERVAL: float = 0.5  # segundos entre revisiones si inotify no está disponible
+
+# inotify(7): creación, borrado y cambio de permisos (udev ajusta el nodo después de crearlo)
+IN_ATTRIB = 0x00000004
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (seguido del nombre)
+
+
+def inotify_watch(directory, mask):
+    """Descriptor de inotify que vigila `directory`, o None si el sistema no lo ofrece."""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def parse_events(data):
+    """(máscara, nombre) de cada evento de un bloque leído del descriptor de inotify."""
+    events = []
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        offset += INOTIFY_EVENT.size
+        name = data[offset:offset + length].split(b"\0", 1)[0].decode(errors="replace")
+        offset += length
+        events.append((mask, name))
+    return events
+
+
+def list_devices(prefix, directory=DEVICE_DIRECTORY):
+    try:
+        return {name for name in os.listdir(directory) if name.startswith(prefix)}
+    except OSError:
+        return set()
+
+
+async def watch_devices(prefix, on_event, directory=DEVICE_DIRECTORY):
+    """Tarea del núcleo de E/S: avisa `on_event(nombre, presente)` cuando aparece o desaparece un nodo.
+
+    Usa inotify sobre /dev a través de ctypes (sin pyudev); si no está
+    disponible, compara el listado de /dev cada DEVICE_POLL_INTERVAL. Un
+    cambio de permisos se reporta como presente: es cuando udev deja el
+    nodo listo para abrirse.
+    """
+    fd = inotify_watch(directory, IN_CREATE | IN_DELETE | IN_ATTRIB)
+    if fd is None:
+        known = list_devices(prefix, directory)
+        while True:
+            await asyncio.sleep(DEVICE_POLL_INTERVAL)
+            current = list_devices(prefix, directory)
+            for name in sorted(current - known):
+                on_event(name, True)
+            for name in sorted(known - current):
+                on_event(name, False)
+            known = current
+
+    loop = asyncio.get_running_loop()
+
+    def on_readable():
+        try:
+            data = os.read(fd, 4096)
+        except BlockingIOError:
+            return
+        for mask, name in parse_events(data):
+            if name.startswith(prefix):
+                on_event(name, not mask & IN_DELETE)
+
+    loop.add_reader(fd, on_readable)
+    try:
+        await asyncio.Future()  # Hasta que se cancele la tarea
+    finally:
+        loop.remove_reader(fd)
+        os.close(fd)
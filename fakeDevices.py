@@ -0,0 +1,302 @@
+import collections
+import glob
+import json
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Dispositivos simulados con la misma interfaz que usa la GUI (cv2.VideoCapture,
+# rplidar.RPLidar, adafruit_mlx90640.MLX90640, serial.Serial). Generan datos
+# sintéticos deterministas o reproducen archivos grabados, sin hardware ni
+# pantalla. Con realtime=True respetan la cadencia del dispositivo real; si no,
+# entregan datos tan rápido como se pidan (para medir).
+
+FAKE_SEED: int = 7
+
+
+class FakeVideoCapture:
+    """Cámara simulada: un rectángulo que se mueve sobre un fondo con ruido.
+
+    `source` puede ser un video o una carpeta de imágenes (se repiten en bucle);
+    `qr_text` pega un código QR en el cuadro para el detector de QR.
+    """
+
+    def __init__(self, index=0, width=640, height=480, fps=30.0, source=None, qr_text=None, realtime=False):
+        self.index = index
+        self.props = {cv2.CAP_PROP_FRAME_WIDTH: float(width), cv2.CAP_PROP_FRAME_HEIGHT: float(height),
+                      cv2.CAP_PROP_FPS: float(fps), cv2.CAP_PROP_BUFFERSIZE: 4.0}
+        self.realtime = realtime
+        self.qr_text = qr_text
+        self.frame_number = 0
+        self.next_time = time.monotonic()
+        self.opened = True
+        self.video = None
+        self.images = None
+        if source is not None and os.path.isdir(source):
+            paths = sorted(glob.glob(os.path.join(source, "*.jpg")) + glob.glob(os.path.join(source, "*.png")))
+            self.images = [cv2.imread(p) for p in paths]
+            self.opened = bool(self.images)
+        elif source is not None:
+            self.video = cv2.VideoCapture(source)
+            self.opened = self.video.isOpened()
+        self.background = None
+        self.qr_image = None
+        self.grabbed = None  # cuadro tomado con grab() y aún no retirado
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        self.props[prop] = float(value)
+        self.background = None  # Otra resolución: regenerar el fondo
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0.0)
+
+    def synthetic_frame(self):
+        w = int(self.props[cv2.CAP_PROP_FRAME_WIDTH])
+        h = int(self.props[cv2.CAP_PROP_FRAME_HEIGHT])
+        if self.background is None or self.background.shape[:2] != (h, w):
+            rng = np.random.default_rng(FAKE_SEED)
+            gradient = np.linspace(40, 120, w, dtype=np.float32)[None, :, None]
+            self.background = np.clip(gradient + rng.normal(0, 8, (h, w, 3)), 0, 255).astype(np.uint8)
+            if self.qr_text is not None:
+                code = cv2.QRCodeEncoder.create().encode(self.qr_text)
+                side = min(w, h) // 3
+                self.qr_image = cv2.cvtColor(cv2.resize(code, (side, side), interpolation=cv2.INTER_NEAREST),
+                                             cv2.COLOR_GRAY2BGR)
+        frame = self.background.copy()
+        # Rectángulo en movimiento para el detector de movimiento
+        t = self.frame_number / self.props[cv2.CAP_PROP_FPS]
+        x = int((0.5 + 0.4 * math.sin(t)) * (w - w // 6))
+        y = int((0.5 + 0.3 * math.cos(0.7 * t)) * (h - h // 6))
+        cv2.rectangle(frame, (x, y), (x + w // 6, y + h // 6), (30, 200, 240), -1)
+        if self.qr_image is not None:
+            side = self.qr_image.shape[0]
+            frame[h - side - 10:h - 10, 10:10 + side] = self.qr_image
+        return frame
+
+    def grab(self):
+        if not self.opened:
+            return False
+        if self.realtime:
+            delay = self.next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_time = max(self.next_time, time.monotonic() - 1) + 1 / self.props[cv2.CAP_PROP_FPS]
+
+        if self.video is not None:
+            ret, frame = self.video.read()
+            if not ret:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self.video.read()
+        elif self.images is not None:
+            ret, frame = True, self.images[self.frame_number % len(self.images)].copy()
+        else:
+            ret, frame = True, self.synthetic_frame()
+        self.frame_number += 1
+        self.grabbed = frame if ret else None
+        return ret
+
+    def retrieve(self):
+        frame, self.grabbed = self.grabbed, None
+        if frame is None:
+            return False, None
+        if self.props.get(cv2.CAP_PROP_CONVERT_RGB, 1.0) == 0:
+            # Como un driver MJPG sin conversión: el JPEG crudo en una fila de bytes
+            frame = cv2.imencode(".jpg", frame)[1].reshape(1, -1)
+        return True, frame
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self):
+        self.opened = False
+        if self.video is not None:
+            self.video.release()
+
+
+class FakeRPLidar:
+    """LIDAR simulado: un cuarto rectangular visto desde un robot que se desplaza.
+
+    `scans` acepta escaneos grabados [(ángulos rad, distancias mm), ...] como
+    los de slamEngine.load_scans. `iter_scans` sigue la secuencia entre
+    llamadas, igual que el dispositivo (la GUI crea un generador por cuadro).
+    """
+
+    def __init__(self, port=None, baudrate=256000, timeout=0.05, scans=None, points=720,
+                 room=(8000.0, 6000.0), scan_rate=10.0, realtime=False):
+        self.port = port
+        self.scans = scans
+        self.points = points
+        self.room = room
+        self.scan_rate = scan_rate
+        self.realtime = realtime
+        self.scan_number = 0
+        self.next_time = time.monotonic()
+        self.rng = np.random.default_rng(FAKE_SEED)
+        self.motor = False
+
+    def get_info(self):
+        return {"model": 0, "firmware": (1, 29), "hardware": 7, "serialnumber": "FAKE"}
+
+    def get_health(self):
+        return ("Good", 0)
+
+    def start_motor(self):
+        self.motor = True
+
+    def stop_motor(self):
+        self.motor = False
+
+    def stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def synthetic_scan(self):
+        t = self.scan_number / self.scan_rate
+        half_w, half_h = self.room[0] / 2, self.room[1] / 2
+        # El robot recorre una elipse dentro del cuarto y gira despacio
+        x, y = 0.3 * half_w * math.cos(0.2 * t), 0.3 * half_h * math.sin(0.2 * t)
+        heading = 0.1 * t
+        angles = np.linspace(0, 2 * np.pi, self.points, endpoint=False)
+        world = heading - angles  # El RPLidar mide los ángulos en sentido horario
+        c, s = np.cos(world), np.sin(world)
+        with np.errstate(divide="ignore"):
+            tx = np.where(c > 0, (half_w - x) / c, (-half_w - x) / c)
+            ty = np.where(s > 0, (half_h - y) / s, (-half_h - y) / s)
+        distances = np.minimum(np.abs(tx), np.abs(ty)) + self.rng.normal(0, 10, self.points)
+        return angles, distances
+
+    def next_scan(self):
+        if self.realtime:
+            delay = self.next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_time = max(self.next_time, time.monotonic() - 1) + 1 / self.scan_rate
+        if self.scans is not None:
+            angles, distances = self.scans[self.scan_number % len(self.scans)]
+            angles = np.asarray(angles)
+        else:
+            angles, distances = self.synthetic_scan()
+        self.scan_number += 1
+        qualities = self.rng.integers(10, 60, len(angles))
+        # Mismo formato que rplidar: (calidad, ángulo en grados horario, distancia mm)
+        return list(zip(qualities.tolist(), np.degrees(angles).tolist(), np.asarray(distances).tolist()))
+
+    def iter_scans(self, max_buf_meas=3000, min_len=5):
+        while True:
+            yield self.next_scan()
+
+
+class FakeMLX90640:
+    """Sensor térmico simulado (24x32): ambiente a 22 °C y una fuente caliente que se mueve.
+
+    `frames` acepta cuadros grabados (N, 24, 32) en °C que se repiten en bucle.
+    """
+
+    def __init__(self, i2c=None, frames=None, realtime=False):
+        self.refresh_rate = None
+        self.frames = frames
+        self.realtime = realtime
+        self.frame_number = 0
+        self.next_time = time.monotonic()
+        self.rng = np.random.default_rng(FAKE_SEED)
+        self.rows, self.cols = np.mgrid[0:24, 0:32]
+
+    def getFrame(self, frame):
+        if self.realtime:
+            delay = self.next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_time = max(self.next_time, time.monotonic() - 1) + 1 / 16  # REFRESH_16_HZ
+        if self.frames is not None:
+            frame[:] = np.ravel(self.frames[self.frame_number % len(self.frames)])
+        else:
+            t = self.frame_number / 16
+            cy, cx = 12 + 6 * math.sin(0.5 * t), 16 + 10 * math.cos(0.3 * t)
+            blob = 15 * np.exp(-((self.rows - cy) ** 2 + (self.cols - cx) ** 2) / 18)
+            frame[:] = (22 + blob + self.rng.normal(0, 0.3, blob.shape)).ravel()
+        self.frame_number += 1
+
+
+class FakeSerial:
+    """Puerto serie del ESP32 simulado: líneas CSV (gas, magnetómetro) y JSON de encoders.
+
+    `lines` acepta un registro grabado (lista de líneas) que se repite en bucle.
+    Con realtime=True las líneas llegan a `rate_hz`; si no, solo llegan las que
+    se inyectan con `arrive(n)`, así cada lectura procesa una tanda conocida.
+    """
+
+    def __init__(self, port=None, baudrate=115200, timeout=0.01, lines=None, rate_hz=50.0, realtime=False):
+        self.port = port
+        self.lines = lines
+        self.rate_hz = rate_hz
+        self.realtime = realtime
+        self.is_open = True
+        self.pending = collections.deque()
+        self.waiting = 0  # bytes pendientes, como in_waiting del puerto real
+        self.line_number = 0
+        self.last_arrival = time.monotonic()
+        self.rng = np.random.default_rng(FAKE_SEED)
+
+    def synthetic_line(self):
+        n = self.line_number
+        if n % 2 == 0:
+            gas = 200 + int(50 * math.sin(n / 100)) + int(self.rng.integers(0, 5))
+            mag = 1800 + int(300 * math.sin(n / 37))
+            return f"{gas},{mag}"
+        counts = {key: int(512 + 400 * math.sin(n / period)) % 1024
+                  for key, period in (("encoder1", 50), ("encoder2", 70), ("encoder3", 90),
+                                      ("flipper1", 110), ("flipper2", 130))}
+        return json.dumps(counts)
+
+    def arrive(self, n):
+        for _ in range(n):
+            if self.lines is not None:
+                line = self.lines[self.line_number % len(self.lines)].rstrip("\r\n")
+            else:
+                line = self.synthetic_line()
+            data = (line + "\r\n").encode("utf-8")
+            self.pending.append(data)
+            self.waiting += len(data)
+            self.line_number += 1
+
+    @property
+    def in_waiting(self):
+        if self.realtime:
+            now = time.monotonic()
+            n = int((now - self.last_arrival) * self.rate_hz)
+            if n > 0:
+                self.arrive(n)
+                self.last_arrival += n / self.rate_hz
+        return self.waiting
+
+    def readline(self):
+        if not self.pending:
+            return b""
+        data = self.pending.popleft()
+        self.waiting -= len(data)
+        return data
+
+    def read(self, size=1):
+        data = bytearray()
+        while self.pending and len(data) < size:
+            chunk = self.pending.popleft()
+            taken = chunk[:size - len(data)]
+            if len(taken) < len(chunk):
+                self.pending.appendleft(chunk[len(taken):])  # El resto queda para la siguiente lectura
+            data += taken
+            self.waiting -= len(taken)
+        return bytes(data)
+
+    def close(self):
+        self.is_open = False
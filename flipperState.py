@@ -0,0 +1,39 @@
+import threading
+import time
+
+FLIPPER_KEYS = ("flipper1", "flipper2")  # Claves de los encoders de flippers en el JSON del ESP32
+FLIPPER_CHANGE_THRESHOLD = 0.5  # grados; cambios menores no se notifican
+
+
+class FlipperState:
+    """Ángulos actuales de los flippers alimentados por la telemetría de encoders.
+
+    `update` puede llamarse desde cualquier hilo; solo cuando algún flipper se
+    mueve más que el umbral se guarda el nuevo estado y se llama `on_change`
+    (normalmente para marcar sucio el widget de flippers).
+    """
+
+    def __init__(self, count=len(FLIPPER_KEYS), threshold=FLIPPER_CHANGE_THRESHOLD, on_change=None):
+        self.angles = (0.0,) * count
+        self.timestamp = None
+        self.threshold = threshold
+        self.on_change = on_change
+        self.lock = threading.Lock()
+
+    def update(self, angles_deg, t=None):
+        if t is None:
+            t = time.monotonic()
+        angles = tuple(float(a) for a in angles_deg)
+        with self.lock:
+            changed = self.timestamp is None or any(
+                abs(new - old) >= self.threshold for new, old in zip(angles, self.angles))
+            if changed:
+                self.angles = angles
+            self.timestamp = t
+        if changed and self.on_change is not None:
+            self.on_change()
+        return changed
+
+    def snapshot(self):
+        with self.lock:
+            return self.angles
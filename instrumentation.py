@@ -0,0 +1,161 @@
+import functools
+import json
+import threading
+import time
+from array import array
+
+import numpy as np
+
+SAMPLE_CAPACITY: int = 4096  # muestras por subsistema y por hilo (las más viejas se sobrescriben)
+STATS_WINDOW: float = 10.0  # segundos considerados para percentiles y tasa
+
+
+class Channel:
+    """Muestras de un subsistema en un solo hilo: (inicio ns, duración ns) en un anillo.
+
+    Solo escribe el hilo dueño, así que registrar no toma ningún lock; los
+    arreglos se reservan una vez y nunca crecen. También sirve de context
+    manager (no reentrante para el mismo nombre en el mismo hilo).
+    """
+
+    __slots__ = ("name", "thread", "starts", "durations", "count", "t_enter")
+
+    def __init__(self, name, thread, capacity=SAMPLE_CAPACITY):
+        self.name = name
+        self.thread = thread
+        self.starts = array("q", bytes(8 * capacity))
+        self.durations = array("q", bytes(8 * capacity))
+        self.count = 0
+        self.t_enter = 0
+
+    def record(self, start_ns, duration_ns):
+        i = self.count % len(self.starts)
+        self.starts[i] = start_ns
+        self.durations[i] = duration_ns
+        self.count += 1
+
+    def __enter__(self):
+        self.t_enter = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.record(self.t_enter, end - self.t_enter)
+        return False
+
+    def samples(self):
+        """Copia (inicios, duraciones) de las muestras vigentes como arreglos de numpy."""
+        n = min(self.count, len(self.starts))
+        return (np.frombuffer(self.starts, dtype=np.int64)[:n].copy(),
+                np.frombuffer(self.durations, dtype=np.int64)[:n].copy())
+
+
+class Instrumentation:
+    """Registro de latencias por subsistema con anillos preasignados por hilo.
+
+    `measure(nombre)` es un context manager y `timed(nombre)` un decorador;
+    ambos miden con perf_counter_ns y escriben en el anillo del hilo actual.
+    `stats()` combina los hilos y calcula p50/p95/p99 y tasa en la ventana
+    reciente; `dump()` guarda estadísticas y muestras en JSON para comparar
+    corridas. Desactivado, `measure` cuesta una consulta a un atributo.
+    """
+
+    def __init__(self, capacity=SAMPLE_CAPACITY):
+        self.capacity = capacity
+        self.enabled = True
+        self.local = threading.local()
+        self.channels = []  # Todos los canales de todos los hilos, para leerlos
+        self.lock = threading.Lock()
+
+    def channel(self, name):
+        channels = getattr(self.local, "channels", None)
+        if channels is None:
+            channels = self.local.channels = {}
+        channel = channels.get(name)
+        if channel is None:
+            channel = channels[name] = Channel(name, threading.current_thread().name, self.capacity)
+            with self.lock:
+                self.channels.append(channel)
+        return channel
+
+    def measure(self, name):
+        if not self.enabled:
+            return NULL_MEASURE
+        return self.channel(name)
+
+    def timed(self, name=None):
+        def decorator(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.channel(label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, start_ns, duration_ns):
+        """Registra una duración medida por fuera (p. ej. entre dos vueltas de un bucle)."""
+        if self.enabled:
+            self.channel(name).record(start_ns, duration_ns)
+
+    def stats(self, window=STATS_WINDOW):
+        """{subsistema: {n, rate_hz, p50_ms, p95_ms, p99_ms, max_ms}} de los últimos `window` s."""
+        now = time.perf_counter_ns()
+        since = now - int(window * 1e9)
+        with self.lock:
+            channels = list(self.channels)
+        durations = {}
+        for channel in channels:
+            starts, values = channel.samples()
+            durations.setdefault(channel.name, []).append(values[starts >= since])
+
+        result = {}
+        for name in sorted(durations):
+            values = np.concatenate(durations[name])
+            if values.size == 0:
+                continue
+            p50, p95, p99 = np.percentile(values, (50, 95, 99)) / 1e6
+            result[name] = {"n": int(values.size), "rate_hz": values.size / window,
+                            "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": values.max() / 1e6}
+        return result
+
+    def format_stats(self, window=STATS_WINDOW):
+        lines = [f"{'subsistema':<24}{'Hz':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  (ms)"]
+        for name, s in self.stats(window).items():
+            lines.append(f"{name[:24]:<24}{s['rate_hz']:7.1f}{s['p50_ms']:8.2f}{s['p95_ms']:8.2f}"
+                         f"{s['p99_ms']:8.2f}{s['max_ms']:8.2f}")
+        return "\n".join(lines)
+
+    def dump(self, path, window=STATS_WINDOW):
+        """Guarda en JSON las estadísticas y las muestras crudas (µs) de cada subsistema e hilo."""
+        with self.lock:
+            channels = list(self.channels)
+        samples = []
+        for channel in channels:
+            starts, values = channel.samples()
+            order = np.argsort(starts)
+            samples.append({"name": channel.name, "thread": channel.thread,
+                            "start_us": (starts[order] // 1000).tolist(),
+                            "duration_us": (values[order] / 1000).round(1).tolist()})
+        with open(path, "w") as f:
+            json.dump({"time": time.time(), "window_s": window, "stats": self.stats(window),
+                       "samples": samples}, f)
+
+
+class _NullMeasure:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_MEASURE = _NullMeasure()
+
+# Registro compartido por todo el proceso
+instruments = Instrumentation()
+measure = instruments.measure
+timed = instruments.timed
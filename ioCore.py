@@ -0,0 +1,208 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+
+from instrumentation import measure
+
+GUI_DRAIN_LIMIT: int = 200  # avisos máximos atendidos por cuadro (el resto espera al siguiente)
+SERIAL_READ_SIZE: int = 4096  # bytes máximos por lectura del puerto serie
+SERIAL_MAX_BUFFER: int = 64 * 1024  # bytes sin fin de línea antes de descartar lo más viejo
+SERIAL_POLL_INTERVAL: float = 0.01  # segundos entre lecturas de puertos sin descriptor (simulados)
+STOP_TIMEOUT: float = 3.0  # segundos de espera para que las tareas terminen al cerrar
+
+
+class LineSplitter:
+    """Corta un flujo de bytes en líneas completas.
+
+    Lo que llega sin fin de línea se guarda para la siguiente lectura; si se
+    acumulan más de `max_buffer` bytes sin línea completa (ruido en el puerto)
+    se descartan, así un emisor desbocado no hace crecer la memoria.
+    """
+
+    def __init__(self, max_buffer=SERIAL_MAX_BUFFER):
+        self.buffer = bytearray()
+        self.max_buffer = max_buffer
+        self.discarded = 0  # bytes descartados por exceso
+
+    def feed(self, data):
+        """Agrega bytes y devuelve las líneas completas decodificadas y sin espacios."""
+        self.buffer += data
+        end = self.buffer.rfind(b"\n")
+        if end < 0:
+            if len(self.buffer) > self.max_buffer:
+                self.discarded += len(self.buffer)
+                self.buffer.clear()
+            return []
+        lines = bytes(self.buffer[:end]).split(b"\n")
+        del self.buffer[:end + 1]
+        return [text for text in (line.decode("utf-8", errors="replace").strip() for line in lines) if text]
+
+
+class IoCore:
+    """Bucle asyncio en un hilo de fondo para toda la E/S de la GUI.
+
+    El puerto serie, el flujo del LIDAR y los procesos auxiliares corren como
+    tareas de este único bucle en lugar de hilos sueltos y lecturas
+    bloqueantes en el hilo de Tk. `submit` programa una corrutina desde
+    cualquier hilo y devuelve un Future cancelable. Los drivers sin API no
+    bloqueante (rplidar) usan `run_blocking`, que los atiende de a uno en un
+    solo hilo auxiliar.
+
+    Hacia la GUI todo pasa por una sola cola: `post` encola un callback y el
+    hilo de Tk la vacía una vez por cuadro con `drain`. Los avisos con `key`
+    se coalescen: si el anterior aún no se atendió se reemplaza, así un
+    productor rápido (escaneos del LIDAR) no acumula trabajo atrasado.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.tasks = set()  # tareas vivas lanzadas con submit
+        self.start_lock = threading.Lock()
+        self.blocking = None
+        self.gui_queue = queue.SimpleQueue()  # (clave, callback, args)
+        self.gui_pending = {}  # clave -> (callback, args) del último aviso coalescido
+        self.gui_lock = threading.Lock()
+        self.coalesced = 0  # avisos reemplazados antes de llegar a la GUI
+
+    def start(self):
+        """Arranca el hilo del bucle (lo hace solo la primera tarea)."""
+        with self.start_lock:
+            if self.thread is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self.blocking = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="io-bloqueante")
+            self.thread = threading.Thread(target=self.run, name="io", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def submit(self, coro):
+        """Programa `coro` en el bucle desde cualquier hilo; devuelve un concurrent.futures.Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self.guard(coro), self.loop)
+
+    async def guard(self, coro):
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            return await coro
+        except Exception as e:
+            print(f"Error en la tarea de E/S {coro.__qualname__}: {e}")
+        finally:
+            self.tasks.discard(task)
+
+    def call_soon(self, callback, *args):
+        """Ejecuta `callback(*args)` en el hilo de E/S."""
+        self.start()
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    async def run_blocking(self, func, *args):
+        """Corre una llamada bloqueante en el hilo auxiliar sin detener el bucle."""
+        return await self.loop.run_in_executor(self.blocking, func, *args)
+
+    def post(self, callback, *args, key=None):
+        """Encola `callback(*args)` para el hilo de Tk; con `key` solo llega el último pendiente."""
+        if key is None:
+            self.gui_queue.put((None, callback, args))
+            return
+        with self.gui_lock:
+            fresh = key not in self.gui_pending
+            self.gui_pending[key] = (callback, args)
+            if not fresh:
+                self.coalesced += 1
+        if fresh:
+            self.gui_queue.put((key, None, None))
+
+    def drain(self, limit=GUI_DRAIN_LIMIT):
+        """Atiende en el hilo de Tk los avisos pendientes; se llama una vez por cuadro."""
+        with measure("io.gui"):
+            for _ in range(limit):
+                try:
+                    key, callback, args = self.gui_queue.get_nowait()
+                except queue.Empty:
+                    return
+                if key is not None:
+                    with self.gui_lock:
+                        callback, args = self.gui_pending.pop(key)
+                try:
+                    callback(*args)
+                except Exception as e:
+                    print(f"Error al atender un aviso de E/S: {e}")
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Cancela las tareas, espera sus bloques finally (cierre de dispositivos) y detiene el bucle."""
+        if self.thread is None:
+            return
+
+        async def cancel_all():
+            tasks = [task for task in self.tasks if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_all(), self.loop).result(timeout)
+        except concurrent.futures.TimeoutError:
+            print("Algunas tareas de E/S no terminaron a tiempo.")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        self.blocking.shutdown(wait=False, cancel_futures=True)
+        self.thread = None
+
+
+async def stream_serial(connection, on_line):
+    """Lee un puerto serie sin bloquear y llama `on_line(línea)` en el hilo de E/S.
+
+    Con un puerto real espera al descriptor con `add_reader`; los puertos sin
+    descriptor (simulados, grabaciones) se consultan cada SERIAL_POLL_INTERVAL.
+    Termina si el puerto falla (desconexión) y se cancela como cualquier tarea;
+    un error de `on_line` solo descarta esa línea.
+    """
+    loop = asyncio.get_running_loop()
+    splitter = LineSplitter()
+
+    def handle(data):
+        with measure("io.serie"):
+            for line in splitter.feed(data):
+                try:
+                    on_line(line)
+                except Exception as e:
+                    # Una línea mal formada se descarta; solo una falla del puerto termina la lectura
+                    print(f"Error al procesar la línea serie {line!r}: {e}")
+
+    try:
+        fd = connection.fileno()
+    except (AttributeError, OSError):
+        fd = None
+
+    if fd is None:
+        while True:
+            waiting = connection.in_waiting
+            if waiting:
+                handle(connection.read(min(waiting, SERIAL_READ_SIZE)))
+            await asyncio.sleep(SERIAL_POLL_INTERVAL)
+
+    closed = loop.create_future()
+
+    def on_readable():
+        try:
+            # Con timeout=0 devuelve lo disponible; un puerto desconectado lanza SerialException
+            handle(connection.read(SERIAL_READ_SIZE))
+        except Exception as e:
+            loop.remove_reader(fd)
+            if not closed.done():
+                closed.set_exception(e)
+
+    connection.timeout = 0  # Lecturas no bloqueantes: solo se lee lo que ya llegó
+    loop.add_reader(fd, on_readable)
+    try:
+        await closed
+    finally:
+        loop.remove_reader(fd)
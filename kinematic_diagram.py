@@ -3,6 +3,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 
+from kinematics import enc_to_rad, forward_kinematics
+
 esp32 = serial.Serial('/dev/ttyUSB0', 9600, timeout=0)
 
 latest = {"encoder1":0, "encoder2":0, "encoder3":0}
@@ -29,9 +31,7 @@ t.start()
 
 # Parámetros del brazo
 L1, L2, L3 = 2.0, 1.5, 1.0
-
-def enc_to_rad(x):
-    return (x/1024.0)*2*np.pi
+LINKS = np.array([L1, L2, L3])
 
 # Prepara figura y artistas
 fig, ax = plt.subplots(figsize=(6,6))
@@ -41,17 +41,12 @@ lines = [ax.plot([],[], '-', lw=6, solid_capstyle='round')[0] for _ in range(3)]
 joints = ax.plot([], [], 'o', ms=10, mec='k', mfc='w', mew=2)[0]
 
 def get_pts():
-    θ1 = enc_to_rad(latest["encoder1"])
-    θ2 = enc_to_rad(latest["encoder2"])
-    θ3 = enc_to_rad(latest["encoder3"])
-    x1,y1 = L1*np.cos(θ1), L1*np.sin(θ1)
-    x2,y2 = x1+L2*np.cos(θ1+θ2), y1+L2*np.sin(θ1+θ2)
-    x3,y3 = x2+L3*np.cos(θ1+θ2+θ3), y2+L3*np.sin(θ1+θ2+θ3)
-    return [(0,0),(x1,y1),(x2,y2),(x3,y3)]
+    θ = enc_to_rad([latest["encoder1"], latest["encoder2"], latest["encoder3"]])
+    return forward_kinematics(LINKS, θ)
 
 def update(frame):
     pts = get_pts()
-    xs, ys = zip(*pts)
+    xs, ys = pts[:, 0], pts[:, 1]
     for i, ln in enumerate(lines):
         ln.set_data([xs[i], xs[i+1]], [ys[i], ys[i+1]])
     joints.set_data(xs, ys)
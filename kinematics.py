@@ -0,0 +1,75 @@
+import threading
+import time
+
+import numpy as np
+
+from sensorHistory import RingBuffer
+
+ENCODER_COUNTS = 1024  # Cuentas por vuelta de los encoders del brazo
+
+
+def enc_to_rad(x):
+    return (np.asarray(x, dtype=np.float64) / ENCODER_COUNTS) * 2 * np.pi
+
+
+def forward_kinematics(lengths, angles):
+    """Cinemática directa de una cadena plana de N eslabones.
+
+    Args:
+        lengths (array): Longitudes de los N eslabones.
+        angles (array): Ángulos relativos de cada articulación, forma (..., N).
+            Admite lotes: cualquier dimensión extra se calcula a la vez.
+
+    Returns:
+        np.ndarray: Puntos (..., N + 1, 2) desde la base hasta el efector.
+    """
+    lengths = np.asarray(lengths, dtype=np.float64)
+    absolute = np.cumsum(np.asarray(angles, dtype=np.float64), axis=-1)
+    # Un solo cos/sin vectorizado para todas las articulaciones (y todos los lotes)
+    steps = lengths[..., None] * np.stack((np.cos(absolute), np.sin(absolute)), axis=-1)
+    points = np.zeros(absolute.shape[:-1] + (lengths.shape[-1] + 1, 2))
+    np.cumsum(steps, axis=-2, out=points[..., 1:, :])
+    return points
+
+
+class EncoderInterpolator:
+    """Muestras de encoder con marca de tiempo, interpoladas al tiempo de pantalla.
+
+    La pantalla se dibuja con un retraso fijo (`delay`) respecto al reloj para
+    que casi siempre haya una muestra a cada lado y se interpole en lugar de
+    extrapolar. La interpolación toma el camino angular más corto, así el paso
+    de 1023 a 0 cuentas no da una vuelta completa.
+    """
+
+    def __init__(self, joints, capacity=256, delay=0.05):
+        self.joints = joints
+        self.delay = delay
+        self.samples = RingBuffer(capacity, joints + 1)  # (tiempo, ángulos...)
+        self.lock = threading.Lock()
+
+    def add(self, angles, t=None):
+        if t is None:
+            t = time.monotonic()
+        with self.lock:
+            self.samples.append(np.concatenate(([t], angles)))
+
+    def sample(self, t=None, lookback=32):
+        """Ángulos interpolados en `t - delay`, o None si aún no hay muestras."""
+        if t is None:
+            t = time.monotonic()
+        t -= self.delay
+        with self.lock:
+            recent = self.samples.last(lookback)
+        if len(recent) == 0:
+            return None
+
+        times, angles = recent[:, 0], recent[:, 1:]
+        if t <= times[0]:
+            return angles[0]
+        if t >= times[-1]:
+            return angles[-1]
+
+        i = int(np.searchsorted(times, t))
+        alpha = (t - times[i - 1]) / (times[i] - times[i - 1])
+        delta = (angles[i] - angles[i - 1] + np.pi) % (2 * np.pi) - np.pi
+        return angles[i - 1] + alpha * delta
@@ -3,7 +3,6 @@ import time
 import numpy as np
 import customtkinter as ctk
 from PIL import Image, ImageDraw
-from rplidar import RPLidar, RPLidarException
 
 # Configuración de CustomTkinter
 ctk.set_appearance_mode("dark")
@@ -20,6 +19,79 @@ LINUX_DEVICE_PATH = '/dev/ttyUSB0'
 REFRESH_RATE = 30  # ms
 
 
+def draw_radar_guides(draw, center_x, center_y, scale_factor):
+    """Dibuja las guías del radar (círculos y líneas de ángulo)"""
+    # Círculos concéntricos
+    for r in range(1000, D_MAX, 1000):
+        scaled_r = r * scale_factor
+        draw.ellipse(
+            [
+                (center_x - scaled_r, center_y - scaled_r),
+                (center_x + scaled_r, center_y + scaled_r)
+            ],
+            outline="#00FF00",
+            width=1
+        )
+
+    # Líneas de ángulo
+    for angle in range(0, 360, 30):
+        rad = np.radians(angle)
+        end_x = center_x + D_MAX * scale_factor * np.sin(rad)
+        end_y = center_y - D_MAX * scale_factor * np.cos(rad)
+        draw.line(
+            [(center_x, center_y), (end_x, end_y)],
+            fill="#00FF00",
+            width=1
+        )
+
+
+def get_color(intensity):
+    """Mapea la intensidad a un color"""
+    # Mapeo simple de intensidad a color (azul a rojo)
+    r = int(255 * intensity)
+    g = 0
+    b = int(255 * (1 - intensity))
+    return (r, g, b)
+
+
+def render_radar(scan, width, height):
+    """Imagen del radar con las guías y los puntos de un escaneo; devuelve (imagen, puntos dibujados).
+
+    No depende de Tk, así se puede medir sin pantalla.
+    """
+    center_x, center_y = width // 2, height // 2
+    scale_factor = width / (2 * D_MAX)
+
+    # Crear nueva imagen (conservando las guías)
+    image = Image.new("RGB", (width, height), "black")
+    draw = ImageDraw.Draw(image)
+    draw_radar_guides(draw, center_x, center_y, scale_factor)
+
+    # Procesar puntos
+    point_count = 0
+    for measurement in scan:
+        quality, angle, distance = measurement
+
+        if distance > 20 and distance < D_MAX and quality > 0:
+            # Convertir a coordenadas cartesianas
+            rad = np.radians(angle)
+            x = center_x + distance * scale_factor * np.sin(rad)
+            y = center_y - distance * scale_factor * np.cos(rad)
+
+            # Mapear intensidad a color
+            intensity_norm = min(max((quality - I_MIN) / (I_MAX - I_MIN), 1.0), 0.0)
+            color = get_color(intensity_norm)
+
+            # Dibujar punto
+            draw.ellipse(
+                [(x - 2, y - 2), (x + 2, y + 2)],
+                fill=color,
+                outline=color
+            )
+            point_count += 1
+    return image, point_count
+
+
 class LidarVisualizationApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -76,30 +148,7 @@ class LidarVisualizationApp(ctk.CTk):
 
     def draw_radar_guides(self):
         """Dibuja las guías del radar en la imagen"""
-        draw = ImageDraw.Draw(self.radar_image)
-
-        # Círculos concéntricos
-        for r in range(1000, D_MAX, 1000):
-            scaled_r = r * self.scale_factor
-            draw.ellipse(
-                [
-                    (self.center_x - scaled_r, self.center_y - scaled_r),
-                    (self.center_x + scaled_r, self.center_y + scaled_r)
-                ],
-                outline="#00FF00",
-                width=1
-            )
-
-        # Líneas de ángulo
-        for angle in range(0, 360, 30):
-            rad = np.radians(angle)
-            end_x = self.center_x + D_MAX * self.scale_factor * np.sin(rad)
-            end_y = self.center_y - D_MAX * self.scale_factor * np.cos(rad)
-            draw.line(
-                [(self.center_x, self.center_y), (end_x, end_y)],
-                fill="#00FF00",
-                width=1
-            )
+        draw_radar_guides(ImageDraw.Draw(self.radar_image), self.center_x, self.center_y, self.scale_factor)
 
         # Actualizar imagen
         self.update_radar_image()
@@ -111,6 +160,8 @@ class LidarVisualizationApp(ctk.CTk):
 
     def start_lidar(self):
         """Inicia la conexión con el LIDAR y el escaneo"""
+        from rplidar import RPLidar
+
         if not os.path.exists(LINUX_DEVICE_PATH):
             self.info_label.configure(text="ERROR: Dispositivo no encontrado", text_color="red")
             return
@@ -159,33 +210,8 @@ class LidarVisualizationApp(ctk.CTk):
             # Obtener datos del LIDAR
             scan = next(self.lidar.iter_scans(max_buf_meas=SCAN_BUFFER, min_len=3))
 
-            # Crear nueva imagen (conservando las guías)
-            self.radar_image = Image.new("RGB", (self.image_width, self.image_height), "black")
-            draw = ImageDraw.Draw(self.radar_image)
-            self.draw_radar_guides()  # Redibujar guías
-
-            # Procesar puntos
-            point_count = 0
-            for measurement in scan:
-                quality, angle, distance = measurement
-
-                if distance > 20 and distance < D_MAX and quality > 0:
-                    # Convertir a coordenadas cartesianas
-                    rad = np.radians(angle)
-                    x = self.center_x + distance * self.scale_factor * np.sin(rad)
-                    y = self.center_y - distance * self.scale_factor * np.cos(rad)
-
-                    # Mapear intensidad a color
-                    intensity_norm = min(max((quality - I_MIN) / (I_MAX - I_MIN), 1.0), 0.0)
-                    color = self.get_color(intensity_norm)
-
-                    # Dibujar punto
-                    draw.ellipse(
-                        [(x - 2, y - 2), (x + 2, y + 2)],
-                        fill=color,
-                        outline=color
-                    )
-                    point_count += 1
+            # Nueva imagen con las guías y los puntos del escaneo
+            self.radar_image, point_count = render_radar(scan, self.image_width, self.image_height)
 
             # Actualizar información
             self.info_label.configure(
@@ -203,14 +229,6 @@ class LidarVisualizationApp(ctk.CTk):
         # Programar próxima actualización
         self.after(REFRESH_RATE, self.update_lidar_data)
 
-    def get_color(self, intensity):
-        """Mapea la intensidad a un color"""
-        # Mapeo simple de intensidad a color (azul a rojo)
-        r = int(255 * intensity)
-        g = 0
-        b = int(255 * (1 - intensity))
-        return (r, g, b)
-
     def on_closing(self):
         """Maneja el cierre de la ventana"""
         self.stop_lidar()
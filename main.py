@@ -1,21 +1,36 @@
+# La línea de tiempo se crea antes que nada para medir también los imports
+from startupTimeline import StartupTimeline
+startup_timeline = StartupTimeline()
+
 import customtkinter as ctk
 from PIL import Image, ImageTk, ImageDraw
-import cv2
 import math
+import queue
 import threading
-import subprocess
-import serial
-import sys
 import json
 
-import matplotlib.animation as animation
-import matplotlib.pyplot as plt
+# matplotlib, cv2, serial y rplidar se importan al usarse (en segundo plano al
+# arrancar): la ventana aparece sin esperar por ellos
 import numpy as np
-from rplidar import RPLidar, RPLidarException
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from os import path
 import time
 
+from sensorHistory import SensorHistory, create_sparkline, draw_sparkline
+from telemetryBus import TelemetryBus, ALL_CHANNELS
+from kinematics import EncoderInterpolator, enc_to_rad, forward_kinematics
+from redrawScheduler import RedrawScheduler
+from flipperState import FlipperState, FLIPPER_KEYS
+from slamEngine import SlamThread
+from mapView import MapPyramid, MapView
+from processSupervisor import ProcessSupervisor
+from workerPool import DetectorPool, WORKER_DETECTORS
+from instrumentation import instruments, measure, timed
+from ioCore import IoCore, stream_serial
+from runRecorder import Recorder
+from runReplay import current_replay, install_replay
+
+startup_timeline.mark("imports")
+
 colorTheme = '#12fe35'
 SERIAL_PORT = "/dev/ttyTHS0"
 BAUD_RATE = 115200
@@ -30,50 +45,195 @@ LIDAR_POINT_SIZE: int = 10
 LIDAR_FRAME_RATE: int = 30
 LINUX_DEVICE_PATH: str = '/dev/ttyUSB0'
 
+SPARKLINE_WIDTH: int = 150
+SPARKLINE_HEIGHT: int = 30
+SPARKLINE_WINDOW: float = 300.0  # segundos de historial mostrados (5 min)
+SPARKLINE_SCROLL_INTERVAL: int = int(SPARKLINE_WINDOW / SPARKLINE_WIDTH * 1000)  # ms por píxel de la ventana
+CAMERA_FRAME_INTERVAL: int = 30  # ms entre cuadros de cada cámara (tarea esencial)
+CAMERA_CAPTURE_SIZE: tuple = (1280, 720)  # resolución pedida para la vista de cámara (MJPG)
+INSTRUMENTATION_REFRESH: int = 500  # ms entre refrescos del panel de rendimiento (F3)
+
+# Canales numéricos mostrados en el tablero de telemetría
+TELEMETRY_CHANNELS = ["co_ppm", "magnetometer", "encoder1_deg", "encoder2_deg", "encoder3_deg",
+                      "flipper1_deg", "flipper2_deg",
+                      "lidar_points", "camera1_fps"]
+
+# Bus de telemetría: todos los productores publican aquí
+telemetry_bus = TelemetryBus()
+
+# Historial de los sensores del ESP32 (CO y magnetómetro), alimentado por el bus
+sensor_history = SensorHistory()
+telemetry_bus.subscribe(ALL_CHANNELS, sensor_history.add)
+
+# Redibujado por lotes de los widgets que cambiaron, una pasada por cuadro
+redraw_scheduler = RedrawScheduler()
+
+# Bucle asyncio en segundo plano para el puerto serie, el LIDAR y los procesos auxiliares;
+# sus avisos a la GUI se atienden una vez por cuadro
+io_core = IoCore()
+
+# Herramientas auxiliares (nombre del botón, script, recurso exclusivo que ocupan).
+# Los detectores de la cámara 0 viven en el pool precargado (workerPool.py).
+HELPER_TOOLS = [
+    ("Cámara Térmica", "thermalCamera.py", "camara4"),
+]
+
+# Una instancia por herramienta; su estado se muestra en la barra de botones
+process_supervisor = ProcessSupervisor(io_core, on_change=lambda: redraw_scheduler.mark_dirty("tools"))
+for tool_name, tool_script, tool_resource in HELPER_TOOLS:
+    process_supervisor.register(tool_name, tool_script, tool_resource)
+
+# Detectores con módulos y pesos ya cargados: activarlos no paga el arranque en frío
+detector_pool = DetectorPool(io_core, on_change=lambda: redraw_scheduler.mark_dirty("tools"))
+
+# Estado real de los flippers (telemetría del ESP32); al cambiar se marca sucio su widget
+flipper_state = FlipperState(on_change=lambda: redraw_scheduler.mark_dirty("flippers"))
+
+# Grabación de la corrida (cámaras, LIDAR y serie); se activa con el botón "Grabar"
+recorder = Recorder()
+
+# Cámaras abiertas una sola vez (principal + miniaturas) y su vista compuesta en una imagen por cuadro
+camera_manager = None
+camera_mosaic = None
+camera_drawn = {}  # mosaico -> (índice, secuencia, estado) ya dibujado
+camera_layout_drawn = None  # layout_version del gestor con la que se armó el mosaico
+
 lidar_instance = None
-lidar_ani = None
+lidar_task = None  # Flujo de escaneos en el núcleo de E/S
+lidar_blitter = None
 lidar_line = None
 lidar_ax = None
 lidar_fig = None
 lidar_canvas_tkagg = None
 
+# SLAM en proceso alimentado por el mismo flujo de escaneos del LIDAR (None = apagado)
+slam_thread = None
+slam_map_window = None
+
 # Variables globales para el brazo robótico
-robot_arm_ani = None
-robot_arm_line1 = None
-robot_arm_line2 = None
-robot_arm_line3 = None
+robot_arm_blitter = None
+robot_arm_lines = None
 robot_arm_fig = None
 robot_arm_ax = None
 robot_arm_joint_points = None  # Para los marcadores de las articulaciones
 
-# Poses definidas para el movimiento del brazo (theta1, theta2, theta3) en radianes
-# Estas poses se han elegido para simular un movimiento "realista"
-# theta1: ángulo de la base (plano XY)
-# theta2: ángulo de la primera articulación (elevación/descenso)
-# theta3: ángulo de la segunda articulación (extensión/retracción)
-ROBOT_ARM_POSES = [
-    (0, np.pi / 4, np.pi / 4),  # Pose inicial (brazo ligeramente elevado)
-    (np.pi / 3, np.pi / 6, np.pi / 3),  # Moverse a la derecha, extender un poco
-    (-np.pi / 4, np.pi / 2, 0),  # Moverse a la izquierda, más elevado, más recto
-    (0, np.pi / 8, np.pi / 2),  # Centro, extender más
-    (np.pi / 6, np.pi / 4, np.pi / 6)  # Otra pose de trabajo
-]
-POSE_TRANSITION_FRAMES = 50  # Número de frames para transicionar entre cada pose
+# Longitudes de los eslabones del brazo y claves de sus encoders en el JSON del ESP32
+ROBOT_ARM_LINKS = (1.0, 0.8, 0.6)
+ENCODER_KEYS = ("encoder1", "encoder2", "encoder3")
+KINEMATIC_FRAME_INTERVAL = 16  # ms, ~60 Hz; los ángulos se interpolan al tiempo de pantalla
+
+# Muestras de los encoders con marca de tiempo para interpolar la pose del brazo
+arm_encoders = EncoderInterpolator(len(ROBOT_ARM_LINKS))
+
+# Puerto serie del ESP32; lo abre el arranque en segundo plano y lo lee el núcleo de E/S
+ser = None
+serial_task = None
+
+# Subsistemas que se inician después de mostrar la ventana
+startup_results = queue.Queue()  # (nombre, on_ready, resultado, error) listos para el hilo de Tk
+startup_status = {}  # nombre -> estado mostrado en la barra de arranque
+startup_total_ms = None  # duración del arranque completo, fijada la primera vez que termina
+
+
+def open_serial():
+    replay = current_replay()
+    if replay is not None:
+        return replay.serial()
+    import serial
+    try:
+        connection = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=0.01)
+        print("Conexión establecida con ESP32")
+        return connection
+    except serial.SerialException:
+        print("No se pudo abrir el puerto serie")
+        return None
+
+
+def on_serial_ready(connection):
+    global ser, serial_task
+    ser = connection
+    if connection is not None:
+        serial_task = io_core.submit(stream_serial(connection, handle_serial_line))
+    return "conectado" if connection is not None else "sin conexión"
+
+
+def start_in_background(name, work, on_ready=None):
+    """Ejecuta `work()` en un hilo y luego `on_ready(resultado)` en el hilo de Tk.
+
+    `on_ready` puede devolver el texto de estado a mostrar (por defecto "listo").
+    Ambas fases quedan en la línea de tiempo de arranque.
+    """
+    startup_status[name] = "iniciando..."
+    redraw_scheduler.mark_dirty("startup")
+
+    def run():
+        result, error = None, None
+        try:
+            with startup_timeline.span(name):
+                result = work()
+        except Exception as e:
+            error = e
+        startup_results.put((name, on_ready, result, error))
+        redraw_scheduler.mark_dirty("startup")
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+
+
+def update_startup_status(status_label):
+    """Completa en el hilo de Tk los subsistemas ya iniciados y muestra el progreso."""
+    global startup_total_ms
+    while True:
+        try:
+            name, on_ready, result, error = startup_results.get_nowait()
+        except queue.Empty:
+            break
+        status = "listo"
+        if error is None and on_ready is not None:
+            try:
+                with startup_timeline.span(f"{name} (GUI)"):
+                    status = on_ready(result) or status
+            except Exception as e:
+                error = e
+        if error is not None:
+            print(f"Error al iniciar {name}: {error}")
+            status = "error"
+        startup_status[name] = status
+
+    if any(status == "iniciando..." for status in startup_status.values()):
+        text = "   ".join(f"{name}: {status}" for name, status in startup_status.items())
+    else:
+        if startup_total_ms is None:
+            startup_total_ms = startup_timeline.now() * 1000
+            startup_timeline.mark("arranque completo")
+            print(startup_timeline.report())
+        text = f"Arranque completo en {startup_total_ms:.0f} ms"
+    if status_label.cget("text") != text:
+        status_label.configure(text=text)
+
+
+def import_plotting():
+    """Importa el stack de matplotlib para Tk (lo más lento del arranque)."""
+    import matplotlib.backends.backend_tkagg
+    import matplotlib.figure
+
+
+def start_lidar_subsystem():
+    import_plotting()
+    return create_lidar_gui()
 
-try:
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=0.01)
-    print("Conexión establecida con ESP32")
-except serial.SerialException:
-    print("No se pudo abrir el puerto serie")
 
 def configure_lidar_plot(parent_frame):
     global lidar_fig, lidar_ax, lidar_line, lidar_canvas_tkagg
+    import matplotlib
+    from matplotlib.artist import setp
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
 
-    plt.rcParams['toolbar'] = 'None'
-    plt.rcParams['figure.facecolor'] = 'black'
-    plt.rcParams['axes.facecolor'] = 'black'
+    matplotlib.rcParams['toolbar'] = 'None'
+    matplotlib.rcParams['figure.facecolor'] = 'black'
+    matplotlib.rcParams['axes.facecolor'] = 'black'
 
-    fig = plt.Figure(figsize=(4.5, 4.5), facecolor='black', dpi=100)
+    fig = Figure(figsize=(4.5, 4.5), facecolor='black', dpi=100)
     ax = fig.add_subplot(111, projection='polar')
     ax.set_facecolor('black')
 
@@ -97,7 +257,7 @@ def configure_lidar_plot(parent_frame):
     cbar = fig.colorbar(line, ax=ax, pad=0.08, fraction=0.046)
     cbar.set_label('Intensidad', rotation=270, color='white', labelpad=20)
     cbar.ax.yaxis.set_tick_params(color='white')
-    plt.setp(cbar.ax.get_yticklabels(), color='white')
+    setp(cbar.ax.get_yticklabels(), color='white')
 
     canvas_tkagg = FigureCanvasTkAgg(fig, master=parent_frame)
     canvas_tkagg.draw()
@@ -111,14 +271,10 @@ def configure_lidar_plot(parent_frame):
     return fig, ax, line, canvas_tkagg
 # --- FIN DE configure_lidar_plot MOVIDA ---
 
-try:
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=0.01)
-    print("Conexión establecida con ESP32")
-except serial.SerialException:
-    print("No se pudo abrir el puerto serie")
 
 def start_lidar_animation():
-    global lidar_ani, lidar_instance, lidar_line, lidar_ax, lidar_fig
+    global lidar_blitter, lidar_instance, lidar_task
+    from matPlotInCtk import FigureBlitter
 
     if lidar_instance is None:
         lidar_instance = create_lidar_gui()
@@ -134,62 +290,101 @@ def start_lidar_animation():
         # Por ahora, asumimos que configure_lidar_plot ya fue llamada en create_gui.
         return
 
-    INTERVAL = int(1000 / LIDAR_FRAME_RATE)
-
-    lidar_ani = animation.FuncAnimation(
-        lidar_fig,
-        update_frame_lidar,
-        interval=INTERVAL,
-        blit=True,
-        cache_frame_data=False
-    )
+    # El núcleo de E/S lee los escaneos; cada uno nuevo marca sucio el widget y
+    # el planificador blitea la nube de puntos a lo sumo LIDAR_FRAME_RATE veces por segundo
+    lidar_blitter = FigureBlitter(lidar_fig.canvas, [lidar_line])
+    redraw_scheduler.register("lidar", lidar_blitter.blit, priority=4, max_rate=LIDAR_FRAME_RATE)
+    lidar_task = io_core.submit(stream_lidar(lidar_instance))
     lidar_fig.canvas.mpl_connect("close_event", stop_lidar_animation)
-    lidar_fig.canvas.draw_idle()
 
-def read_sensors():
+
+def handle_serial_line(line):
+    """Atiende una línea del ESP32 en el hilo de E/S: JSON de encoders o CSV de gas y magnetómetro."""
+    recorder.add_serial(line)
+    # Las líneas JSON traen los encoders (brazo y flippers); las CSV, gas y magnetómetro
+    if line.startswith("{"):
+        handle_encoder_message(line)
+        return
+    values = line.split(",")
+    if len(values) != 2:
+        return
     try:
-        while ser.in_waiting > 0:
-            line = ser.readline().decode('utf-8').strip()
-        values = line.split(",")
-        if len(values) == 2:
-            gas_value = int(values[0])
-            mag_analog = int(values[1])
-            return gas_value, mag_analog
-    except Exception as e:
-        print(f"Error al leer los sensores: {e}")
-    return None, None
+        gas_value, mag_analog = int(values[0]), int(values[1])
+    except ValueError:
+        return
+    now = time.monotonic()
+    telemetry_bus.publish("co_ppm", mq7_to_ppm(gas_value), now)
+    telemetry_bus.publish("magnetometer", magnetometer_to_value(mag_analog), now)
 
 
-def read_magnetometer():
-    _, mag_analog = read_sensors()
-    if mag_analog is not None:
-        scaled_value = (mag_analog - 1800) / 1800 * 550
-        return int(scaled_value)
-    return 0
+def handle_encoder_message(line):
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return
 
+    now = time.monotonic()
+    if all(key in data for key in ENCODER_KEYS):
+        angles = enc_to_rad([data[key] for key in ENCODER_KEYS])
+        arm_encoders.add(angles, now)
+        for key, angle in zip(ENCODER_KEYS, np.degrees(angles)):
+            telemetry_bus.publish(f"{key}_deg", angle, now)
 
-def read_mq7_sensor():
-    gas_value, _ = read_sensors()
-    if gas_value is not None:
-        ppm = gas_value
-        return int(ppm - 100)
-    return 0
+    if all(key in data for key in FLIPPER_KEYS):
+        # Cuentas del encoder -> grados en [-180, 180) respecto a la horizontal
+        angles = (np.degrees(enc_to_rad([data[key] for key in FLIPPER_KEYS])) + 180) % 360 - 180
+        flipper_state.update(angles, now)
+        for key, angle in zip(FLIPPER_KEYS, angles):
+            telemetry_bus.publish(f"{key}_deg", angle, now)
 
 
-def run_script(script_name):
-    try:
-        subprocess.run(["python3", script_name], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error al ejecutar {script_name}: {e}")
+def magnetometer_to_value(mag_analog):
+    scaled_value = (mag_analog - 1800) / 1800 * 550
+    return int(scaled_value)
+
+
+def mq7_to_ppm(gas_value):
+    ppm = gas_value
+    return int(ppm - 100)
 
 
-def execute_script(script_name):
-    thread = threading.Thread(target=run_script, args=(script_name,), daemon=True)
-    thread.start()
+def read_magnetometer():
+    mag_value = sensor_history.latest("magnetometer")
+    return 0 if mag_value is None else int(mag_value)
+
+
+def read_mq7_sensor():
+    ppm = sensor_history.latest("co_ppm")
+    return 0 if ppm is None else int(ppm)
+
+
+def update_tools_status(status_label):
+    parts = []
+    states = {**detector_pool.states(), **process_supervisor.states()}
+    for name, (state, cpu, rss) in states.items():
+        if state not in ("detenido", "listo"):
+            parts.append(f"{name}: {state} {cpu:.0f}% CPU {rss:.0f} MB")
+    if recorder.active:
+        parts.append(f"grabando en {recorder.session}")
+    text = "   |   ".join(parts)
+    if status_label.cget("text") != text:
+        status_label.configure(text=text)
+
+
+def toggle_recording():
+    """Inicia o detiene la grabación; el cierre (vaciar colas, esperar al codificador) va en otro hilo."""
+    if recorder.active:
+        threading.Thread(target=recorder.stop, name="grabación", daemon=True).start()
+    else:
+        try:
+            recorder.start(camera_manager.recording_info() if camera_manager is not None else ())
+        except OSError as e:
+            print(f"Error al iniciar la grabación: {e}")
+    redraw_scheduler.mark_dirty("tools")
 
 
 
-def create_flippers_animation(canvas):
+def create_flippers_widget(canvas):
     width = 200
     height = 200
 
@@ -200,9 +395,6 @@ def create_flippers_animation(canvas):
     flipper_width = 25
     colors = ["#00ffff", colorTheme]
 
-    flipper_angles = [0, 0]
-    direction = 1
-
     def draw_rounded_rectangle(x1, y1, x2, y2, radius=30, **kwargs):
         points = [
             x1 + radius, y1,
@@ -220,80 +412,144 @@ def create_flippers_animation(canvas):
         ]
         return canvas.create_polygon(points, **kwargs, smooth=True, tag="flipper")
 
-    def draw_flippers():
-        canvas.delete("flipper")
-
-        draw_rounded_rectangle(40, 130, 250, 160, radius=25,
-                               fill="#333333", outline=colorTheme, width=3)
+    # Los items se crean una sola vez; después solo se mueven con canvas.coords
+    draw_rounded_rectangle(40, 130, 250, 160, radius=25,
+                           fill="#333333", outline=colorTheme, width=3)
+    flipper_items = []
+    for i in range(2):
+        flipper_items.append(canvas.create_line(flipper_axis_x, flipper_axis_y, flipper_axis_x, flipper_axis_y,
+                                                fill=colors[i], width=flipper_width,
+                                                capstyle="round", tag="flipper"))
+        if i == 0:
+            canvas.create_oval(flipper_axis_x - 18, flipper_axis_y - 18,
+                               flipper_axis_x + 18, flipper_axis_y + 18,
+                               fill="#444444", outline="white", width=2, tag="flipper")
 
-        for i in range(2):
-            angle_rad = math.radians(flipper_angles[i])
+    def draw_flippers():
+        # Oculto no se dibuja; al volver a mostrarse <Map> lo marca sucio otra vez
+        if not canvas.winfo_viewable():
+            return
+        for i, angle in enumerate(flipper_state.snapshot()):
+            angle_rad = math.radians(angle)
             end_x = flipper_axis_x + flipper_length * math.cos(angle_rad)
             end_y = flipper_axis_y - flipper_length * math.sin(angle_rad)
+            canvas.coords(flipper_items[i], flipper_axis_x, flipper_axis_y, end_x, end_y)
 
-            flipper_color = colors[i]
+    # Solo se redibuja cuando flipper_state cambia (o el canvas vuelve a verse)
+    redraw_scheduler.register("flippers", draw_flippers, priority=2)
+    canvas.bind("<Map>", lambda event: redraw_scheduler.mark_dirty("flippers"), add="+")
 
-            canvas.create_line(flipper_axis_x, flipper_axis_y, end_x, end_y,
-                               fill=flipper_color, width=flipper_width,
-                               capstyle="round", tag="flipper")
 
-            if i == 0:
-                canvas.create_oval(flipper_axis_x - 18, flipper_axis_y - 18,
-                                   flipper_axis_x + 18, flipper_axis_y + 18,
-                                   fill="#444444", outline="white", width=2, tag="flipper")
+def watch_channel(channel, widget_name):
+    """Marca sucio un widget solo cuando el valor entero mostrado de su canal cambia."""
+    shown = [None]
 
-    def update_flippers():
-        nonlocal flipper_angles, direction
+    def on_sample(channel, value, t):
+        if int(value) != shown[0]:
+            shown[0] = int(value)
+            redraw_scheduler.mark_dirty(widget_name)
 
-        flipper_angles[0] += direction * 1
-        flipper_angles[1] -= direction * 1
+    telemetry_bus.subscribe(channel, on_sample)
 
-        if flipper_angles[0] > 80 or flipper_angles[0] < -80:
-            direction *= -1
 
-        draw_flippers()
+def update_sparkline(canvas, items, channel):
+    now = time.monotonic()
+    buckets = sensor_history.sparkline(channel, SPARKLINE_WINDOW, SPARKLINE_WIDTH, now)
+    draw_sparkline(canvas, items, buckets, now, SPARKLINE_WINDOW, SPARKLINE_WIDTH, SPARKLINE_HEIGHT, colorTheme)
 
-        canvas.after(40, update_flippers)
 
-    update_flippers()
-
-def update_air_quality(air_quality_label):
+def update_air_quality(air_quality_label, sparkline_canvas, sparkline_items):
     ppm = read_mq7_sensor()
     air_quality_label.configure(text=f"CO: {ppm} PPM")
-    air_quality_label.after(1000, update_air_quality, air_quality_label)
+    update_sparkline(sparkline_canvas, sparkline_items, "co_ppm")
 
 
-def update_magnetometer(magnetometer_label):
+def update_magnetometer(magnetometer_label, sparkline_canvas, sparkline_items):
     mag_value = read_magnetometer()
     magnetometer_label.configure(text=f"Mag: {mag_value}")
-    magnetometer_label.after(1000, update_magnetometer, magnetometer_label)
-
-
-def setup_cameras(indices, camera_frames):
-    caps = []
-    for i, idx in enumerate(indices):
-        cap = cv2.VideoCapture(idx)
-        if cap.isOpened():
-            caps.append(cap)
-            update_video(i, cap, camera_frames[i])
-        else:
-            print(f"Error al abrir la cámara con índice {idx}")
-    return caps
+    update_sparkline(sparkline_canvas, sparkline_items, "magnetometer")
+
+
+def setup_cameras(indices, camera_view):
+    """Ajusta en segundo plano las cámaras abiertas; las que siguen configuradas no se reabren."""
+    if camera_mosaic is None:
+        camera_view.configure(text="Abriendo cámaras...")
+
+    def open_cameras():
+        global camera_manager
+        from cameraManager import CameraManager
+        if camera_manager is None:
+            # MJPG en el modo más chico que cubre la vista: caben más cámaras en el mismo USB
+            camera_manager = CameraManager(*CAMERA_CAPTURE_SIZE, on_fps=publish_camera_fps, recorder=recorder)
+        return camera_manager.configure(indices)
+
+    def on_cameras_ready(count):
+        global camera_mosaic
+        from cameraMosaic import MosaicRenderer, focus_layout
+        if camera_mosaic is None:
+            from deviceWatcher import watch_devices
+            camera_view.configure(text="")
+            camera_mosaic = MosaicRenderer(layout=focus_layout)
+            # Desconexiones y reconexiones de /dev/video* adelantan el reintento de la cámara afectada
+            io_core.submit(watch_devices("video", camera_manager.device_event))
+            # Las cámaras son esenciales: conservan su ritmo aunque la GUI esté cargada
+            redraw_scheduler.add_periodic("video", lambda: update_video(camera_view), CAMERA_FRAME_INTERVAL,
+                                          essential=True)
+        return f"{count}/{len(indices)} abiertas"
+
+    start_in_background("cámaras", open_cameras, on_cameras_ready)
+
+
+@timed("video")
+def update_video(camera_view):
+    """Redibuja en el mosaico solo las cámaras con cuadro nuevo y lo entrega a Tk como una sola imagen."""
+    global camera_layout_drawn
+    cameras = camera_manager.view_order()
+    layout_changed = camera_manager.layout_version != camera_layout_drawn
+    if camera_mosaic.configure(camera_view.winfo_width(), camera_view.winfo_height(), len(cameras),
+                               force=layout_changed):
+        camera_layout_drawn = camera_manager.layout_version
+        camera_drawn.clear()
+        for camera, slot in zip(cameras, camera_mosaic.slots):
+            camera.view_size = slot[2:]  # El hilo de captura decodifica a este tamaño
+
+    changed = False
+    for i, camera in enumerate(cameras):
+        frame, sequence, state = camera.latest()
+        if camera_drawn.get(i) == (camera.index, sequence, state):
+            continue  # Miniatura sin cuadro nuevo: queda lo ya dibujado
+        camera_drawn[i] = (camera.index, sequence, state)
+        changed = True
+        if frame is None or state != "activa":
+            camera_mosaic.clear(i, f"Cámara {camera.index}: {'esperando' if frame is None else state}")
+            continue
+        camera_mosaic.draw(i, frame)
+        camera_mosaic.draw_text(i, f"Cámara {camera.index}  {camera.fps:.0f} FPS")
+    if changed:
+        camera_mosaic.present(camera_view)
+
+
+def focus_camera_at(x, y):
+    """Un clic en una miniatura la pasa a la vista principal sin reabrir ninguna cámara."""
+    if camera_mosaic is None or camera_manager is None:
+        return
+    slot = camera_mosaic.slot_at(x, y)
+    cameras = camera_manager.view_order()
+    if slot is not None and 0 < slot < len(cameras):
+        camera_manager.set_focus(cameras[slot].index)
 
 
-def update_video(index, cap, camera_label):
-    ret, frame = cap.read()
-    if ret:
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_image = Image.fromarray(frame_rgb)
-        frame_photo = ImageTk.PhotoImage(frame_image)
-        camera_label.configure(image=frame_photo)
-        camera_label.image = frame_photo
-    camera_label.after(30, update_video, index, cap, camera_label)
+def publish_camera_fps(number, fps, t):
+    telemetry_bus.publish(f"camera{number}_fps", fps, t)
 
 
 def create_lidar_gui():
     global lidar_instance
+    replay = current_replay()
+    if replay is not None:
+        lidar_instance = replay.lidar()
+        return lidar_instance
+    from rplidar import RPLidar, RPLidarException
     try:
         if not path.exists(LINUX_DEVICE_PATH):
             print(f"ERROR: Dispositivo no encontrado en {LINUX_DEVICE_PATH}")
@@ -324,56 +580,115 @@ def create_lidar_gui():
         return None
 
 
-def update_frame_lidar(num):
-    global lidar_line, lidar_ax, lidar_instance, lidar_fig
-
-    if lidar_instance == None or lidar_line == None or lidar_ax == None:
-        return []
+async def stream_lidar(lidar):
+    """Tarea del núcleo de E/S: lee escaneos del LIDAR y los entrega a la GUI.
 
+    rplidar solo ofrece lecturas bloqueantes, así que cada escaneo se pide en
+    el hilo auxiliar del núcleo. Al cancelarse apaga el dispositivo en ese
+    mismo hilo, después de la última lectura.
+    """
     try:
-        scan = next(lidar_instance.iter_scans(
-            max_buf_meas=LIDAR_SCAN_BUFFER,
-            min_len=3
-        ))
-
-        if len(scan) == 0:
-            return lidar_line,
-
-        angles = np.empty(len(scan), dtype=np.float32)
-        distances = np.empty(len(scan), dtype=np.float32)
-        intensities = np.empty(len(scan), dtype=np.float32)
-
-        for i, meas in enumerate(scan):
-            angles[i] = np.radians(meas[1])
-            distances[i] = meas[2]
-            intensities[i] = meas[0]
-
-        valid = (distances > 20) & (distances < LIDAR_D_MAX) & (intensities > 0)
-        angles = angles[valid]
-        distances = distances[valid]
-        intensities = intensities[valid]
-
-        offsets = np.column_stack((angles, distances))
-        lidar_line.set_offsets(offsets)
-        lidar_line.set_array(intensities)
-
-        lidar_ax.set_title(f'Escaneo LIDAR - {len(distances)} puntos', color='cyan', pad=20, fontsize=12)
-
-        return lidar_line,
-
-    except (RPLidarException, StopIteration, RuntimeError) as e:
-        return lidar_line,
-    except Exception as e:
-        print(f"Error crítico en update_frame_lidar: {str(e)}")
-        return lidar_line,
-
-
-def stop_lidar_animation():
-    global lidar_ani, lidar_instance
-    if lidar_ani:
-        lidar_ani.event_source.stop()
-        lidar_ani = None
-    clean_shutdown_lidar()
+        from rplidar import RPLidarException
+    except ImportError:  # Reproducción de una corrida sin rplidar instalado
+        RPLidarException = RuntimeError
+    try:
+        scans = lidar.iter_scans(max_buf_meas=LIDAR_SCAN_BUFFER, min_len=3)
+        while True:
+            try:
+                scan = await io_core.run_blocking(next, scans, None)
+            except (RPLidarException, RuntimeError) as e:
+                print(f"Error de lectura LIDAR, reiniciando el escaneo: {e}")
+                scans = lidar.iter_scans(max_buf_meas=LIDAR_SCAN_BUFFER, min_len=3)
+                continue
+            if scan is None:
+                return
+            if len(scan) == 0:
+                continue
+            recorder.add_scan(scan)
+            with measure("io.lidar"):
+                points = lidar_scan_arrays(scan)
+            # Solo el último escaneo pendiente llega a la GUI
+            io_core.post(update_frame_lidar, *points, key="lidar")
+    finally:
+        await io_core.run_blocking(clean_shutdown_lidar)
+
+
+def lidar_scan_arrays(scan):
+    """(ángulos rad, distancias mm, intensidades) válidos de un escaneo; también alimenta al SLAM."""
+    data = np.asarray(scan, dtype=np.float32)
+    intensities, distances = data[:, 0], data[:, 2]
+    valid = (distances > 20) & (distances < LIDAR_D_MAX) & (intensities > 0)
+    angles = np.radians(data[valid, 1])
+    distances = distances[valid]
+    intensities = intensities[valid]
+
+    if slam_thread is not None:
+        slam_thread.submit(angles, distances)
+    telemetry_bus.publish("lidar_points", len(distances))
+    return angles, distances, intensities
+
+
+@timed("lidar")
+def update_frame_lidar(angles, distances, intensities):
+    if lidar_line is None or lidar_ax is None:
+        return
+    lidar_line.set_offsets(np.column_stack((angles, distances)))
+    lidar_line.set_array(intensities)
+    lidar_ax.set_title(f'Escaneo LIDAR - {len(distances)} puntos', color='cyan', pad=20, fontsize=12)
+    redraw_scheduler.mark_dirty("lidar")
+
+
+def toggle_slam():
+    global slam_thread
+    if slam_thread is None:
+        # Cada escaneo procesado marca sucio el mapa; la vista se repinta en el siguiente cuadro
+        slam_thread = SlamThread(on_update=lambda: redraw_scheduler.mark_dirty("slam_map"))
+        slam_thread.start()
+        open_slam_map_window()
+        print("SLAM en proceso iniciado.")
+    else:
+        stop_slam()
+
+
+def open_slam_map_window():
+    global slam_map_window
+    slam_map_window = ctk.CTkToplevel()
+    slam_map_window.title("Mapa SLAM")
+    slam_map_window.geometry("700x700")
+    slam_map_window.configure(fg_color="black")
+
+    map_view = MapView(slam_map_window, MapPyramid(slam_thread.engine.grid), lock=slam_thread.lock,
+                       wall_color=colorTheme, fg_color="black")
+    map_view.pack(fill="both", expand=True)
+
+    engine = slam_thread.engine
+    redraw_scheduler.register("slam_map", lambda: map_view.refresh(pose=engine.pose), priority=6, max_rate=10)
+    slam_map_window.protocol("WM_DELETE_WINDOW", stop_slam)
+
+
+def stop_slam():
+    global slam_thread, slam_map_window
+    if slam_thread is not None:
+        slam_thread.stop()
+        slam_thread = None
+    redraw_scheduler.unregister("slam_map")
+    if slam_map_window is not None:
+        slam_map_window.destroy()
+        slam_map_window = None
+    print("SLAM detenido.")
+
+
+def stop_lidar_animation(event=None):
+    global lidar_blitter
+    redraw_scheduler.unregister("lidar")
+    if lidar_blitter:
+        lidar_blitter.disconnect()
+        lidar_blitter = None
+    if lidar_task is not None:
+        # La tarea apaga el LIDAR al cancelarse, después de su última lectura
+        lidar_task.cancel()
+    else:
+        clean_shutdown_lidar()
 
 
 def clean_shutdown_lidar():
@@ -390,54 +705,31 @@ def clean_shutdown_lidar():
 
 
 # --- Funciones para el Diagrama Cinemático del Brazo Robótico ---
-def update_robot_arm(frame_num, L1, L2, L3, ax, line1, line2, line3, joint_points, poses, transition_frames):
-    global robot_arm_line1, robot_arm_line2, robot_arm_line3, robot_arm_joint_points
-
-    num_poses = len(poses)
-    total_animation_frames = num_poses * transition_frames
-
-    # Determine current and next pose based on frame_num
-    current_pose_idx = (frame_num // transition_frames) % num_poses
-    next_pose_idx = (current_pose_idx + 1) % num_poses
-    frame_in_transition = frame_num % transition_frames
-
-    start_angles = poses[current_pose_idx]
-    end_angles = poses[next_pose_idx]
+@timed("cinemática")
+def update_robot_arm(frame_num, lengths, lines, joint_points):
+    # Pose interpolada de los encoders al instante de este cuadro
+    angles = arm_encoders.sample()
+    if angles is None:
+        angles = np.zeros(len(lengths))
 
-    # Linear interpolation of angles
-    t = frame_in_transition / transition_frames
-    theta1 = start_angles[0] + (end_angles[0] - start_angles[0]) * t
-    theta2 = start_angles[1] + (end_angles[1] - start_angles[1]) * t
-    theta3 = start_angles[2] + (end_angles[2] - start_angles[2]) * t
-
-    # Forward Kinematics (same as before)
-    x0, y0 = 0, 0  # Base (fixed at origin for simplicity)
-
-    # End of Link 1
-    x1 = L1 * np.cos(theta1)
-    y1 = L1 * np.sin(theta1)
-
-    # End of Link 2 (relative to end of Link 1)
-    x2 = x1 + L2 * np.cos(theta1 + theta2)
-    y2 = y1 + L2 * np.sin(theta1 + theta2)
-
-    # End of Link 3 (relative to end of Link 2)
-    x3 = x2 + L3 * np.cos(theta1 + theta2 + theta3)
-    y3 = y2 + L3 * np.sin(theta1 + theta2 + theta3)
+    # Cinemática directa vectorizada: todos los puntos de la cadena a la vez
+    points = forward_kinematics(lengths, angles)
 
     # Update the lines
-    line1.set_data([x0, x1], [y0, y1])
-    line2.set_data([x1, x2], [y1, y2])
-    line3.set_data([x2, x3], [y2, y3])
+    for i, line in enumerate(lines):
+        line.set_data(points[i:i + 2, 0], points[i:i + 2, 1])
 
     # Update joint markers
-    joint_points.set_offsets([[x0, y0], [x1, y1], [x2, y2], [x3, y3]])
+    joint_points.set_offsets(points)
 
-    return line1, line2, line3, joint_points  # Return all artists for blitting
+    return (*lines, joint_points)  # Return all artists for blitting
 
 
 def open_kinematic_diagram_window():
-    global robot_arm_fig, robot_arm_ax, robot_arm_line1, robot_arm_line2, robot_arm_line3, robot_arm_ani, robot_arm_joint_points
+    global robot_arm_fig, robot_arm_ax, robot_arm_lines, robot_arm_blitter, robot_arm_joint_points
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
+    from matPlotInCtk import FigureBlitter
 
     # Create a new Toplevel window
     kinematic_window = ctk.CTkToplevel()
@@ -446,23 +738,21 @@ def open_kinematic_diagram_window():
     kinematic_window.configure(fg_color="black")  # Set background color
 
     # Set up the Matplotlib figure and axes for the kinematic diagram
-    robot_arm_fig = plt.Figure(figsize=(5, 5), dpi=100, facecolor='black')
+    robot_arm_fig = Figure(figsize=(5, 5), dpi=100, facecolor='black')
     robot_arm_ax = robot_arm_fig.add_subplot(111)
     robot_arm_ax.set_facecolor('black')
 
-    # Link lengths
-    L1, L2, L3 = 1.0, 0.8, 0.6  # Puedes ajustar estas longitudes
-
     # Initialize the lines for the robot arm segments
-    robot_arm_line1, = robot_arm_ax.plot([], [], '-', lw=4, color='cyan', label='Link 1')
-    robot_arm_line2, = robot_arm_ax.plot([], [], '-', lw=4, color='#00ffff', label='Link 2')
-    robot_arm_line3, = robot_arm_ax.plot([], [], '-', lw=4, color='white', label='Link 3')
+    link_colors = ['cyan', '#00ffff', 'white']
+    robot_arm_lines = [robot_arm_ax.plot([], [], '-', lw=4, color=link_colors[i % len(link_colors)],
+                                         label=f'Link {i + 1}')[0]
+                       for i in range(len(ROBOT_ARM_LINKS))]
 
     # Plot origin and joint points as a scatter plot
     robot_arm_joint_points = robot_arm_ax.scatter([], [], color='red', s=100, zorder=5)  # Larger points for joints
 
     # Set axis limits
-    ax_limit = L1 + L2 + L3 + 0.5  # A bit of padding
+    ax_limit = sum(ROBOT_ARM_LINKS) + 0.5  # A bit of padding
     robot_arm_ax.set_xlim([-ax_limit, ax_limit])
     robot_arm_ax.set_ylim([-ax_limit, ax_limit])
     robot_arm_ax.set_aspect('equal', adjustable='box')  # Keep aspect ratio square
@@ -470,7 +760,7 @@ def open_kinematic_diagram_window():
     # Set labels and title
     robot_arm_ax.set_xlabel("X-axis", color='white')
     robot_arm_ax.set_ylabel("Y-axis", color='white')
-    robot_arm_ax.set_title("Diagrama Cinemático 3 DoF", color='white', fontsize=16)
+    robot_arm_ax.set_title(f"Diagrama Cinemático {len(ROBOT_ARM_LINKS)} DoF", color='white', fontsize=16)
     robot_arm_ax.tick_params(axis='x', colors='white')
     robot_arm_ax.tick_params(axis='y', colors='white')
     robot_arm_ax.grid(True, color='gray', linestyle='--', alpha=0.5)
@@ -480,42 +770,95 @@ def open_kinematic_diagram_window():
     canvas_tkagg.draw()
     canvas_tkagg.get_tk_widget().pack(side=ctk.TOP, fill=ctk.BOTH, expand=True)
 
-    # Animation
-    total_frames_for_animation = len(ROBOT_ARM_POSES) * POSE_TRANSITION_FRAMES
-    robot_arm_ani = animation.FuncAnimation(
-        robot_arm_fig,
-        update_robot_arm,
-        frames=total_frames_for_animation,  # Total frames for one full cycle
-        fargs=(L1, L2, L3, robot_arm_ax, robot_arm_line1, robot_arm_line2, robot_arm_line3, robot_arm_joint_points,
-               ROBOT_ARM_POSES, POSE_TRANSITION_FRAMES),
-        interval=50,  # Milliseconds between frames
-        blit=True,  # Optimized drawing
-        repeat=True  # Loop animation
-    )
+    # Animation: la pose sale de los encoders, no de una secuencia fija de cuadros;
+    # el planificador de cuadros marca el ritmo y solo se blitean el brazo y sus articulaciones
+    robot_arm_blitter = FigureBlitter(canvas_tkagg, [*robot_arm_lines, robot_arm_joint_points])
+    lengths = np.array(ROBOT_ARM_LINKS)
+
+    def draw_robot_arm():
+        update_robot_arm(0, lengths, robot_arm_lines, robot_arm_joint_points)
+        robot_arm_blitter.blit()
+
+    redraw_scheduler.add_periodic("cinemática", draw_robot_arm, KINEMATIC_FRAME_INTERVAL, priority=5)
 
     # Function to stop animation when window is closed
     def on_kinematic_window_close():
-        global robot_arm_ani
-        if robot_arm_ani:
-            robot_arm_ani.event_source.stop()
-            robot_arm_ani = None  # Clear reference
-        plt.close(robot_arm_fig)  # Close the matplotlib figure to free resources
+        stop_kinematic_animation()
         kinematic_window.destroy()
 
     kinematic_window.protocol("WM_DELETE_WINDOW", on_kinematic_window_close)
     # kinematic_window.mainloop() # Do not call mainloop here, let the main root handle it
 
 
+def stop_kinematic_animation():
+    global robot_arm_blitter
+    redraw_scheduler.remove_periodic("cinemática")
+    if robot_arm_blitter:
+        robot_arm_blitter.disconnect()
+        robot_arm_blitter = None
+
+
+def open_telemetry_dashboard():
+    from matPlotInCtk import LivePlotWidget
+    dashboard_window = ctk.CTkToplevel()
+    dashboard_window.title("Telemetría")
+    dashboard_window.geometry("700x700")
+    dashboard_window.configure(fg_color="black")
+
+    dashboard = LivePlotWidget(dashboard_window, telemetry_bus, TELEMETRY_CHANNELS, fg_color="black")
+    dashboard.pack(fill="both", expand=True)
+    dashboard.start()
+
+    def on_dashboard_close():
+        dashboard.destroy()
+        dashboard_window.destroy()
+
+    dashboard_window.protocol("WM_DELETE_WINDOW", on_dashboard_close)
+
+
+def toggle_instrumentation_overlay(overlay):
+    """Muestra u oculta el panel de latencias por subsistema sobre la ventana principal."""
+    if overlay.refresh_id is not None:
+        overlay.after_cancel(overlay.refresh_id)
+        overlay.refresh_id = None
+        overlay.place_forget()
+    else:
+        overlay.place(relx=1.0, rely=0.0, x=-10, y=10, anchor="ne")
+        overlay.lift()
+        refresh_instrumentation_overlay(overlay)
+
+
+def refresh_instrumentation_overlay(overlay):
+    overlay.configure(text=instruments.format_stats())
+    overlay.refresh_id = overlay.after(INSTRUMENTATION_REFRESH, refresh_instrumentation_overlay, overlay)
+
+
+def dump_instrumentation():
+    file_path = time.strftime("instrumentacion_%Y%m%d_%H%M%S.json")
+    try:
+        instruments.dump(file_path)
+        print(f"Instrumentación guardada en {file_path}")
+    except OSError as e:
+        print(f"Error al guardar la instrumentación: {e}")
+
+
 def on_closing(root):
     print("Cerrando aplicación...")
+    redraw_scheduler.stop()
+    replay = current_replay()
+    if replay is not None:
+        replay.stop()  # Libera las lecturas que esperan al reloj de la reproducción
+    process_supervisor.shutdown()
+    detector_pool.shutdown()
+    stop_slam()
     stop_lidar_animation()
-    global robot_arm_ani
-    if robot_arm_ani:
-        robot_arm_ani.event_source.stop()
-        robot_arm_ani = None
-        # plt.close(robot_arm_fig) # Closing the figure here might cause issues if window is already destroyed
+    stop_kinematic_animation()
+    io_core.stop()  # Cancela la lectura serie y espera el apagado del LIDAR
+    if camera_manager is not None:
+        camera_manager.shutdown()
+    recorder.stop()  # Después de las cámaras: ya no llegan cuadros y el codificador cierra los segmentos
 
-    if ser.is_open:
+    if ser is not None and ser.is_open:
         try:
             ser.close()
             print("Conexión serial ESP32 cerrada.")
@@ -534,6 +877,13 @@ def create_gui():
 
     root.protocol("WM_DELETE_WINDOW", lambda: on_closing(root))
 
+    # Panel de rendimiento: F3 lo muestra u oculta, F4 guarda las muestras en un archivo
+    instrumentation_overlay = ctk.CTkLabel(root, text="", font=("Courier", 13), text_color=colorTheme,
+                                           fg_color="#1e1e1e", corner_radius=8, justify="left")
+    instrumentation_overlay.refresh_id = None
+    root.bind("<F3>", lambda event: toggle_instrumentation_overlay(instrumentation_overlay))
+    root.bind("<F4>", lambda event: dump_instrumentation())
+
     icon_path = "/home/elian/PycharmProjects/PythonProject1/.venv/elbueno.ico"
     try:
         icon_image = Image.open(icon_path)
@@ -555,8 +905,11 @@ def create_gui():
 
     air_quality_label = ctk.CTkLabel(air_quality_header_frame, text="CO: -- PPM", font=("Arial", 18, "bold"),
                                      text_color="white", width=150)
-    air_quality_label.pack(padx=10, pady=5)
-    update_air_quality(air_quality_label)
+    air_quality_label.pack(padx=10, pady=(5, 0))
+    air_quality_sparkline = ctk.CTkCanvas(air_quality_header_frame, width=SPARKLINE_WIDTH, height=SPARKLINE_HEIGHT,
+                                          bg="#1e1e1e", highlightthickness=0)
+    air_quality_sparkline.pack(padx=10, pady=(0, 5))
+    air_quality_items = create_sparkline(air_quality_sparkline, colorTheme)
 
     # Widget para el Magnetómetro
     magnetometer_header_frame = ctk.CTkFrame(header_frame, fg_color="#1e1e1e", corner_radius=15, border_width=2,
@@ -565,8 +918,26 @@ def create_gui():
 
     magnetometer_label = ctk.CTkLabel(magnetometer_header_frame, text="Mag: --", font=("Arial", 18, "bold"),
                                       text_color="white", width=150)
-    magnetometer_label.pack(padx=10, pady=5)
-    update_magnetometer(magnetometer_label)
+    magnetometer_label.pack(padx=10, pady=(5, 0))
+    magnetometer_sparkline = ctk.CTkCanvas(magnetometer_header_frame, width=SPARKLINE_WIDTH, height=SPARKLINE_HEIGHT,
+                                           bg="#1e1e1e", highlightthickness=0)
+    magnetometer_sparkline.pack(padx=10, pady=(0, 5))
+    magnetometer_items = create_sparkline(magnetometer_sparkline, colorTheme)
+
+    redraw_scheduler.register("air_quality", lambda: update_air_quality(
+        air_quality_label, air_quality_sparkline, air_quality_items), priority=3)
+    redraw_scheduler.register("magnetometer", lambda: update_magnetometer(
+        magnetometer_label, magnetometer_sparkline, magnetometer_items), priority=3)
+    watch_channel("co_ppm", "air_quality")
+    watch_channel("magnetometer", "magnetometer")
+
+    def scroll_sparklines():
+        # Con la lectura estable (o sin lecturas) no llegan cambios: redibujar cada píxel de tiempo
+        # corre la ventana hasta ahora, así los datos avanzan y los viejos salen por la izquierda
+        redraw_scheduler.mark_dirty("air_quality")
+        redraw_scheduler.mark_dirty("magnetometer")
+
+    redraw_scheduler.add_periodic("sparklines", scroll_sparklines, SPARKLINE_SCROLL_INTERVAL, priority=3)
 
     logo_image = Image.open("/home/elian/PycharmProjects/PythonProject1/.venv/nixlogo.png")
     logo_image = logo_image.resize((120, 120), Image.Resampling.LANCZOS)
@@ -578,12 +949,14 @@ def create_gui():
     button_frame = ctk.CTkFrame(root, height=50, fg_color="black")
     button_frame.pack(fill="x")
 
-    buttons = [
-        ('Detectar Movimiento', lambda: execute_script("movementDetection.py")),
-        ("Cámara Térmica", lambda: execute_script("thermalCamera.py")),
-        ("YOLOv10", lambda: execute_script("runyolov10.py")),
-        ("SLAM", lambda: execute_script("slam.py")),
+    # Los botones de herramientas inician o detienen su única instancia
+    buttons = [(name, lambda name=name: detector_pool.toggle(name)) for name, _, _, _ in WORKER_DETECTORS]
+    buttons += [(name, lambda name=name: process_supervisor.toggle(name)) for name, _, _ in HELPER_TOOLS]
+    buttons += [
+        ("SLAM", toggle_slam),
         ("Diagrama Cinemático", open_kinematic_diagram_window),
+        ("Telemetría", open_telemetry_dashboard),
+        ("Grabar", toggle_recording),
     ]
 
     for text, command in buttons:
@@ -592,13 +965,21 @@ def create_gui():
                                border_width=3, border_color=colorTheme, corner_radius=17)
         button.pack(side="left", padx=20, pady=10)
 
+    tools_status_label = ctk.CTkLabel(button_frame, text="", font=("Arial", 14), text_color=colorTheme)
+    tools_status_label.pack(side="left", padx=20)
+    redraw_scheduler.register("tools", lambda: update_tools_status(tools_status_label), priority=5)
+
+    startup_label = ctk.CTkLabel(button_frame, text="", font=("Arial", 14), text_color="white")
+    startup_label.pack(side="right", padx=20)
+    redraw_scheduler.register("startup", lambda: update_startup_status(startup_label), priority=5)
+
     camera_indices = []
 
     def save_indices():
         indices = camera_input.get()
         camera_indices.clear()
         camera_indices.extend(map(int, indices.split(",")))
-        setup_cameras(camera_indices, camera_labels)
+        setup_cameras(camera_indices, camera_view)
 
     camera_input = ctk.CTkEntry(header_frame, width=300, placeholder_text="Índices de cámaras (ej: 1,2)",
                                 font=("Arial", 14), fg_color="white", text_color="black")
@@ -615,13 +996,12 @@ def create_gui():
     main_frame.grid_columnconfigure(0, weight=3)  # Cámara principal (más ancha)
     main_frame.grid_columnconfigure(1, weight=1)  # Columna de widgets (más estrecha)
 
-    camera_labels = []
-    for i in range(1):
-        frame = ctk.CTkFrame(main_frame, fg_color="#1e1e1e", corner_radius=17)
-        frame.grid(row=i // 2, column=i % 2, padx=10, pady=10, sticky="nsew")
-        label = ctk.CTkLabel(frame, text=f"Cámara {i + 1}", font=("Arial", 18, "bold"), text_color="white")
-        label.pack(expand=True, fill="both")
-        camera_labels.append(label)
+    # Un solo label muestra el mosaico de todas las cámaras configuradas
+    camera_frame = ctk.CTkFrame(main_frame, fg_color="#1e1e1e", corner_radius=17)
+    camera_frame.grid(row=0, column=0, rowspan=2, padx=10, pady=10, sticky="nsew")
+    camera_view = ctk.CTkLabel(camera_frame, text="Cámaras", font=("Arial", 18, "bold"), text_color="white")
+    camera_view.pack(expand=True, fill="both", padx=8, pady=8)
+    camera_view.bind("<Button-1>", lambda event: focus_camera_at(event.x, event.y))
 
     # --- WIDGETS COLUMN (RIGHT SIDE) ---
     widget_frame = ctk.CTkFrame(main_frame, fg_color="black", corner_radius=17)
@@ -640,7 +1020,7 @@ def create_gui():
 
     flipper_canvas = ctk.CTkCanvas(flipper_frame, width=280, height=200, bg="#1e1e1e", highlightthickness=0)
     flipper_canvas.pack()
-    create_flippers_animation(flipper_canvas)
+    create_flippers_widget(flipper_canvas)
 
     # --- LIDAR Visualization Widget ---
     lidar_frame = ctk.CTkFrame(widget_frame, fg_color="#1e1e1e", corner_radius=17, border_width=2,
@@ -651,11 +1031,51 @@ def create_gui():
                                text_color="white")
     lidar_label.pack(pady=5)
 
-    configure_lidar_plot(lidar_frame)
-    root.after(100, start_lidar_animation)
+    lidar_loading_label = ctk.CTkLabel(lidar_frame, text="Cargando LIDAR...", font=("Arial", 14),
+                                       text_color=colorTheme)
+    lidar_loading_label.pack(expand=True)
+
+    def on_lidar_ready(lidar):
+        lidar_loading_label.destroy()
+        configure_lidar_plot(lidar_frame)
+        start_lidar_animation()
+        return "conectado" if lidar is not None else "sin dispositivo"
+
+    def start_subsystems():
+        # La ventana ya está en pantalla: el resto arranca sin bloquearla
+        startup_timeline.mark("GUI interactiva")
+        if replay is not None:
+            # Antes del pool de detectores: sus procesos heredan el reloj por el entorno
+            replay.start()
+            camera_input.insert(0, ",".join(map(str, replay.log.cameras)))
+            if replay.log.cameras:
+                save_indices()
+        start_in_background("serie", open_serial, on_serial_ready)
+        start_in_background("LIDAR", start_lidar_subsystem, on_lidar_ready)
+        start_in_background("detectores", detector_pool.start)
+
+    replay = current_replay()
+    if replay is not None and replay.clock.stepping:
+        # Paso a paso: → al siguiente registro de cualquier flujo, Shift+→ un segundo de grabación
+        root.bind("<Right>", lambda event: replay.step())
+        root.bind("<Shift-Right>", lambda event: replay.step(1.0))
+
+    startup_timeline.mark("ventana construida")
+    redraw_scheduler.add_periodic("io", io_core.drain, redraw_scheduler.frame_interval, priority=0, essential=True)
+    redraw_scheduler.start(root)
+    root.after_idle(start_subsystems)
 
     root.mainloop()
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Unidad de control del robot de rescate")
+    parser.add_argument("--replay", metavar="SESION", help="reproducir una corrida grabada en vez de los dispositivos")
+    parser.add_argument("--speed", type=float, default=1.0, help="velocidad de la reproducción (>1: avance rápido)")
+    parser.add_argument("--step", action="store_true", help="reproducción paso a paso con las flechas")
+    args = parser.parse_args()
+    if args.replay:
+        from replayDevices import ReplayEngine
+        install_replay(ReplayEngine(args.replay, args.speed, args.step))
     create_gui()
\ No newline at end of file
@@ -0,0 +1,207 @@
+import contextlib
+
+import numpy as np
+import customtkinter as ctk
+from PIL import Image, ImageTk
+
+from slamEngine import MAP_TILE_SIZE
+
+# Valores de la pirámide (los mismos que usa map_server en el .pgm)
+MAP_OCCUPIED = 0
+MAP_FREE = 254
+MAP_UNKNOWN = 205
+
+MAP_VIEW_LEVELS: int = 4  # niveles de la pirámide (1x, 1/2, 1/4, 1/8)
+MAP_VIEW_MAX_MAGNIFICATION: int = 3  # zoom máximo: 2**3 píxeles por celda fina
+
+
+def build_palette(wall_color="#12fe35"):
+    """Tabla de 256 colores RGB para pintar la pirámide en la vista."""
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    palette[MAP_FREE] = (60, 60, 60)
+    palette[MAP_UNKNOWN] = (0, 0, 0)
+    palette[MAP_OCCUPIED] = tuple(int(wall_color[i:i + 2], 16) for i in (1, 3, 5))
+    return palette
+
+
+class MapPyramid:
+    """Pirámide multirresolución del mapa de ocupación con versiones por tile.
+
+    `sync` solo vuelve a renderizar los tiles que el SLAM marcó como sucios y
+    propaga el cambio a los niveles gruesos con un min-pool 2x2 (las paredes
+    dominan). Cada tile guarda la versión en que cambió por última vez, así la
+    vista sabe qué tiles de su nivel y zona visible debe repintar.
+    """
+
+    def __init__(self, grid, levels=MAP_VIEW_LEVELS, tile_size=MAP_TILE_SIZE):
+        self.grid = grid
+        self.levels = levels
+        self.tile_size = tile_size
+        self.images = [np.full((grid.size >> k, grid.size >> k), MAP_UNKNOWN, dtype=np.uint8)
+                       for k in range(levels)]
+        tiles = grid.dirty_tiles.shape[0]
+        self.tile_versions = [np.zeros((-(-tiles // (1 << k)),) * 2, dtype=np.int64) for k in range(levels)]
+        self.version = 0
+
+    def sync(self, lock=None):
+        """Trae los tiles sucios del mapa; devuelve True si algo cambió."""
+        t = self.tile_size
+        with lock if lock is not None else contextlib.nullcontext():
+            rows, cols = np.nonzero(self.grid.dirty_tiles)
+            if rows.size == 0:
+                return False
+            self.grid.dirty_tiles[rows, cols] = False
+            blocks = [self.grid.log_odds[r * t:(r + 1) * t, c * t:(c + 1) * t].copy() for r, c in zip(rows, cols)]
+
+        self.version += 1
+        base = self.images[0]
+        for r, c, block in zip(rows, cols, blocks):
+            tile = base[r * t:r * t + block.shape[0], c * t:c * t + block.shape[1]]
+            tile[:] = MAP_UNKNOWN
+            tile[block > 0] = MAP_OCCUPIED
+            tile[block < 0] = MAP_FREE
+        self.tile_versions[0][rows, cols] = self.version
+
+        # Propagar a los niveles gruesos solo las zonas afectadas
+        for k in range(1, self.levels):
+            rows, cols = np.unique(np.stack((rows >> 1, cols >> 1)), axis=1)
+            finer, coarser = self.images[k - 1], self.images[k]
+            for r, c in zip(rows, cols):
+                src = finer[r * 2 * t:(r + 1) * 2 * t, c * 2 * t:(c + 1) * 2 * t]
+                h, w = src.shape[0] // 2, src.shape[1] // 2
+                coarser[r * t:r * t + h, c * t:c * t + w] = src[:2 * h, :2 * w].reshape(h, 2, w, 2).min(axis=(1, 3))
+            self.tile_versions[k][rows, cols] = self.version
+        return True
+
+    def tile(self, level, row, col):
+        t = self.tile_size
+        return self.images[level][row * t:(row + 1) * t, col * t:(col + 1) * t]
+
+
+class MapView(ctk.CTkFrame):
+    """Vista del mapa SLAM por tiles con desplazamiento y zoom.
+
+    Solo se crean imágenes para los tiles visibles del nivel que corresponde
+    al zoom, y solo se regeneran los que cambiaron de versión desde el último
+    cuadro. Arrastrar mueve los items existentes; la rueda cambia de nivel.
+    """
+
+    def __init__(self, master, pyramid, lock=None, wall_color="#12fe35", **kwargs):
+        super().__init__(master, **kwargs)
+        self.pyramid = pyramid
+        self.lock = lock
+        self.palette = build_palette(wall_color)
+        self.canvas = ctk.CTkCanvas(self, bg="black", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+
+        # Vista centrada en el centro del mapa, en coordenadas de celdas finas
+        self.center = np.array([pyramid.grid.size / 2, pyramid.grid.size / 2])
+        self.zoom = 0  # >0 amplía el nivel fino, <0 usa niveles gruesos
+        self.tiles = {}  # (nivel, fila, col) -> [versión, PhotoImage, item]
+        self.robot_item = self.canvas.create_oval(0, 0, 0, 0, fill="red", outline="white", tags="robot")
+        self.drag_start = None
+
+        self.canvas.bind("<ButtonPress-1>", self.on_drag_start)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.set_zoom(self.zoom + 1))
+        self.canvas.bind("<Button-5>", lambda event: self.set_zoom(self.zoom - 1))
+        self.canvas.bind("<Configure>", lambda event: self.refresh(sync=False))
+
+    @property
+    def level(self):
+        return max(0, -self.zoom)
+
+    @property
+    def magnification(self):
+        return 1 << max(0, self.zoom)
+
+    def pixels_per_cell(self):
+        """Píxeles de pantalla por celda fina."""
+        return self.magnification / (1 << self.level)
+
+    def to_screen(self, x, y):
+        scale = self.pixels_per_cell()
+        return ((x - self.center[0]) * scale + self.canvas.winfo_width() / 2,
+                self.canvas.winfo_height() / 2 - (y - self.center[1]) * scale)
+
+    def visible_tiles(self):
+        scale = self.pixels_per_cell()
+        span = self.pyramid.tile_size * (1 << self.level)  # celdas finas por tile
+        half_w = self.canvas.winfo_width() / 2 / scale
+        half_h = self.canvas.winfo_height() / 2 / scale
+        n = self.pyramid.tile_versions[self.level].shape[0]
+        c0 = max(0, int((self.center[0] - half_w) // span))
+        c1 = min(n - 1, int((self.center[0] + half_w) // span))
+        r0 = max(0, int((self.center[1] - half_h) // span))
+        r1 = min(n - 1, int((self.center[1] + half_h) // span))
+        return [(r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+    def refresh(self, sync=True, pose=None):
+        """Repinta solo los tiles visibles nuevos o cambiados; llamar una vez por cuadro."""
+        if sync:
+            self.pyramid.sync(self.lock)
+
+        level = self.level
+        span = self.pyramid.tile_size * (1 << level)
+        versions = self.pyramid.tile_versions[level]
+        visible = set()
+        for r, c in self.visible_tiles():
+            version = versions[r, c]
+            if version == 0:
+                continue  # Tile nunca observado: queda el fondo negro
+            key = (level, r, c)
+            visible.add(key)
+            cached = self.tiles.get(key)
+            if cached is not None and cached[0] == version:
+                continue
+
+            rgb = self.palette[np.flipud(self.pyramid.tile(level, r, c))]
+            mag = self.magnification
+            if mag > 1:
+                rgb = rgb.repeat(mag, axis=0).repeat(mag, axis=1)
+            photo = ImageTk.PhotoImage(Image.fromarray(rgb))
+            x, y = self.to_screen(c * span, (r + 1) * span)
+            if cached is None:
+                item = self.canvas.create_image(x, y, image=photo, anchor="nw", tags="tile")
+                self.tiles[key] = [version, photo, item]
+            else:
+                self.canvas.itemconfigure(cached[2], image=photo)
+                cached[0], cached[1] = version, photo
+
+        # Liberar los tiles que salieron de la vista o son de otro nivel
+        for key in [key for key in self.tiles if key not in visible]:
+            self.canvas.delete(self.tiles.pop(key)[2])
+
+        if pose is not None:
+            grid = self.pyramid.grid
+            x, y = self.to_screen((pose[0] - grid.origin[0]) / grid.resolution,
+                                  (pose[1] - grid.origin[1]) / grid.resolution)
+            self.canvas.coords(self.robot_item, x - 4, y - 4, x + 4, y + 4)
+            self.canvas.tag_raise(self.robot_item)
+
+    def on_drag_start(self, event):
+        self.drag_start = (event.x, event.y)
+
+    def on_drag(self, event):
+        dx, dy = event.x - self.drag_start[0], event.y - self.drag_start[1]
+        self.drag_start = (event.x, event.y)
+        scale = self.pixels_per_cell()
+        self.center += (-dx / scale, dy / scale)
+        # Desplazar los items existentes cuesta lo mismo sin importar el tamaño del mapa
+        self.canvas.move("tile", dx, dy)
+        self.canvas.move(self.robot_item, dx, dy)
+        self.refresh(sync=False)
+
+    def on_wheel(self, event):
+        self.set_zoom(self.zoom + (1 if event.delta > 0 else -1))
+
+    def set_zoom(self, zoom):
+        zoom = max(-(self.pyramid.levels - 1), min(MAP_VIEW_MAX_MAGNIFICATION, zoom))
+        if zoom != self.zoom:
+            self.zoom = zoom
+            # Otro nivel u otra ampliación: los tiles en caché ya no sirven
+            for _, _, item in self.tiles.values():
+                self.canvas.delete(item)
+            self.tiles.clear()
+            self.refresh(sync=False)
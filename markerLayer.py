@@ -0,0 +1,308 @@
+import math
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import cv2
+import numpy as np
+import yaml
+
+MARKER_RADIUS = 5
+MARKER_FONT = cv2.FONT_HERSHEY_SIMPLEX
+MARKER_FONT_SCALE = 0.5
+MARKER_TEXT_OFFSET = 5  # píxeles a la derecha del círculo
+INDEX_CELL = 32  # píxeles por celda del índice espacial
+
+MARKER_MERGE_RADIUS = 0.3  # metros: detecciones de la misma clase más cercanas se fusionan
+MARKER_CAPACITY = 200  # máximo de markers guardados
+
+
+class MarkerStore:
+    """Almacén acotado y seguro entre hilos de los markers de hazmat.
+
+    El callback de ROS escribe con `update`; los lectores (render, exportación)
+    usan `snapshot`, que devuelve sin bloquear una vista inmutable que se
+    reemplaza completa en cada cambio (copia al escribir). Las detecciones de
+    la misma clase (texto) a menos de `merge_radius` se fusionan en un solo
+    marker, buscando vecinos en una tabla hash por celdas de ese tamaño. Al
+    pasar de `capacity` se descarta el de menor confianza (detecciones) y,
+    a igualdad, el visto hace más tiempo.
+    """
+
+    def __init__(self, merge_radius=MARKER_MERGE_RADIUS, capacity=MARKER_CAPACITY, on_change=None):
+        self.merge_radius = merge_radius
+        self.capacity = capacity
+        self.on_change = on_change  # on_change(id, datos o None) tras cada cambio
+        self.lock = threading.Lock()
+        self.markers = {}  # id -> {'x', 'y', 'color', 'text', 'count', 'last_seen'}
+        self.cells = {}  # (cx, cy) -> ids de markers en esa celda
+        self.aliases = {}  # id del mensaje -> id del marker en que se fusionó
+        self.current = MappingProxyType({})
+
+    def snapshot(self):
+        return self.current
+
+    def cell_of(self, x, y):
+        return math.floor(x / self.merge_radius), math.floor(y / self.merge_radius)
+
+    def update(self, msg_id, x=None, y=None, color=None, text=None, t=None):
+        """Registra una detección (posición/color) o el texto de un id ya visto."""
+        if t is None:
+            t = time.monotonic()
+        changes = {}
+        with self.lock:
+            marker_id = self.aliases.get(msg_id, msg_id)
+            marker = self.markers.get(marker_id)
+            if marker is None:
+                if x is None:
+                    return
+                marker = {'x': x, 'y': y, 'color': color or (1.0, 1.0, 1.0), 'text': text or "",
+                          'count': 0, 'last_seen': t}
+                self.markers[marker_id] = marker
+                self.aliases[msg_id] = marker_id
+                self.add_to_cell(marker_id)
+            if x is not None:
+                self.remove_from_cell(marker_id)
+                # Promedio ponderado por el número de detecciones
+                n = marker['count']
+                marker['x'] = (marker['x'] * n + x) / (n + 1)
+                marker['y'] = (marker['y'] * n + y) / (n + 1)
+                marker['count'] = n + 1
+                self.add_to_cell(marker_id)
+            if color is not None:
+                marker['color'] = color
+            if text:
+                marker['text'] = text
+            marker['last_seen'] = t
+            changes[marker_id] = marker_id
+
+            merged = self.merge_neighbours(marker_id)
+            if merged is not None:
+                drop, keep = merged
+                changes[drop] = None
+                changes[keep] = keep
+            changes.update(self.evict())
+            self.publish()
+            # Los oyentes reciben los datos de la vista publicada, nunca los dicts internos
+            changes = {i: (None if i_ is None else self.current[i]) for i, i_ in changes.items()}
+
+        if self.on_change is not None:
+            for marker_id, data in changes.items():
+                self.on_change(marker_id, data)
+
+    def update_text(self, msg_id, text, x, y, t=None):
+        """Texto (clase) de un id; la posición solo se usa si el id aún no existe."""
+        with self.lock:
+            known = self.aliases.get(msg_id, msg_id) in self.markers
+        if known:
+            self.update(msg_id, text=text, t=t)
+        else:
+            self.update(msg_id, x=x, y=y, text=text, t=t)
+
+    def merge_neighbours(self, marker_id):
+        """Fusiona el marker con el vecino más cercano de su misma clase; devuelve (quitado, conservado)."""
+        marker = self.markers[marker_id]
+        if not marker['text']:
+            return None  # Sin clase todavía no se puede decidir
+        cx, cy = self.cell_of(marker['x'], marker['y'])
+        best, best_dist = None, self.merge_radius
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other_id in self.cells.get((cx + dx, cy + dy), ()):
+                    other = self.markers[other_id]
+                    if other_id == marker_id or other['text'] != marker['text']:
+                        continue
+                    dist = math.hypot(other['x'] - marker['x'], other['y'] - marker['y'])
+                    if dist < best_dist:
+                        best, best_dist = other_id, dist
+        if best is None:
+            return None
+
+        # Se conserva el marker con más detecciones
+        keep, drop = (best, marker_id) if self.markers[best]['count'] >= marker['count'] else (marker_id, best)
+        kept, dropped = self.markers[keep], self.markers[drop]
+        total = kept['count'] + dropped['count']
+        self.remove_from_cell(keep)
+        kept['x'] = (kept['x'] * kept['count'] + dropped['x'] * dropped['count']) / total
+        kept['y'] = (kept['y'] * kept['count'] + dropped['y'] * dropped['count']) / total
+        kept['count'] = total
+        kept['last_seen'] = max(kept['last_seen'], dropped['last_seen'])
+        self.add_to_cell(keep)
+        self.delete(drop, alias_to=keep)
+        return drop, keep
+
+    def evict(self):
+        changes = {}
+        while len(self.markers) > self.capacity:
+            victim = min(self.markers, key=lambda i: (self.markers[i]['count'], self.markers[i]['last_seen']))
+            self.delete(victim)
+            changes[victim] = None
+        return changes
+
+    def delete(self, marker_id, alias_to=None):
+        self.remove_from_cell(marker_id)
+        del self.markers[marker_id]
+        for msg_id, target in list(self.aliases.items()):
+            if target == marker_id:
+                if alias_to is None:
+                    del self.aliases[msg_id]
+                else:
+                    self.aliases[msg_id] = alias_to
+
+    def add_to_cell(self, marker_id):
+        marker = self.markers[marker_id]
+        self.cells.setdefault(self.cell_of(marker['x'], marker['y']), set()).add(marker_id)
+
+    def remove_from_cell(self, marker_id):
+        marker = self.markers[marker_id]
+        cell = self.cell_of(marker['x'], marker['y'])
+        ids = self.cells.get(cell)
+        if ids is not None:
+            ids.discard(marker_id)
+            if not ids:
+                del self.cells[cell]
+
+    def publish(self):
+        # Copia al escribir: los lectores conservan la vista anterior intacta
+        self.current = MappingProxyType({marker_id: MappingProxyType(dict(marker))
+                                         for marker_id, marker in self.markers.items()})
+
+
+class MarkerLayer:
+    """Capa transparente con los markers de hazmat sobre el mapa.
+
+    Los markers se guardan en un índice espacial por celda de mapa y se
+    proyectan mundo -> píxel con una transformación afín calculada una sola
+    vez a partir de la resolución y el origen. `render` solo rasteriza lo que
+    cambió desde la última vez: borra las zonas afectadas y redibuja los
+    markers que caen en ellas.
+    """
+
+    def __init__(self, resolution, origin, width, height):
+        self.resolution = resolution
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.width = width
+        self.height = height
+        # px = (x - ox) / res ; py = height - (y - oy) / res
+        self.affine = np.array([[1 / resolution, 0.0, -self.origin[0] / resolution],
+                                [0.0, -1 / resolution, height + self.origin[1] / resolution]])
+        self.overlay = np.zeros((height, width, 4), dtype=np.uint8)
+        self.markers = {}  # id -> (px, py, color_bgr, text, bbox)
+        self.index = {}  # (celda x, celda y) -> ids con bbox en esa celda
+        self.pending = {}  # id -> (x, y, color, text) o None para borrar
+        self.lock = threading.Lock()
+        self.version = 0
+        self.composite_cache = None  # (clave del mapa base, versión, imagen)
+
+    @classmethod
+    def from_grid(cls, grid):
+        return cls(grid.resolution, grid.origin, grid.size, grid.size)
+
+    def matches(self, resolution, origin, width, height):
+        return (self.resolution, self.origin, self.width, self.height) == \
+            (resolution, (float(origin[0]), float(origin[1])), width, height)
+
+    def world_to_pixel(self, x, y):
+        px, py = self.affine @ (x, y, 1.0)
+        return int(px), int(py)
+
+    def set_marker(self, marker_id, x, y, color, text=""):
+        """Agrega o actualiza un marker (color RGB en [0, 1]); se puede llamar desde cualquier hilo."""
+        with self.lock:
+            self.pending[marker_id] = (x, y, color, text)
+
+    def remove_marker(self, marker_id):
+        with self.lock:
+            self.pending[marker_id] = None
+
+    def marker_bbox(self, px, py, text):
+        x0, y0 = px - MARKER_RADIUS, py - MARKER_RADIUS
+        x1, y1 = px + MARKER_RADIUS, py + MARKER_RADIUS
+        if text:
+            (w, h), baseline = cv2.getTextSize(text, MARKER_FONT, MARKER_FONT_SCALE, 1)
+            x1 = max(x1, px + MARKER_TEXT_OFFSET + w)
+            y0 = min(y0, py - h)
+            y1 = max(y1, py + baseline)
+        # Margen para el antialiasing y el grosor del trazo
+        return x0 - 2, y0 - 2, x1 + 2, y1 + 2
+
+    def index_cells(self, bbox):
+        x0, y0, x1, y1 = bbox
+        return [(cx, cy) for cx in range(x0 // INDEX_CELL, x1 // INDEX_CELL + 1)
+                for cy in range(y0 // INDEX_CELL, y1 // INDEX_CELL + 1)]
+
+    def render(self):
+        """Rasteriza los cambios pendientes en la capa; devuelve True si cambió algo."""
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+        if not pending:
+            return False
+
+        dirty = []
+        for marker_id, data in pending.items():
+            old = self.markers.pop(marker_id, None)
+            if old is not None:
+                dirty.append(old[4])
+                for cell in self.index_cells(old[4]):
+                    self.index[cell].discard(marker_id)
+            if data is None:
+                continue
+            x, y, color, text = data
+            px, py = self.world_to_pixel(x, y)
+            color_bgr = (int(color[2] * 255), int(color[1] * 255), int(color[0] * 255))
+            bbox = self.marker_bbox(px, py, text)
+            self.markers[marker_id] = (px, py, color_bgr, text, bbox)
+            for cell in self.index_cells(bbox):
+                self.index.setdefault(cell, set()).add(marker_id)
+            dirty.append(bbox)
+
+        # Borrar las zonas afectadas y redibujar todo marker que las toque
+        redraw = set()
+        for x0, y0, x1, y1 in dirty:
+            self.overlay[max(y0, 0):max(y1 + 1, 0), max(x0, 0):max(x1 + 1, 0)] = 0
+            for cell in self.index_cells((x0, y0, x1, y1)):
+                redraw |= self.index.get(cell, set())
+        for marker_id in redraw:
+            px, py, color_bgr, text, _ = self.markers[marker_id]
+            cv2.circle(self.overlay, (px, py), MARKER_RADIUS, color_bgr + (255,), -1)
+            if text:
+                cv2.putText(self.overlay, text, (px + MARKER_TEXT_OFFSET, py), MARKER_FONT,
+                            MARKER_FONT_SCALE, color_bgr + (255,), 1)
+
+        self.version += 1
+        return True
+
+    def composite(self, base_bgr, base_key=None):
+        """Mapa base con la capa de markers encima; se reutiliza si nada cambió."""
+        key = base_key if base_key is not None else id(base_bgr)
+        if self.composite_cache is not None and self.composite_cache[:2] == (key, self.version):
+            return self.composite_cache[2]
+        image = base_bgr.copy()
+        mask = self.overlay[:, :, 3] > 0
+        image[mask] = self.overlay[mask, :3]
+        self.composite_cache = (key, self.version, image)
+        return image
+
+    def export_jpg(self, path, base_bgr, base_key=None):
+        self.render()
+        cv2.imwrite(path, self.composite(base_bgr, base_key))
+
+
+class MapImageCache:
+    """Carga el .yaml y el .pgm de un mapa solo cuando cambian en disco."""
+
+    def __init__(self):
+        self.key = None
+        self.info = None
+        self.image = None
+
+    def load(self, yaml_path, image_path):
+        key = (yaml_path, os.path.getmtime(yaml_path), image_path, os.path.getmtime(image_path))
+        if key != self.key:
+            with open(yaml_path, 'r') as f:
+                self.info = yaml.safe_load(f)
+            self.image = cv2.imread(image_path)
+            self.key = key if self.image is not None else None
+        return self.info, self.image, self.key
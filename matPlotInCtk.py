@@ -6,6 +6,223 @@ import threading
 import time
 from tkinter import messagebox
 
+from instrumentation import timed
+
+
+class CircularBuffer:
+    """Buffer circular de tamaño fijo para varios canales.
+
+    Un solo hilo escribe con `append`; el hilo de Tk lee con `snapshot` sin
+    bloqueos: copia la ventana pedida y reintenta si el escritor alcanzó la
+    zona copiada mientras tanto.
+    """
+
+    def __init__(self, capacity, channels=1):
+        self.capacity = capacity
+        self.channels = channels
+        self.data = np.zeros((channels, capacity))
+        self.write_index = 0  # Total de muestras escritas (solo crece)
+
+    def append(self, values):
+        self.data[:, self.write_index % self.capacity] = values
+        # Publicar el índice después de escribir la muestra
+        self.write_index += 1
+
+    def snapshot(self, n, out):
+        """Copia las últimas n muestras en `out` (channels x n) y devuelve cuántas son válidas."""
+        while True:
+            end = self.write_index
+            # Una ranura de margen: la muestra en curso se escribe antes de publicar el índice
+            n_valid = min(n, end, self.capacity - 1)
+            start = (end - n_valid) % self.capacity
+            first = min(n_valid, self.capacity - start)
+            dst = out[:, n - n_valid:]
+            dst[:, :first] = self.data[:, start:start + first]
+            dst[:, first:] = self.data[:, :n_valid - first]
+            # Si el escritor (contando la muestra en curso) no pisó la ventana copiada, la copia es consistente
+            if self.write_index - end < self.capacity - n_valid:
+                if n_valid < n:
+                    out[:, :n - n_valid] = np.nan
+                return n_valid
+
+
+def decimate_minmax(t, v, t0, t1, columns):
+    """Reduce una serie a una columna por píxel conservando mínimo y máximo.
+
+    Devuelve (xs, ys) con dos vértices por columna ocupada, de modo que los
+    picos de una sola muestra siguen siendo visibles tras la decimación.
+    """
+    valid = (t >= t0) & ~np.isnan(v)
+    t = t[valid]
+    v = v[valid]
+    if t.size == 0:
+        return np.empty(0), np.empty(0)
+
+    col = ((t - t0) * (columns / (t1 - t0))).astype(np.int64)
+    np.clip(col, 0, columns - 1, out=col)
+    # t está ordenado, así que cada columna es un tramo contiguo
+    starts = np.flatnonzero(np.r_[True, col[1:] != col[:-1]])
+    mins = np.minimum.reduceat(v, starts)
+    maxs = np.maximum.reduceat(v, starts)
+
+    x = t0 - t1 + (col[starts] + 0.5) * ((t1 - t0) / columns)
+    return np.repeat(x, 2), np.column_stack((mins, maxs)).ravel()
+
+
+class FigureBlitter:
+    """Redibuja solo los artistas animados de una figura sobre su fondo cacheado.
+
+    Hace lo mismo que FuncAnimation(blit=True), pero sin temporizador propio:
+    `blit()` se llama desde el planificador de cuadros de la GUI.
+    """
+
+    def __init__(self, canvas, artists):
+        self.canvas = canvas
+        self.artists = list(artists)
+        for artist in self.artists:
+            artist.set_animated(True)
+        self.background = None
+        self.draw_id = canvas.mpl_connect("draw_event", self.on_draw)
+        canvas.draw()
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        for artist in self.artists:
+            self.canvas.figure.draw_artist(artist)
+
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw()  # on_draw captura el fondo
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self.draw_id)
+
+
+class LivePlotWidget(ctk.CTkFrame):
+    """Panel de gráficas en vivo para canales numéricos del bus de telemetría.
+
+    Cada canal se suscribe al bus y escribe (tiempo, valor) en su propio
+    CircularBuffer. El hilo de Tk dibuja a ritmo fijo: decimación min/max al
+    ancho en píxeles del eje y blitting sobre el fondo cacheado. Si la
+    decimación excede `frame_budget_ms`, los canales restantes conservan su
+    último trazo y se actualizan en el siguiente cuadro.
+    """
+
+    def __init__(self, master, bus, channels, window_s=60.0, capacity=6000,
+                 render_interval=50, frame_budget_ms=8.0, **kwargs):
+        super().__init__(master, **kwargs)
+        self.bus = bus
+        self.channels = list(channels)
+        self.window_s = window_s
+        self.render_interval = render_interval
+        self.frame_budget = frame_budget_ms / 1000
+        self.is_running = False
+        self.next_channel = 0  # Canal por el que empieza el siguiente cuadro
+
+        self.buffers = {name: CircularBuffer(capacity, 2) for name in self.channels}
+        self.views = {name: np.full((2, capacity), np.nan) for name in self.channels}
+
+        self.fig = plt.Figure(figsize=(6, 1.4 * len(self.channels)), dpi=100, facecolor='black')
+        axes = self.fig.subplots(len(self.channels), 1, sharex=True, squeeze=False)[:, 0]
+        self.axes = {}
+        self.lines = {}
+        for ax, name in zip(axes, self.channels):
+            ax.set_facecolor('black')
+            ax.set_xlim(-self.window_s, 0)
+            ax.set_ylim(0, 1)
+            ax.set_ylabel(name, color='white', fontsize=9)
+            ax.tick_params(colors='white', labelsize=8)
+            ax.grid(True, color='gray', linestyle='--', alpha=0.4)
+            self.axes[name] = ax
+            self.lines[name], = ax.plot([], [], '-', lw=1, color='#12fe35', animated=True)
+        axes[-1].set_xlabel("Tiempo (s)", color='white')
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        self.canvas.draw()
+
+        for name in self.channels:
+            self.bus.subscribe(name, self.on_sample)
+
+    def on_sample(self, channel, value, t):
+        # Se ejecuta en el hilo del productor: solo escribe en el buffer
+        self.buffers[channel].append((t, value))
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for line in self.lines.values():
+            line.axes.draw_artist(line)
+
+    def start(self):
+        if not self.is_running:
+            self.is_running = True
+            self.render()
+
+    def stop(self):
+        self.is_running = False
+
+    def destroy(self):
+        self.stop()
+        for name in self.channels:
+            self.bus.unsubscribe(name, self.on_sample)
+        super().destroy()
+
+    def update_channel(self, name, now):
+        """Recalcula el trazo de un canal; devuelve True si hay que reescalar el eje."""
+        buffer = self.buffers[name]
+        view = self.views[name]
+        buffer.snapshot(buffer.capacity, view)
+
+        ax = self.axes[name]
+        columns = max(int(ax.bbox.width), 1)
+        xs, ys = decimate_minmax(view[0], view[1], now - self.window_s, now, columns)
+        self.lines[name].set_data(xs, ys)
+
+        if ys.size:
+            low, high = ax.get_ylim()
+            y_min, y_max = float(ys.min()), float(ys.max())
+            if y_min < low or y_max > high:
+                margin = max((y_max - y_min) * 0.1, 1e-6)
+                ax.set_ylim(min(low, y_min - margin), max(high, y_max + margin))
+                return True
+        return False
+
+    @timed("telemetría")
+    def render(self):
+        if not self.is_running:
+            return
+
+        start = time.perf_counter()
+        now = time.monotonic()
+        rescale = False
+        n = len(self.channels)
+        for k in range(n):
+            name = self.channels[(self.next_channel + k) % n]
+            rescale |= self.update_channel(name, now)
+            if time.perf_counter() - start > self.frame_budget:
+                self.next_channel = (self.next_channel + k + 1) % n
+                break
+
+        if rescale or self.background is None:
+            # Cambio de escala: redibujado completo, on_draw recaptura el fondo
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            for line in self.lines.values():
+                line.axes.draw_artist(line)
+            self.canvas.blit(self.fig.bbox)
+
+        self.after(self.render_interval, self.render)
+
 
 class RealTimePlotApp:
     def __init__(self, root):
@@ -19,9 +236,12 @@ class RealTimePlotApp:
 
         # Variables de control
         self.is_running = False
-        self.update_interval = 100  # ms
+        self.update_thread = None
+        self.update_interval = 10  # ms entre muestras (100 Hz)
+        self.render_interval = 33  # ms entre cuadros (~30 FPS)
         self.data_points = 100
         self.max_points = 200  # Máximo de puntos a mostrar
+        self.num_channels = 3
 
         # Frame principal
         self.main_frame = ctk.CTkFrame(root)
@@ -72,17 +292,24 @@ class RealTimePlotApp:
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
-        # Datos iniciales
+        # Datos: buffer circular compartido y buffer de dibujo preasignado
+        self.buffer = CircularBuffer(self.max_points, self.num_channels)
         self.x_data = np.arange(self.max_points)
-        self.y_data = np.zeros(self.max_points)
+        self.y_view = np.full((self.num_channels, self.max_points), np.nan)
 
         # Configuración inicial del gráfico
-        self.line, = self.ax.plot(self.x_data, self.y_data, 'b-', linewidth=2)
+        self.lines = [self.ax.plot(self.x_data, self.y_view[c], linewidth=2, animated=True)[0]
+                      for c in range(self.num_channels)]
         self.ax.set_title("Gráfico en Tiempo Real", fontsize=14)
         self.ax.set_xlabel("Tiempo (muestras)", fontsize=12)
         self.ax.set_ylabel("Valor", fontsize=12)
         self.ax.set_ylim(-0.1, 1.1)
+        self.ax.set_xlim(0, self.data_points)
         self.ax.grid(True, linestyle='--', alpha=0.7)
+
+        # Fondo cacheado para blitting; se recaptura en cada redibujado completo
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
         self.canvas.draw()
 
     def start_updating(self):
@@ -94,6 +321,17 @@ class RealTimePlotApp:
                 if self.data_points <= 0 or self.update_interval <= 0:
                     messagebox.showerror("Error", "Los valores deben ser mayores que cero")
                     return
+                self.data_points = min(self.data_points, self.max_points)
+                self.x_data = np.arange(self.data_points)
+                self.y_view = np.full((self.num_channels, self.data_points), np.nan)
+                self.ax.set_xlim(0, self.data_points)
+                self.canvas.draw()
+
+                # Un Detener reciente puede dejar al productor anterior durmiendo:
+                # esperarlo para que no queden dos hilos escribiendo en el buffer
+                if self.update_thread is not None:
+                    self.update_thread.join()
+                    self.update_thread = None
 
                 self.is_running = True
                 self.btn_start.configure(state="disabled")
@@ -102,6 +340,7 @@ class RealTimePlotApp:
                 # Iniciar hilo para actualización en tiempo real
                 self.update_thread = threading.Thread(target=self.update_plot, daemon=True)
                 self.update_thread.start()
+                self.draw_plot()
 
             except ValueError:
                 messagebox.showerror("Error", "Por favor ingrese valores numéricos válidos")
@@ -113,32 +352,35 @@ class RealTimePlotApp:
 
     def update_plot(self):
         while self.is_running:
-            # Generar nuevo dato aleatorio
-            new_value = np.random.rand()
-
-            # Desplazar los datos hacia la izquierda
-            self.y_data = np.roll(self.y_data, -1)
-            self.y_data[-1] = new_value
-
-            # Actualizar gráfico en el hilo principal
-            self.root.after(0, self.draw_plot)
+            # Generar nuevos datos aleatorios (uno por canal) sin tocar el gráfico
+            self.buffer.append(np.random.rand(self.num_channels))
 
             # Esperar el intervalo especificado
             time.sleep(self.update_interval / 1000)
 
+    def on_draw(self, event):
+        """Recaptura el fondo de los ejes tras un redibujado completo (resize, límites)."""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
     def draw_plot(self):
-        # Actualizar los datos de la línea
-        self.line.set_ydata(self.y_data)
+        if not self.is_running:
+            return
 
-        # Ajustar los límites del eje x según los puntos a mostrar
-        if self.data_points < self.max_points:
-            self.ax.set_xlim(0, self.data_points)
-        else:
-            self.ax.set_xlim(0, self.max_points)
+        if self.background is not None:
+            # Copiar la ventana visible sin bloquear al hilo productor
+            self.buffer.snapshot(self.data_points, self.y_view)
+
+            # Restaurar el fondo y redibujar solo las líneas
+            self.canvas.restore_region(self.background)
+            for line, y in zip(self.lines, self.y_view):
+                line.set_data(self.x_data, y)
+                self.ax.draw_artist(line)
+            self.canvas.blit(self.ax.bbox)
 
-        # Redibujar el canvas
-        self.canvas.draw_idle()
-        self.canvas.flush_events()
+        # El render va a ritmo fijo, independiente de la tasa de muestreo
+        self.root.after(self.render_interval, self.draw_plot)
 
     def on_closing(self):
         self.is_running = False
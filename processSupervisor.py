@@ -0,0 +1,222 @@
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+from instrumentation import measure
+
+HEARTBEAT_ENV = "RRL_HEARTBEAT_FILE"  # Variable con la ruta del latido de cada herramienta
+HEARTBEAT_PERIOD = 1.0  # segundos mínimos entre latidos escritos por la herramienta
+HEARTBEAT_TIMEOUT = 5.0  # segundos sin latido para considerarla colgada
+SAMPLE_INTERVAL = 1.0  # segundos entre muestras de CPU/RSS
+STOP_TIMEOUT = 3.0  # segundos de espera tras SIGTERM antes de SIGKILL
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+_last_heartbeat = 0.0
+
+
+def heartbeat():
+    """Latido para las herramientas supervisadas; llamarlo en cada vuelta del bucle principal.
+
+    Fuera del supervisor (script ejecutado a mano) no hace nada.
+    """
+    global _last_heartbeat
+    path = os.environ.get(HEARTBEAT_ENV)
+    now = time.monotonic()
+    if path and now - _last_heartbeat >= HEARTBEAT_PERIOD:
+        _last_heartbeat = now
+        with open(path, "a"):
+            os.utime(path)
+
+
+def proc_usage(pid):
+    """(ticks de CPU acumulados, MB RSS) del proceso leídos de /proc, o None si ya no existe."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Los campos después del nombre del proceso (que puede tener espacios)
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = int(fields[11]) + int(fields[12])  # utime + stime
+        with open(f"/proc/{pid}/statm") as f:
+            rss_mb = int(f.read().split()[1]) * PAGE_SIZE / 2 ** 20
+    except (OSError, IndexError, ValueError):
+        return None
+    return ticks, rss_mb
+
+
+class ManagedProcess:
+    """Una herramienta auxiliar con a lo sumo una instancia viva."""
+
+    def __init__(self, name, script, resource=None):
+        self.name = name
+        self.script = script
+        self.resource = resource  # p. ej. "camara0": dos herramientas no la comparten
+        self.process = None
+        self.heartbeat_file = os.path.join(tempfile.gettempdir(), f"rrl_{os.getpid()}_{name}.heartbeat")
+        self.started_at = None
+        self.state = "detenido"
+        self.cpu_percent = 0.0
+        self.rss_mb = 0.0
+        self.last_cpu_ticks = None
+        self.last_sample = None
+
+    def is_running(self):
+        return self.process is not None and self.process.returncode is None
+
+    def sample(self, now):
+        """Actualiza estado, CPU y memoria leyendo /proc; devuelve True si el estado cambió."""
+        previous = self.state
+        if self.process is None:
+            self.state = "detenido"
+        elif self.process.returncode is not None:
+            self.state = f"terminado ({self.process.returncode})"
+            self.cpu_percent = 0.0
+            self.rss_mb = 0.0
+        else:
+            usage = proc_usage(self.process.pid)
+            if usage is not None:
+                ticks, self.rss_mb = usage
+                if self.last_cpu_ticks is not None and now > self.last_sample:
+                    self.cpu_percent = (ticks - self.last_cpu_ticks) / CLOCK_TICKS / (now - self.last_sample) * 100
+                self.last_cpu_ticks = ticks
+                self.last_sample = now
+
+            try:
+                beat_age = time.time() - os.path.getmtime(self.heartbeat_file)
+            except OSError:
+                beat_age = None
+            if beat_age is None:
+                self.state = "iniciando" if now - self.started_at < HEARTBEAT_TIMEOUT else "sin latido"
+            else:
+                self.state = "activo" if beat_age < HEARTBEAT_TIMEOUT else "sin latido"
+        return self.state != previous
+
+
+class ProcessSupervisor:
+    """Supervisa las herramientas auxiliares lanzadas desde la GUI.
+
+    Mantiene una sola instancia por herramienta, detiene la que ocupa el mismo
+    recurso (cámara) antes de lanzar otra, muestrea CPU/RSS y el latido de
+    cada una y las apaga todas al cerrar la GUI. Los procesos se lanzan,
+    esperan y muestrean como tareas del núcleo de E/S (`io`, un IoCore), así
+    detener una herramienta no bloquea el hilo de Tk. `on_change()` se llama
+    desde el hilo de E/S.
+    """
+
+    def __init__(self, io, on_change=None):
+        self.io = io
+        self.tools = {}
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.monitor = None
+
+    def register(self, name, script, resource=None):
+        self.tools[name] = ManagedProcess(name, script, resource)
+
+    def start(self, name):
+        self.io.submit(self.start_tool(self.tools[name]))
+
+    def stop(self, name):
+        self.io.submit(self.stop_tool(self.tools[name]))
+
+    def restart(self, name):
+        tool = self.tools[name]
+
+        async def restart_tool():
+            await self.stop_tool(tool)
+            await self.start_tool(tool)
+        self.io.submit(restart_tool())
+
+    def toggle(self, name):
+        tool = self.tools[name]
+
+        async def toggle_tool():
+            # Se decide en el hilo de E/S para no competir con un arranque o parada en curso
+            if tool.is_running():
+                await self.stop_tool(tool)
+            else:
+                await self.start_tool(tool)
+        self.io.submit(toggle_tool())
+
+    async def start_tool(self, tool):
+        if tool.is_running():
+            print(f"{tool.name} ya está en ejecución.")
+            return
+        # Liberar el recurso (cámara) si otra herramienta lo tiene
+        for other in self.tools.values():
+            if other is not tool and tool.resource and other.resource == tool.resource and other.is_running():
+                print(f"Deteniendo {other.name} para liberar {tool.resource}.")
+                await self.stop_tool(other)
+
+        if os.path.exists(tool.heartbeat_file):
+            os.remove(tool.heartbeat_file)
+        env = dict(os.environ, **{HEARTBEAT_ENV: tool.heartbeat_file})
+        try:
+            process = await asyncio.create_subprocess_exec(sys.executable, tool.script, env=env,
+                                                           start_new_session=True)
+        except OSError as e:
+            print(f"Error al ejecutar {tool.script}: {e}")
+            return
+        with self.lock:
+            tool.process = process
+            tool.started_at = time.monotonic()
+            tool.last_cpu_ticks = None
+            tool.state = "iniciando"
+        if self.monitor is None:
+            self.monitor = asyncio.create_task(self.monitor_loop())
+        self.notify()
+
+    async def stop_tool(self, tool):
+        if tool.is_running():
+            # Terminar todo el grupo de procesos para no dejar hijos con la cámara abierta
+            pgid = os.getpgid(tool.process.pid)
+            os.killpg(pgid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(tool.process.wait(), STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                os.killpg(pgid, signal.SIGKILL)
+                await tool.process.wait()
+        with self.lock:
+            tool.process = None
+            tool.state = "detenido"
+            tool.cpu_percent = 0.0
+            tool.rss_mb = 0.0
+        self.notify()
+
+    def shutdown(self):
+        """Detiene todas las herramientas y el muestreo (al cerrar la GUI); bloquea hasta terminar."""
+        async def stop_all():
+            if self.monitor is not None:
+                self.monitor.cancel()
+                self.monitor = None
+            for tool in self.tools.values():
+                await self.stop_tool(tool)
+                if os.path.exists(tool.heartbeat_file):
+                    os.remove(tool.heartbeat_file)
+
+        try:
+            self.io.submit(stop_all()).result(STOP_TIMEOUT * (len(self.tools) + 1))
+        except Exception as e:
+            print(f"Error al detener las herramientas: {e}")
+
+    def states(self):
+        """Instantánea {nombre: (estado, %CPU, MB RSS)} para la GUI."""
+        with self.lock:
+            return {name: (tool.state, tool.cpu_percent, tool.rss_mb) for name, tool in self.tools.items()}
+
+    async def monitor_loop(self):
+        while True:
+            now = time.monotonic()
+            with self.lock, measure("supervisor.muestreo"):
+                for tool in self.tools.values():
+                    tool.sample(now)
+            self.notify()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    def notify(self):
+        if self.on_change is not None:
+            self.on_change()
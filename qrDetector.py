@@ -1,51 +1,77 @@
 import cv2
 import numpy as np
 
-# Inicializamos la captura de video
-cap = cv2.VideoCapture(0)  # Usa la cámara por defecto
+from cameraCapture import CameraCapture, DETECTOR_CAPTURE_SIZE
+from processSupervisor import heartbeat
 
-# Comprobamos si la cámara está abierta
-if not cap.isOpened():
-    print("Error: No se puede acceder a la cámara.")
-    exit()
+WINDOW_NAME = "Detección de QR"
 
-# Inicializamos el detector de códigos QR
-qr_detector = cv2.QRCodeDetector()
 
-# Creamos una única ventana antes de entrar en el bucle
-cv2.namedWindow("Detección de QR", cv2.WINDOW_NORMAL)
+class QrDetector:
+    """Detección y decodificación de códigos QR sobre cada frame."""
 
-# Establecemos un tamaño específico para la ventana (por ejemplo, 1600x900)
-cv2.resizeWindow("Detección de QR", 600, 600)
+    window_name = WINDOW_NAME
 
-while True:
-    ret, frame = cap.read()  # Captura un frame
-    if not ret:
-        print("Error al capturar el frame.")
-        break
+    def __init__(self):
+        # Inicializamos el detector de códigos QR
+        self.qr_detector = cv2.QRCodeDetector()
 
-    # Detectamos y decodificamos el código QR
-    value, pts, _ = qr_detector.detectAndDecode(frame)
+    def reset(self):
+        pass
 
-    # Si se detecta un código QR
-    if pts is not None:
-        pts = np.int32(pts).reshape(-1, 2)  # Convertimos los puntos a enteros y reformateamos
+    def process(self, frame):
+        # Detectamos y decodificamos el código QR
+        value, pts, _ = self.qr_detector.detectAndDecode(frame)
 
-        for i in range(4):
-            # Dibujamos los puntos de los vértices del QR
-            cv2.line(frame, tuple(pts[i]), tuple(pts[(i + 1) % 4]), (0, 255, 0), 3)
+        # Si se detecta un código QR
+        if pts is not None:
+            pts = np.int32(pts).reshape(-1, 2)  # Convertimos los puntos a enteros y reformateamos
 
-        # Opcionalmente, podemos mostrar el valor del QR en la ventana
-        cv2.putText(frame, f"QR Detectado: {value}", (pts[0][0], pts[0][1] - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
+            for i in range(4):
+                # Dibujamos los puntos de los vértices del QR
+                cv2.line(frame, tuple(pts[i]), tuple(pts[(i + 1) % 4]), (0, 255, 0), 3)
 
-    # Mostramos el frame con los códigos QR enmarcados
-    cv2.imshow("Detección de QR", frame)
+            # Opcionalmente, podemos mostrar el valor del QR en la ventana
+            cv2.putText(frame, f"QR Detectado: {value}", (pts[0][0], pts[0][1] - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
+        return frame
 
-    # Salir del bucle si presionamos la tecla 'q'
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
 
-# Liberamos la cámara y cerramos las ventanas
-cap.release()
-cv2.destroyAllWindows()
+def main():
+    # Inicializamos la captura de video
+    cap = CameraCapture(0, *DETECTOR_CAPTURE_SIZE)  # Usa la cámara por defecto
+
+    # Comprobamos si la cámara está abierta
+    if not cap.open():
+        print("Error: No se puede acceder a la cámara.")
+        exit()
+
+    detector = QrDetector()
+
+    # Creamos una única ventana antes de entrar en el bucle
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+
+    # Establecemos un tamaño específico para la ventana (por ejemplo, 1600x900)
+    cv2.resizeWindow(WINDOW_NAME, 600, 600)
+
+    while True:
+        heartbeat()
+        ret, frame = cap.read()  # Captura un frame
+        if not ret:
+            print("Error al capturar el frame.")
+            break
+
+        # Mostramos el frame con los códigos QR enmarcados
+        cv2.imshow(WINDOW_NAME, detector.process(frame))
+
+        # Salir del bucle si presionamos la tecla 'q'
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+    # Liberamos la cámara y cerramos las ventanas
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import threading
+import time
+
+from instrumentation import measure
+
+FRAME_INTERVAL = 16  # ms entre pasadas (~60 Hz)
+FRAME_BUDGET_MS = 8.0  # tiempo máximo de trabajo no esencial por pasada
+MAX_SLOWDOWN = 8  # una tarea degradada corre como mínimo a 1/8 de su frecuencia
+OVERLOAD_FRAMES = 3  # pasadas excedidas seguidas antes de degradar una tarea
+RECOVERY_FRAMES = 30  # pasadas holgadas seguidas antes de devolverle frecuencia a una tarea
+
+
+class PeriodicTask:
+    """Tarea periódica del planificador (cámara, sensores, LIDAR...)."""
+
+    __slots__ = ("name", "callback", "interval", "priority", "essential", "next_due", "slowdown", "skipped")
+
+    def __init__(self, name, callback, interval, priority, essential):
+        self.name = name
+        self.callback = callback
+        self.interval = interval  # segundos
+        self.priority = priority
+        self.essential = essential  # Las esenciales no se degradan ni se saltan por presupuesto
+        self.next_due = 0.0  # instante (perf_counter) del próximo tick
+        self.slowdown = 1  # Multiplicador del intervalo cuando hay sobrecarga
+        self.skipped = 0  # Ticks saltados por atraso o por falta de presupuesto
+
+
+class RedrawScheduler:
+    """Planificador único de cuadros para el hilo de Tk.
+
+    Atiende dos tipos de trabajo en una sola pasada por cuadro:
+
+    - widgets registrados con `register`, que se redibujan solo cuando algún
+      hilo los marca sucios con `mark_dirty` (opcionalmente con una
+      frecuencia máxima), y
+    - tareas periódicas registradas con `add_periodic`, que sustituyen a las
+      cadenas de `after()` de cada widget.
+
+    Todo se ordena por prioridad (menor primero; las tareas esenciales antes
+    que nada). Lo no esencial solo corre mientras quede presupuesto del
+    cuadro: un widget que no alcanzó queda sucio y un tick periódico que no
+    alcanzó, o que llegó tarde, se salta en lugar de encolarse. Si varios
+    cuadros seguidos se pasan del presupuesto, la tarea no esencial de menor
+    prioridad baja su frecuencia a la mitad (hasta MAX_SLOWDOWN) y la
+    recupera cuando vuelve a sobrar tiempo.
+    """
+
+    def __init__(self, frame_interval=FRAME_INTERVAL, frame_budget_ms=FRAME_BUDGET_MS):
+        self.frame_interval = frame_interval
+        self.frame_budget = frame_budget_ms / 1000
+        self.widgets = {}  # nombre -> (prioridad, función de redibujado, intervalo mínimo en s)
+        self.last_redraw = {}  # nombre -> instante del último redibujado
+        self.tasks = {}  # nombre -> PeriodicTask
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.root = None
+        self.after_id = None
+        self.busy_frames = 0
+        self.calm_frames = 0
+
+    def register(self, name, redraw, priority=0, max_rate=None):
+        """Registra un widget; los de prioridad menor se atienden primero.
+
+        `max_rate` (Hz) limita cuántas veces por segundo se redibuja aunque
+        lo marquen sucio más seguido.
+        """
+        self.widgets[name] = (priority, redraw, 1 / max_rate if max_rate else 0.0)
+        self.mark_dirty(name)
+
+    def unregister(self, name):
+        self.widgets.pop(name, None)
+        with self.lock:
+            self.dirty.discard(name)
+
+    def mark_dirty(self, name):
+        with self.lock:
+            self.dirty.add(name)
+
+    def add_periodic(self, name, callback, interval_ms, priority=0, essential=False):
+        """Registra (o reemplaza) una tarea que corre cada `interval_ms` en el hilo de Tk."""
+        task = PeriodicTask(name, callback, interval_ms / 1000, priority, essential)
+        task.next_due = time.perf_counter()  # Primer tick en el próximo cuadro
+        self.tasks[name] = task
+
+    def remove_periodic(self, name):
+        self.tasks.pop(name, None)
+
+    def start(self, root):
+        self.root = root
+        if self.after_id is None:
+            self.after_id = root.after(self.frame_interval, self.run_frame)
+
+    def stop(self):
+        if self.root is not None and self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        self.after_id = None
+
+    def run_frame(self):
+        start = time.perf_counter()
+        with self.lock:
+            pending = self.dirty
+            self.dirty = set()
+
+        # Trabajo del cuadro: (esencial primero, prioridad, orden) -> tarea periódica o widget sucio
+        half_frame = self.frame_interval / 2000
+        work = [(not task.essential, task.priority, 0, task) for task in list(self.tasks.values())
+                if start >= task.next_due - half_frame]
+        leftover = []
+        for name in pending:
+            widget = self.widgets.get(name)
+            if widget is None:
+                continue
+            if start - self.last_redraw.get(name, 0.0) < widget[2]:
+                leftover.append(name)  # Limitado por frecuencia: sigue sucio
+                continue
+            work.append((True, widget[0], 1, name))
+        work.sort(key=lambda item: item[:3])
+
+        with measure("cuadro"):
+            for _, _, _, item in work:
+                over_budget = time.perf_counter() - start > self.frame_budget
+                if isinstance(item, PeriodicTask):
+                    self.run_task(item, start, skip=over_budget and not item.essential)
+                elif over_budget:
+                    leftover.append(item)  # Sin presupuesto: el resto se queda sucio para el siguiente cuadro
+                else:
+                    self.run_widget(item, start)
+
+        if leftover:
+            with self.lock:
+                self.dirty.update(leftover)
+        self.adapt(time.perf_counter() - start)
+
+        # Pasadas a ritmo fijo: descontar lo que tardó esta
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        self.after_id = self.root.after(max(1, self.frame_interval - elapsed_ms), self.run_frame)
+
+    def run_task(self, task, now, skip=False):
+        if not skip:
+            try:
+                with measure(f"tarea.{task.name}"):
+                    task.callback()
+            except Exception as e:
+                print(f"Error en la tarea '{task.name}': {e}")
+        else:
+            task.skipped += 1
+        # Un tick atrasado no se recupera: el siguiente se programa desde ahora
+        interval = task.interval * task.slowdown
+        task.next_due += interval
+        if task.next_due <= now:
+            task.skipped += int((now - task.next_due) // interval)
+            task.next_due = now + interval
+
+    def run_widget(self, name, now):
+        self.last_redraw[name] = now
+        try:
+            with measure(f"redibujo.{name}"):
+                self.widgets[name][1]()
+        except Exception as e:
+            print(f"Error al redibujar '{name}': {e}")
+
+    def adapt(self, elapsed):
+        """Degrada primero la tarea no esencial de menor prioridad; la recupera con holgura."""
+        degradable = sorted((task for task in self.tasks.values() if not task.essential),
+                            key=lambda task: task.priority)
+        if elapsed > self.frame_budget:
+            self.calm_frames = 0
+            self.busy_frames += 1
+            if self.busy_frames >= OVERLOAD_FRAMES:
+                self.busy_frames = 0
+                for task in reversed(degradable):
+                    if task.slowdown < MAX_SLOWDOWN:
+                        task.slowdown *= 2
+                        break
+        elif elapsed < self.frame_budget / 2:
+            self.busy_frames = 0
+            self.calm_frames += 1
+            if self.calm_frames >= RECOVERY_FRAMES:
+                self.calm_frames = 0
+                for task in degradable:
+                    if task.slowdown > 1:
+                        task.slowdown //= 2
+                        break
+
+    def load_report(self):
+        """{tarea: (frecuencia efectiva en Hz, ticks saltados)} para diagnóstico."""
+        return {name: (1 / (task.interval * task.slowdown), task.skipped) for name, task in self.tasks.items()}
@@ -0,0 +1,494 @@
+"""Dispositivos de reproducción de una corrida grabada con runRecorder.
+
+`ReplayEngine` lee los segmentos de video, lidar.bin y serial.bin de una
+sesión y entrega dispositivos con la misma interfaz que usa la GUI
+(cv2.VideoCapture, rplidar.RPLidar y serial.Serial). Todos siguen el mismo
+reloj virtual, así los flujos llegan en el orden de sus marcas de tiempo:
+
+    tiempo real       velocidad 1
+    avance rápido     velocidad > 1
+    paso a paso       el reloj solo avanza con `step()` (al siguiente registro o unos segundos)
+
+Para pruebas sin dispositivos, `RunLog.events()` recorre todos los
+registros en orden de tiempo. Este módulo (y cv2) solo se carga si hay una
+reproducción activa; ver runReplay.
+"""
+import collections
+import glob
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from runRecorder import INDEX_ENTRY, SCAN_HEADER, SERIAL_HEADER
+from runReplay import REPLAY_ENV
+
+REPLAY_WAIT_SLICE: float = 0.05  # segundos máximos de cada espera, para notar stop() y release()
+REPLAY_STEP_POSITION = struct.Struct("<q")  # posición del reloj paso a paso en el archivo compartido
+
+
+class CameraLog:
+    """Índice de los cuadros de una cámara repartidos en segmentos."""
+
+    def __init__(self, index, segments):
+        self.index = index
+        self.paths = []
+        times, segment_of, rows, lengths = [], [], [], []
+        for number, (path, entries) in enumerate(segments):
+            self.paths.append(path)
+            times.append(entries[:, 0])
+            segment_of.append(np.full(len(entries), number, dtype=np.int64))
+            rows.append(entries[:, 1])
+            lengths.append(entries[:, 2])
+        self.times = np.concatenate(times) if times else np.empty(0, dtype=np.int64)
+        self.segment_of = np.concatenate(segment_of) if segment_of else np.empty(0, dtype=np.int64)
+        self.rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)  # offset (mjpg) o cuadro (mp4)
+        self.lengths = np.concatenate(lengths) if lengths else np.empty(0, dtype=np.int64)
+        self.codec = "h264" if self.paths and self.paths[0].endswith(".mp4") else "mjpg"
+        self.files = {}  # segmento -> descriptor abierto (mjpg)
+        self.width, self.height = self.first_frame_size()
+        span = (self.times[-1] - self.times[0]) / 1e9 if len(self.times) > 1 else 0
+        self.fps = (len(self.times) - 1) / span if span > 0 else 30.0
+
+    def first_frame_size(self):
+        if not len(self.times):
+            return 0, 0
+        if self.codec == "mjpg":
+            image = cv2.imdecode(self.frame(0), cv2.IMREAD_REDUCED_COLOR_8)
+            return image.shape[1] * 8, image.shape[0] * 8
+        video = cv2.VideoCapture(self.paths[0])
+        size = int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        video.release()
+        return size
+
+    def frame(self, i):
+        """Bytes JPEG del cuadro `i` (solo segmentos mjpg); pread no comparte posición entre hilos."""
+        segment = self.segment_of[i]
+        fd = self.files.get(segment)
+        if fd is None:
+            fd = self.files[segment] = os.open(self.paths[segment], os.O_RDONLY)
+        return np.frombuffer(os.pread(fd, int(self.lengths[i]), int(self.rows[i])), dtype=np.uint8)
+
+    def frames(self):
+        """(t_ns, cuadro) en orden: JPEG para mjpg, imagen BGR para mp4."""
+        if self.codec == "mjpg":
+            for i, t_ns in enumerate(self.times):
+                yield int(t_ns), self.frame(i)
+            return
+        for number, path in enumerate(self.paths):
+            video = cv2.VideoCapture(path)
+            for t_ns in self.times[self.segment_of == number]:
+                ok, image = video.read()
+                if not ok:
+                    break
+                yield int(t_ns), image
+            video.release()
+
+    def close(self):
+        for fd in self.files.values():
+            os.close(fd)
+        self.files.clear()
+
+
+class RunLog:
+    """Una sesión grabada cargada en índices: cámaras, escaneos del LIDAR y líneas serie.
+
+    Los registros incompletos al final de un archivo (corte durante la
+    grabación) se ignoran.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        with open(os.path.join(session, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        segments = {}
+        for path in sorted(glob.glob(os.path.join(session, "camera*_*.idx"))):
+            match = re.match(r"camera(\d+)_(\d+)\.idx$", os.path.basename(path))
+            video = next((path[:-4] + ext for ext in (".mjpg", ".mp4") if os.path.exists(path[:-4] + ext)), None)
+            if match is None or video is None:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            entries = np.frombuffer(data, dtype=np.int64, count=len(data) // INDEX_ENTRY.size * 3).reshape(-1, 3)
+            segments.setdefault(int(match.group(1)), []).append((video, entries))
+        self.cameras = {index: CameraLog(index, found) for index, found in sorted(segments.items())}
+
+        self.lidar_data = self.read_file("lidar.bin")
+        lidar_times, self.lidar_offsets, self.lidar_sizes = [], [], []
+        offset = 0
+        while offset + SCAN_HEADER.size <= len(self.lidar_data):
+            t_ns, n = SCAN_HEADER.unpack_from(self.lidar_data, offset)
+            offset += SCAN_HEADER.size
+            if offset + n * 12 > len(self.lidar_data):
+                break
+            lidar_times.append(t_ns)
+            self.lidar_offsets.append(offset)
+            self.lidar_sizes.append(n)
+            offset += n * 12
+        self.lidar_times = np.array(lidar_times, dtype=np.int64)
+
+        data = self.read_file("serial.bin")
+        serial_times, self.serial_lines = [], []
+        offset = 0
+        while offset + SERIAL_HEADER.size <= len(data):
+            t_ns, length = SERIAL_HEADER.unpack_from(data, offset)
+            offset += SERIAL_HEADER.size
+            if offset + length > len(data):
+                break
+            serial_times.append(t_ns)
+            self.serial_lines.append(data[offset:offset + length].decode("utf-8", errors="replace"))
+            offset += length
+        self.serial_times = np.array(serial_times, dtype=np.int64)
+
+        streams = [camera.times for camera in self.cameras.values()] + [self.lidar_times, self.serial_times]
+        self.timeline = np.unique(np.concatenate(streams))  # Instantes con al menos un registro
+        self.duration = int(self.timeline[-1]) if len(self.timeline) else 0
+
+    def read_file(self, name):
+        try:
+            with open(os.path.join(self.session, name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return b""
+
+    def scan(self, i):
+        """Escaneo `i` como arreglo (n, 3) de (calidad, ángulo °, distancia mm)."""
+        return np.frombuffer(self.lidar_data, dtype=np.float32, count=self.lidar_sizes[i] * 3,
+                             offset=self.lidar_offsets[i]).reshape(-1, 3)
+
+    def events(self):
+        """Todos los registros en orden de tiempo: (t_ns, flujo, dato) con flujo "camera<i>", "lidar" o "serie"."""
+        streams = [tag(f"camera{index}", camera.frames()) for index, camera in self.cameras.items()]
+        streams.append(tag("lidar", ((t_ns, self.scan(i)) for i, t_ns in enumerate(self.lidar_times))))
+        streams.append(tag("serie", zip(self.serial_times, self.serial_lines)))
+        return heapq.merge(*streams, key=lambda event: event[0])
+
+    def close(self):
+        for camera in self.cameras.values():
+            camera.close()
+
+
+def tag(stream, records):
+    for t_ns, data in records:
+        yield int(t_ns), stream, data
+
+
+class ReplayClock:
+    """Reloj virtual en ns de la grabación, compartido por todos los dispositivos de reproducción.
+
+    En tiempo real o avance rápido avanza con time.monotonic_ns() (igual en
+    todos los procesos) desde `start_ns`, multiplicado por `speed`. En modo
+    paso a paso la posición vive en un archivo mapeado en memoria: la GUI la
+    mueve con `advance()` y los procesos hijos la leen.
+    """
+
+    def __init__(self, speed=1.0, step_file=None):
+        self.speed = speed
+        self.step_file = step_file
+        self.start_ns = None
+        self.position = None  # mmap de la posición en modo paso a paso
+        self.changed = threading.Condition()
+        self.stopped = False
+
+    @property
+    def stepping(self):
+        return self.step_file is not None
+
+    def start(self, start_ns=None):
+        self.start_ns = time.monotonic_ns() if start_ns is None else start_ns
+        if self.stepping:
+            if not os.path.exists(self.step_file):
+                with open(self.step_file, "wb") as f:
+                    f.write(REPLAY_STEP_POSITION.pack(0))
+            with open(self.step_file, "r+b") as f:
+                self.position = mmap.mmap(f.fileno(), REPLAY_STEP_POSITION.size)
+
+    def now(self):
+        """Tiempo de la grabación ya alcanzado (0 antes de `start`)."""
+        if self.start_ns is None:
+            return 0
+        if self.position is not None:
+            return REPLAY_STEP_POSITION.unpack_from(self.position)[0]
+        return int((time.monotonic_ns() - self.start_ns) * self.speed)
+
+    def wait_until(self, t_ns, timeout=REPLAY_WAIT_SLICE):
+        """True si el reloj ya llegó a `t_ns`; si no, espera a lo sumo `timeout` s y vuelve a mirar."""
+        remaining = t_ns - self.now()
+        if remaining <= 0:
+            return True
+        if self.stopped:
+            return False
+        if self.stepping or self.start_ns is None:
+            with self.changed:
+                self.changed.wait(timeout)  # Los procesos hijos no reciben el aviso: miran otra vez al vencer
+        else:
+            time.sleep(min(remaining / self.speed / 1e9, timeout))
+        return self.now() >= t_ns
+
+    def advance(self, t_ns):
+        """Modo paso a paso: lleva el reloj a `t_ns` y despierta a los dispositivos."""
+        REPLAY_STEP_POSITION.pack_into(self.position, 0, t_ns)
+        with self.changed:
+            self.changed.notify_all()
+
+    def stop(self):
+        self.stopped = True
+        with self.changed:
+            self.changed.notify_all()
+
+
+class ReplayVideoCapture:
+    """Cámara de reproducción con la interfaz de cv2.VideoCapture.
+
+    Como una cámara en vivo, empieza en el cuadro que corresponde al reloj y
+    conserva solo el último: si quien la lee se atrasa, los cuadros vencidos
+    se pierden igual que con el búfer de un cuadro del driver. Con
+    CAP_PROP_CONVERT_RGB en 0 entrega el JPEG grabado sin decodificar.
+    """
+
+    def __init__(self, log, clock):
+        self.log = log
+        self.clock = clock
+        fourcc = cv2.VideoWriter_fourcc(*("MJPG" if log.codec == "mjpg" else "avc1"))
+        self.props = {cv2.CAP_PROP_FRAME_WIDTH: float(log.width), cv2.CAP_PROP_FRAME_HEIGHT: float(log.height),
+                      cv2.CAP_PROP_FPS: float(round(log.fps)), cv2.CAP_PROP_FOURCC: float(fourcc),
+                      cv2.CAP_PROP_BUFFERSIZE: 1.0}
+        self.position = int(np.searchsorted(log.times, clock.now(), "left"))
+        self.opened = self.position < len(log.times)
+        self.grabbed = None
+        self.video = None  # Lector secuencial del segmento mp4 en curso
+        self.video_segment = None
+        self.video_row = 0
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FPS, cv2.CAP_PROP_FOURCC):
+            return False  # La grabación tiene un solo modo
+        self.props[prop] = float(value)
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0.0)
+
+    def grab(self):
+        times = self.log.times
+        if not self.opened or self.position >= len(times):
+            self.opened = False  # Fin de la grabación: como una cámara desconectada
+            return False
+        while not self.clock.wait_until(times[self.position]):
+            if self.clock.stopped or not self.opened:
+                return False
+        latest = int(np.searchsorted(times, self.clock.now(), "right")) - 1
+        self.position = max(self.position, latest)
+        self.grabbed = self.log.frame(self.position) if self.log.codec == "mjpg" else self.read_video(self.position)
+        self.position += 1
+        return self.grabbed is not None
+
+    def read_video(self, i):
+        segment, row = self.log.segment_of[i], self.log.rows[i]
+        if self.video_segment != segment or row < self.video_row:
+            if self.video is not None:
+                self.video.release()
+            self.video = cv2.VideoCapture(self.log.paths[segment])
+            self.video_segment = segment
+            self.video_row = 0
+        while self.video_row < row:
+            self.video.grab()
+            self.video_row += 1
+        ok, image = self.video.read()
+        self.video_row += 1
+        return image if ok else None
+
+    def retrieve(self):
+        data, self.grabbed = self.grabbed, None
+        if data is None:
+            return False, None
+        if data.ndim == 1:  # JPEG grabado
+            if self.props.get(cv2.CAP_PROP_CONVERT_RGB, 1.0) == 0:
+                return True, data.reshape(1, -1)
+            data = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        return True, data
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self):
+        self.opened = False
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+
+
+class ReplayRPLidar:
+    """LIDAR de reproducción con la interfaz de rplidar.RPLidar.
+
+    `iter_scans` entrega cada escaneo grabado cuando el reloj llega a su
+    marca y sigue la secuencia entre llamadas, como el dispositivo. Termina
+    al acabar la grabación o al detenerse el reloj.
+    """
+
+    def __init__(self, log, clock, port="reproducción"):
+        self.port = port
+        self.log = log
+        self.clock = clock
+        self.scan_number = int(np.searchsorted(log.lidar_times, clock.now(), "left"))
+        self.motor = False
+
+    def get_info(self):
+        return {"model": 0, "firmware": (0, 0), "hardware": 0, "serialnumber": "REPLAY"}
+
+    def get_health(self):
+        return ("Good", 0)
+
+    def start_motor(self):
+        self.motor = True
+
+    def stop_motor(self):
+        self.motor = False
+
+    def stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def iter_scans(self, max_buf_meas=3000, min_len=5):
+        times = self.log.lidar_times
+        while self.scan_number < len(times):
+            while not self.clock.wait_until(times[self.scan_number]):
+                if self.clock.stopped:
+                    return
+            scan = self.log.scan(self.scan_number)
+            self.scan_number += 1
+            # Mismo formato que rplidar: (calidad, ángulo en grados horario, distancia mm)
+            yield list(map(tuple, scan.tolist()))
+
+
+class ReplaySerial:
+    """Puerto serie de reproducción con la interfaz de serial.Serial.
+
+    Las líneas grabadas llegan a la cola de lectura cuando el reloj pasa por
+    su marca. No tiene descriptor: stream_serial lo consulta por `in_waiting`.
+    """
+
+    def __init__(self, log, clock, port="reproducción", baudrate=115200, timeout=0.01):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self.lines = log.serial_lines
+        self.times = log.serial_times
+        self.clock = clock
+        self.pending = collections.deque()
+        self.waiting = 0  # bytes pendientes, como in_waiting del puerto real
+        self.line_number = int(np.searchsorted(self.times, clock.now(), "right"))
+
+    @property
+    def in_waiting(self):
+        arrived = int(np.searchsorted(self.times, self.clock.now(), "right"))
+        for line in self.lines[self.line_number:arrived]:
+            data = (line + "\r\n").encode("utf-8")
+            self.pending.append(data)
+            self.waiting += len(data)
+        self.line_number = max(self.line_number, arrived)
+        return self.waiting
+
+    def readline(self):
+        if not self.pending:
+            return b""
+        data = self.pending.popleft()
+        self.waiting -= len(data)
+        return data
+
+    def read(self, size=1):
+        data = bytearray()
+        while self.pending and len(data) < size:
+            chunk = self.pending.popleft()
+            taken = chunk[:size - len(data)]
+            if len(taken) < len(chunk):
+                self.pending.appendleft(chunk[len(taken):])  # El resto queda para la siguiente lectura
+            data += taken
+            self.waiting -= len(taken)
+        return bytes(data)
+
+    def close(self):
+        self.is_open = False
+
+
+class ReplayEngine:
+    """Una corrida grabada y su reloj; crea los dispositivos de reproducción que la GUI abre."""
+
+    def __init__(self, session, speed=1.0, step=False, step_file=None):
+        self.log = RunLog(session)
+        self.owns_step_file = step and step_file is None  # Lo borra al terminar; los hijos solo lo leen
+        if self.owns_step_file:
+            step_file = os.path.join(tempfile.gettempdir(), f"rrl_replay_{os.getpid()}.pos")
+        self.clock = ReplayClock(speed, step_file if step else None)
+
+    @classmethod
+    def from_env(cls):
+        """Motor del proceso padre descrito en REPLAY_ENV (procesos hijos), o None."""
+        value = os.environ.get(REPLAY_ENV)
+        if not value:
+            return None
+        config = json.loads(value)
+        engine = cls(config["sesion"], config["velocidad"], config["paso"] is not None, config["paso"])
+        engine.clock.start(config["inicio_ns"])
+        return engine
+
+    def start(self):
+        """Pone el reloj en marcha y lo publica en REPLAY_ENV para los procesos que se lancen después."""
+        self.clock.start()
+        os.environ[REPLAY_ENV] = json.dumps({"sesion": self.log.session, "velocidad": self.clock.speed,
+                                             "paso": self.clock.step_file, "inicio_ns": self.clock.start_ns})
+        streams = [f"cámara {index}" for index in self.log.cameras]
+        streams += ["LIDAR"] * bool(len(self.log.lidar_times)) + ["serie"] * bool(len(self.log.serial_times))
+        mode = "paso a paso" if self.clock.stepping else f"velocidad x{self.clock.speed:g}"
+        print(f"Reproduciendo {self.log.session} ({self.log.duration / 1e9:.1f} s, {mode}): {', '.join(streams)}")
+
+    def video_capture(self, index):
+        camera = self.log.cameras.get(index)
+        if camera is None:
+            print(f"La grabación no tiene la cámara {index}")
+            return ReplayVideoCapture(CameraLog(index, []), self.clock)
+        return ReplayVideoCapture(camera, self.clock)
+
+    def lidar(self):
+        return ReplayRPLidar(self.log, self.clock)
+
+    def serial(self):
+        return ReplaySerial(self.log, self.clock)
+
+    def step(self, seconds=None):
+        """Modo paso a paso: avanza hasta el siguiente registro de cualquier flujo, o `seconds` de grabación."""
+        if not self.clock.stepping:
+            return
+        now = self.clock.now()
+        if seconds is not None:
+            self.clock.advance(now + int(seconds * 1e9))
+            return
+        i = int(np.searchsorted(self.log.timeline, now, "right"))
+        if i < len(self.log.timeline):
+            self.clock.advance(int(self.log.timeline[i]))
+
+    def stop(self):
+        """Despierta a los dispositivos que esperan al reloj; sus lecturas terminan."""
+        self.clock.stop()
+        if self.owns_step_file:
+            try:
+                os.remove(self.clock.step_file)
+            except OSError:
+                pass
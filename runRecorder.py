@@ -0,0 +1,332 @@
+"""Grabación de una corrida: cámaras, escaneos del LIDAR y telemetría serie.
+
+Todo se estampa con el mismo reloj (ns de time.monotonic_ns desde el inicio
+de la grabación), así la reproducción puede intercalar los flujos en orden.
+Una sesión es una carpeta:
+
+    meta.json                     inicio, cámaras y formato de cada flujo
+    camera<i>_<seg>.mjpg/.idx     JPEG tal cual llegaron + (t_ns, offset, largo)
+    camera<i>_<seg>.mp4/.idx      con --codec h264: video recodificado + (t_ns, cuadro, 0)
+    lidar.bin                     registros <qI (t_ns, n) + n x 3 float32 (calidad, ángulo °, distancia mm)
+    serial.bin                    registros <qH (t_ns, largo) + la línea en UTF-8
+
+El video lo escribe un proceso aparte (`python runRecorder.py <sesión>`) que
+recibe los JPEG por stdin; la GUI solo encola. Las colas son acotadas: si el
+disco o el codificador no dan abasto se descartan primero cuadros de la
+grabación, nunca se frena la captura ni la vista.
+"""
+import json
+import os
+import queue
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+RECORD_DIRECTORY = "grabaciones"
+RECORD_SEGMENT_SECONDS: float = 60.0  # duración de cada segmento de video
+RECORD_VIDEO_QUEUE: int = 90  # cuadros en espera hacia el codificador (~1 s de 3 cámaras)
+RECORD_DATA_QUEUE: int = 5000  # escaneos y líneas serie en espera de disco
+RECORD_FLUSH_INTERVAL: float = 1.0  # segundos entre vaciados de los registros a disco
+RECORD_STOP_TIMEOUT: float = 5.0  # segundos de espera por los hilos escritores y, aparte, por el codificador al detener
+RECORD_CODEC = "mjpg"  # "mjpg" guarda los JPEG sin recodificar; "h264" recodifica en el proceso aparte
+
+FRAME_HEADER = struct.Struct("<BqI")  # índice de la cámara, t_ns, largo del JPEG
+INDEX_ENTRY = struct.Struct("<qqq")  # t_ns, offset (o número de cuadro), largo
+SCAN_HEADER = struct.Struct("<qI")
+SERIAL_HEADER = struct.Struct("<qH")
+END_OF_STREAM = 0xFF  # cámara reservada: fin de la grabación
+
+
+class Recorder:
+    """Grabadora de la GUI: encola sin bloquear y escribe en hilos y un proceso aparte.
+
+    `add_frame`, `add_scan` y `add_serial` se llaman desde los hilos
+    productores (cámaras, núcleo de E/S) y nunca esperan: con la cola llena
+    el registro se descarta y se cuenta en `dropped`.
+    """
+
+    def __init__(self, directory=RECORD_DIRECTORY, codec=RECORD_CODEC):
+        self.directory = directory
+        self.codec = codec
+        self.session = None
+        self.t0 = None
+        self.video_queue = None
+        self.data_queue = None
+        self.encoder = None
+        self.threads = []
+        self.lock = threading.Lock()  # Una sesión a la vez: start() no pisa a un stop() en curso
+        self.dropped = {"video": 0, "datos": 0}
+        self.counts = {"video": 0, "lidar": 0, "serie": 0}
+
+    @property
+    def active(self):
+        return self.t0 is not None
+
+    def now(self):
+        """Marca de tiempo compartida por todos los flujos (ns desde el inicio), o None si no graba."""
+        t0 = self.t0  # stop() puede anularlo desde otro hilo
+        return None if t0 is None else time.monotonic_ns() - t0
+
+    def start(self, cameras=()):
+        """Crea la sesión y arranca el codificador; `cameras` es [(número, índice, modo)].
+
+        Los segmentos de video se nombran por índice de dispositivo
+        (camera<índice>_...). Devuelve False sin hacer nada si la sesión
+        anterior todavía se está cerrando.
+        """
+        if not self.lock.acquire(blocking=False):
+            print("La grabación anterior todavía se está cerrando")
+            return False
+        try:
+            if self.active:
+                return False
+            self._start(cameras)
+            return True
+        finally:
+            self.lock.release()
+
+    def _start(self, cameras):
+        base = os.path.join(self.directory, time.strftime("corrida_%Y%m%d_%H%M%S"))
+        self.session, attempt = base, 1
+        while os.path.exists(self.session):  # Dos grabaciones en el mismo segundo
+            attempt += 1
+            self.session = f"{base}_{attempt}"
+        os.makedirs(self.session)
+        with open(os.path.join(self.session, "meta.json"), "w") as f:
+            json.dump({"inicio": time.time(), "codec": self.codec, "segmento_s": RECORD_SEGMENT_SECONDS,
+                       "camaras": {str(index): {"numero": number, "modo": str(mode)}
+                                   for number, index, mode in cameras}}, f, indent=2)
+
+        script = os.path.abspath(__file__)
+        self.encoder = subprocess.Popen([sys.executable, script, self.session, "--codec", self.codec],
+                                        stdin=subprocess.PIPE, start_new_session=True)
+        self.video_queue = queue.Queue(RECORD_VIDEO_QUEUE)
+        self.data_queue = queue.Queue(RECORD_DATA_QUEUE)
+        self.dropped = {"video": 0, "datos": 0}
+        self.counts = {"video": 0, "lidar": 0, "serie": 0}
+        # Cada hilo recibe lo suyo: si uno no termina a tiempo, no toca la sesión siguiente
+        self.threads = [threading.Thread(target=self.write_video, args=(self.encoder, self.video_queue, self.counts),
+                                         name="grabador-video", daemon=True),
+                        threading.Thread(target=self.write_data, args=(self.session, self.data_queue, self.counts),
+                                         name="grabador-datos", daemon=True)]
+        self.t0 = time.monotonic_ns()
+        for thread in self.threads:
+            thread.start()
+        print(f"Grabando en {self.session}")
+
+    def stop(self):
+        """Cierra la sesión: vacía las colas a disco y espera al codificador, con tiempo acotado."""
+        with self.lock:
+            if not self.active:
+                return
+            session, encoder, threads = self.session, self.encoder, self.threads
+            queues = (self.video_queue, self.data_queue)
+            self.t0 = None  # Los productores dejan de encolar
+            deadline = time.monotonic() + RECORD_STOP_TIMEOUT
+            for q, thread in zip(queues, threads):
+                if not self.finish_queue(q, thread, deadline) and q is self.video_queue:
+                    # El codificador dejó de leer: matarlo desbloquea al escritor con EPIPE
+                    encoder.kill()
+            for thread in threads:
+                thread.join(max(deadline - time.monotonic(), 0.1))
+            try:
+                encoder.wait(RECORD_STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                encoder.kill()
+            if any(thread.is_alive() for thread in threads):
+                print("La grabación no terminó de escribirse a tiempo")
+            print(f"Grabación terminada en {session}: {self.counts['video']} cuadros, "
+                  f"{self.counts['lidar']} escaneos, {self.counts['serie']} líneas serie; "
+                  f"descartados {self.dropped['video']} cuadros y {self.dropped['datos']} registros")
+
+    @staticmethod
+    def finish_queue(q, thread, deadline):
+        """Encola el fin de sesión antes de `deadline`; False si el escritor sigue trabado.
+
+        Si el hilo escritor ya murió (codificador caído) descarta lo pendiente.
+        """
+        while True:
+            try:
+                q.put(None, timeout=0.1)
+                return True
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    return False
+                if thread.is_alive():
+                    continue
+                try:
+                    while True:
+                        q.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def offer(self, q, item, kind):
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            self.dropped[kind] += 1
+
+    def add_frame(self, index, jpeg, t_ns=None):
+        """Cuadro JPEG de la cámara `index`; `t_ns` es el time.monotonic_ns() del grab."""
+        t0 = self.t0
+        if t0 is not None:
+            self.offer(self.video_queue, (index, time.monotonic_ns() - t0 if t_ns is None else t_ns - t0, jpeg),
+                       "video")
+
+    def add_scan(self, scan):
+        """`scan`: escaneo de rplidar, [(calidad, ángulo °, distancia mm), ...]."""
+        t_ns = self.now()
+        if t_ns is not None:
+            self.offer(self.data_queue, ("lidar", t_ns, np.asarray(scan, dtype=np.float32).reshape(-1, 3)), "datos")
+
+    def add_serial(self, line):
+        t_ns = self.now()
+        if t_ns is not None:
+            self.offer(self.data_queue, ("serie", t_ns, line), "datos")
+
+    @staticmethod
+    def write_video(encoder, video_queue, counts):
+        pipe = encoder.stdin
+        try:
+            while True:
+                item = video_queue.get()
+                if item is None:
+                    break
+                index, t_ns, jpeg = item
+                data = memoryview(jpeg).cast("B")
+                pipe.write(FRAME_HEADER.pack(index, max(t_ns, 0), len(data)))
+                pipe.write(data)
+                counts["video"] += 1
+            pipe.write(FRAME_HEADER.pack(END_OF_STREAM, 0, 0))
+        except OSError as e:
+            print(f"El codificador de video se detuvo: {e}")
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def write_data(session, data_queue, counts):
+        with open(os.path.join(session, "lidar.bin"), "wb") as lidar_log, \
+                open(os.path.join(session, "serial.bin"), "wb") as serial_log:
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    item = data_queue.get(timeout=RECORD_FLUSH_INTERVAL)
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    break
+                if item:
+                    kind, t_ns, payload = item
+                    if kind == "lidar":
+                        lidar_log.write(SCAN_HEADER.pack(t_ns, len(payload)))
+                        lidar_log.write(payload.tobytes())
+                        counts["lidar"] += 1
+                    else:
+                        data = payload.encode("utf-8")[:0xFFFF]
+                        serial_log.write(SERIAL_HEADER.pack(t_ns, len(data)))
+                        serial_log.write(data)
+                        counts["serie"] += 1
+                now = time.monotonic()
+                if now - last_flush >= RECORD_FLUSH_INTERVAL:
+                    lidar_log.flush()
+                    serial_log.flush()
+                    last_flush = now
+
+
+class SegmentWriter:
+    """Segmentos de video de una cámara dentro del proceso codificador."""
+
+    def __init__(self, session, index, codec):
+        self.session = session
+        self.camera = index
+        self.codec = codec
+        self.segment = -1
+        self.segment_start = None
+        self.video = None
+        self.index_file = None
+        self.frames = 0
+
+    def open_segment(self, t_ns, image=None):
+        self.close()
+        self.segment += 1
+        self.segment_start = t_ns
+        self.frames = 0
+        base = os.path.join(self.session, f"camera{self.camera}_{self.segment:03d}")
+        self.index_file = open(base + ".idx", "wb")
+        if self.codec == "mjpg":
+            self.video = open(base + ".mjpg", "wb")
+            return
+        import cv2
+        height, width = image.shape[:2]
+        for fourcc in ("avc1", "mp4v"):  # H.264 por software si OpenCV lo trae; si no, MPEG-4
+            writer = cv2.VideoWriter(base + ".mp4", cv2.VideoWriter_fourcc(*fourcc), 30.0, (width, height))
+            if writer.isOpened():
+                self.video = writer
+                return
+        raise RuntimeError(f"No se pudo abrir un codificador de video para la cámara {self.camera}")
+
+    def write(self, t_ns, jpeg):
+        image = None
+        if self.codec != "mjpg":
+            import cv2
+            image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if self.video is None or t_ns - self.segment_start >= RECORD_SEGMENT_SECONDS * 1e9:
+            self.open_segment(t_ns, image)
+        if self.codec == "mjpg":
+            self.index_file.write(INDEX_ENTRY.pack(t_ns, self.video.tell(), len(jpeg)))
+            self.video.write(jpeg)
+        else:
+            self.index_file.write(INDEX_ENTRY.pack(t_ns, self.frames, 0))
+            self.video.write(image)
+        self.frames += 1
+
+    def close(self):
+        if self.video is not None:
+            self.video.close() if self.codec == "mjpg" else self.video.release()
+            self.index_file.close()
+            self.video = None
+
+
+def read_exactly(stream, size):
+    data = stream.read(size)
+    return data if data is not None and len(data) == size else None
+
+
+def encode(session, codec=RECORD_CODEC):
+    """Proceso codificador: lee cuadros de stdin hasta el fin de la grabación o hasta que se cierre."""
+    writers = {}
+    stdin = sys.stdin.buffer
+    try:
+        while True:
+            header = read_exactly(stdin, FRAME_HEADER.size)
+            if header is None:
+                break
+            index, t_ns, length = FRAME_HEADER.unpack(header)
+            if index == END_OF_STREAM:
+                break
+            jpeg = read_exactly(stdin, length)
+            if jpeg is None:
+                break
+            writer = writers.get(index)
+            if writer is None:
+                writer = writers[index] = SegmentWriter(session, index, codec)
+            writer.write(t_ns, jpeg)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Codificador de video de las grabaciones (lo lanza la GUI)")
+    parser.add_argument("session")
+    parser.add_argument("--codec", choices=("mjpg", "h264"), default=RECORD_CODEC)
+    args = parser.parse_args()
+    encode(args.session, args.codec)
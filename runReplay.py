@@ -0,0 +1,31 @@
+"""Reproducción activa en este proceso, sin cargar los dispositivos si no hay ninguna.
+
+La GUI instala un ReplayEngine (replayDevices) con `install_replay`; los
+procesos hijos (detectores) reciben la sesión y el reloj por la variable
+REPLAY_ENV y reproducen la misma corrida sincronizados con la GUI. Quien
+abre un dispositivo consulta `current_replay()`: sin reproducción solo cuesta
+leer una variable de entorno, así cv2 no entra en el arranque de main.
+"""
+import os
+
+REPLAY_ENV = "RRL_REPLAY"  # Variable con la sesión y el reloj para los procesos hijos
+
+_current = None
+_current_loaded = False
+
+
+def install_replay(engine):
+    """Hace de `engine` la fuente de todos los dispositivos de este proceso."""
+    global _current, _current_loaded
+    _current, _current_loaded = engine, True
+
+
+def current_replay():
+    """Motor de reproducción activo en este proceso (el instalado o el de REPLAY_ENV), o None."""
+    global _current, _current_loaded
+    if not _current_loaded:
+        _current_loaded = True
+        if os.environ.get(REPLAY_ENV):
+            from replayDevices import ReplayEngine
+            _current = ReplayEngine.from_env()
+    return _current
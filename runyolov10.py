@@ -1,46 +1,74 @@
 import cv2
+import numpy as np
 import supervision as sv
 from ultralytics import YOLOv10
 import os
 import math
 
-# Carga el modelo previamente entrenado
-model = YOLOv10('NixitoS.pt')
+from cameraCapture import CameraCapture, DETECTOR_CAPTURE_SIZE
+from processSupervisor import heartbeat
 
-# Inicializa los anotadores para las cajas de detección y las etiquetas
-boundingBoxAnnotator = sv.BoundingBoxAnnotator()
-labelAnnotator = sv.LabelAnnotator()
+MODEL_PATH = 'NixitoS.pt'
+WINDOW_NAME = 'WebCam'
 
-# Abre la webcam
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    print('No se pudo abrir la cámara')
-    exit()
 
-img_counter = 0
+class YoloDetector:
+    """Detector YOLOv10 con el modelo entrenado del equipo y sus anotadores."""
 
-while True:
-    ret, frame = cap.read()
+    window_name = WINDOW_NAME
 
-    if not ret:
-        break
+    def __init__(self, model_path=MODEL_PATH):
+        # Carga el modelo previamente entrenado
+        self.model = YOLOv10(model_path)
 
-    # Realiza las detecciones usando el modelo
-    results = model(frame)[0]
-    detections = sv.Detections.from_ultralytics(results)
+        # Inicializa los anotadores para las cajas de detección y las etiquetas
+        self.bounding_box_annotator = sv.BoundingBoxAnnotator()
+        self.label_annotator = sv.LabelAnnotator()
 
-    # Anota las imágenes con las cajas y las etiquetas
-    annotatedImage = boundingBoxAnnotator.annotate(scene=frame, detections=detections)
-    annotatedImage = labelAnnotator.annotate(scene=annotatedImage, detections=detections)
+        # Una inferencia en vacío para que la primera detección real no pague la inicialización
+        self.model(np.zeros((480, 640, 3), dtype=np.uint8), verbose=False)
 
-    # Muestra la imagen anotada
-    cv2.imshow('WebCam', annotatedImage)
+    def reset(self):
+        pass
 
-    # Sale del loop si se presiona la tecla ESC
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        print('Cerrando...')
-        break
+    def process(self, frame):
+        # Realiza las detecciones usando el modelo
+        results = self.model(frame)[0]
+        detections = sv.Detections.from_ultralytics(results)
 
-# Libera la cámara y cierra las ventanas de OpenCV
-cap.release()
-cv2.destroyAllWindows()
+        # Anota las imágenes con las cajas y las etiquetas
+        annotated_image = self.bounding_box_annotator.annotate(scene=frame, detections=detections)
+        return self.label_annotator.annotate(scene=annotated_image, detections=detections)
+
+
+def main():
+    detector = YoloDetector()
+
+    # Abre la webcam
+    cap = CameraCapture(0, *DETECTOR_CAPTURE_SIZE)
+    if not cap.open():
+        print('No se pudo abrir la cámara')
+        exit()
+
+    while True:
+        heartbeat()
+        ret, frame = cap.read()
+
+        if not ret:
+            break
+
+        # Muestra la imagen anotada
+        cv2.imshow(WINDOW_NAME, detector.process(frame))
+
+        # Sale del loop si se presiona la tecla ESC
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            print('Cerrando...')
+            break
+
+    # Libera la cámara y cierra las ventanas de OpenCV
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+# Niveles de agregación (segundos por cubeta) y cuántas cubetas guarda cada uno
+ROLLUP_PERIODS = (1.0, 10.0, 60.0)
+ROLLUP_CAPACITY = (3600, 2160, 1440)  # 1 h a 1 s, 6 h a 10 s, 24 h a 60 s
+RAW_CAPACITY = 4096  # Muestras crudas por canal
+
+
+class RingBuffer:
+    """Buffer circular preasignado de columnas float64 con índice de escritura."""
+
+    def __init__(self, capacity, columns):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, columns), dtype=np.float64)
+        self.write_index = 0
+        self.count = 0
+
+    def append(self, row):
+        self.data[self.write_index] = row
+        self.write_index = (self.write_index + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self, n):
+        """Devuelve las últimas n filas en orden cronológico (copia)."""
+        n = min(n, self.count)
+        if n <= 0:
+            return self.data[:0].copy()
+        start = (self.write_index - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.data[start:start + n].copy()
+        return np.concatenate((self.data[start:], self.data[:self.write_index]))
+
+    def latest(self):
+        if self.count == 0:
+            return None
+        return self.data[(self.write_index - 1) % self.capacity]
+
+
+class Rollup:
+    """Agregado min/max/media de un canal para un periodo fijo de cubeta."""
+
+    # Columnas: inicio de cubeta, mínimo, máximo, media, número de muestras
+    COLUMNS = 5
+
+    def __init__(self, period, capacity):
+        self.period = period
+        self.buffer = RingBuffer(capacity, self.COLUMNS)
+        self.bucket_start = None
+        self.bucket_min = math.inf
+        self.bucket_max = -math.inf
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+
+    def add(self, t, value):
+        bucket_start = math.floor(t / self.period) * self.period
+        if self.bucket_start is not None and bucket_start != self.bucket_start:
+            self._flush()
+        if self.bucket_count == 0:
+            self.bucket_start = bucket_start
+        self.bucket_min = min(self.bucket_min, value)
+        self.bucket_max = max(self.bucket_max, value)
+        self.bucket_sum += value
+        self.bucket_count += 1
+
+    def _flush(self):
+        if self.bucket_count:
+            self.buffer.append((self.bucket_start, self.bucket_min, self.bucket_max,
+                                self.bucket_sum / self.bucket_count, self.bucket_count))
+        self.bucket_start = None
+        self.bucket_min = math.inf
+        self.bucket_max = -math.inf
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+
+    def last(self, seconds, now):
+        """Cubetas que empiezan dentro de los últimos `seconds` antes de `now`, incluida la cubeta en curso.
+
+        Se filtra por tiempo, no por cantidad: si el sensor dejó de reportar,
+        las cubetas viejas quedan fuera de la ventana.
+        """
+        n = int(math.ceil(seconds / self.period)) + 1
+        buckets = self.buffer.last(n)
+        if self.bucket_count:
+            current = np.array([[self.bucket_start, self.bucket_min, self.bucket_max,
+                                 self.bucket_sum / self.bucket_count, self.bucket_count]])
+            buckets = np.concatenate((buckets, current))
+        return buckets[buckets[:, 0] >= now - seconds]
+
+
+class SensorChannel:
+    """Historial de un canal: muestras crudas más agregados multirresolución."""
+
+    def __init__(self, name, raw_capacity=RAW_CAPACITY):
+        self.name = name
+        self.raw = RingBuffer(raw_capacity, 2)  # (tiempo, valor)
+        self.rollups = [Rollup(period, capacity) for period, capacity in zip(ROLLUP_PERIODS, ROLLUP_CAPACITY)]
+
+    def add(self, value, t):
+        self.raw.append((t, value))
+        for rollup in self.rollups:
+            rollup.add(t, value)
+
+    def rollup_for_width(self, seconds, width_px):
+        """Elige el nivel más fino cuya cantidad de cubetas en la ventana cabe en `width_px`."""
+        for rollup in self.rollups:
+            if seconds / rollup.period <= width_px:
+                return rollup
+        return self.rollups[-1]
+
+
+class SensorHistory:
+    """Almacén en memoria de series de tiempo para los sensores del ESP32.
+
+    El lector serial alimenta los canales con `add`; la GUI consulta ventanas
+    de tiempo con `last` o pide series ya reducidas con `sparkline`.
+    """
+
+    def __init__(self):
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, value, t=None):
+        if t is None:
+            t = time.monotonic()
+        with self.lock:
+            channel = self.channels.get(name)
+            if channel is None:
+                channel = self.channels[name] = SensorChannel(name)
+            channel.add(float(value), t)
+
+    def latest(self, name):
+        with self.lock:
+            channel = self.channels.get(name)
+            row = channel.raw.latest() if channel else None
+            return None if row is None else row[1]
+
+    def last(self, name, seconds, level=0, now=None):
+        """Cubetas (inicio, min, max, media, n) de los últimos `seconds` en el nivel pedido."""
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            channel = self.channels.get(name)
+            if channel is None:
+                return np.zeros((0, Rollup.COLUMNS))
+            return channel.rollups[level].last(seconds, now)
+
+    def sparkline(self, name, seconds, width_px, now=None):
+        """Serie min/max/media de la ventana, tomada del nivel adecuado al ancho en píxeles."""
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            channel = self.channels.get(name)
+            if channel is None:
+                return np.zeros((0, Rollup.COLUMNS))
+            return channel.rollup_for_width(seconds, width_px).last(seconds, now)
+
+
+def draw_sparkline(canvas, items, buckets, now, seconds, width, height, color):
+    """Actualiza la línea (media) y la envolvente (min/max) de un sparkline en un canvas.
+
+    `items` es la tupla (envolvente, línea) creada una sola vez por `create_sparkline`.
+    Cada cubeta se ubica por su tiempo dentro de la ventana que termina en `now`:
+    los huecos sin datos ocupan su ancho y la serie avanza aunque no cambie.
+    """
+    envelope_item, line_item = items
+    if len(buckets) < 2:
+        canvas.coords(envelope_item, 0, 0, 0, 0)
+        canvas.coords(line_item, 0, 0, 0, 0)
+        return
+
+    mins, maxs, means = buckets[:, 1], buckets[:, 2], buckets[:, 3]
+    low, high = float(mins.min()), float(maxs.max())
+    span = high - low if high > low else 1.0
+    xs = np.clip((buckets[:, 0] - (now - seconds)) / seconds * width, 1, width - 1)
+
+    def to_y(values):
+        return height - 2 - (values - low) / span * (height - 4)
+
+    line_coords = np.column_stack((xs, to_y(means))).ravel().tolist()
+    envelope_coords = np.concatenate((np.column_stack((xs, to_y(maxs))),
+                                      np.column_stack((xs[::-1], to_y(mins[::-1]))))).ravel().tolist()
+    canvas.coords(envelope_item, *envelope_coords)
+    canvas.coords(line_item, *line_coords)
+    canvas.itemconfigure(line_item, fill=color)
+
+
+def create_sparkline(canvas, color, envelope_color="#2a4a2a"):
+    """Crea los items del sparkline una sola vez; después solo se actualizan sus coordenadas."""
+    envelope_item = canvas.create_polygon(0, 0, 0, 0, fill=envelope_color, outline="")
+    line_item = canvas.create_line(0, 0, 0, 0, fill=color, width=1)
+    return envelope_item, line_item
@@ -0,0 +1,123 @@
+"""Cuadros de las cámaras de la GUI compartidos con los procesos de detectores.
+
+Cada cámara abierta por la GUI publica el JPEG de su último cuadro en un
+bloque de memoria compartida ("rrl_camara<índice>"). Un detector que quiere
+esa cámara la lee de ahí en vez de abrir el dispositivo por su cuenta: no
+compite con la GUI por /dev/video y decodifica a resolución completa el mismo
+cuadro comprimido que la vista decodifica reducido.
+
+Cabecera del bloque: secuencia (impar mientras se escribe), t_ns del cuadro,
+largo del JPEG, ancho y alto; después, "pedido hasta" (time.monotonic_ns, igual
+en todos los procesos) que renuevan los lectores: mientras esté vigente la
+cámara retira cada cuadro aunque sea una miniatura.
+"""
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+SHARED_FRAME_BYTES: int = 4 * 2 ** 20  # espacio para el JPEG (un cuadro MJPG 1280x720 ronda 100-300 KB)
+SHARED_FRAME_TIMEOUT: float = 1.0  # segundos sin cuadro nuevo para dar la cámara compartida por perdida
+SHARED_FRAME_POLL: float = 0.002  # segundos entre consultas del lector
+SHARED_FRAME_LEASE: float = 1.0  # segundos que dura el pedido de cada lectura
+SHARED_FRAME_HEADER = struct.Struct("<qqIII")  # secuencia, t_ns, largo, ancho, alto (los escribe la GUI)
+SHARED_FRAME_WANTED = struct.Struct("<q")  # pedido hasta (ns), lo renuevan los lectores
+WANTED_OFFSET = SHARED_FRAME_HEADER.size
+DATA_OFFSET = WANTED_OFFSET + SHARED_FRAME_WANTED.size
+
+
+def shared_name(index):
+    return f"rrl_camara{index}"
+
+
+class SharedFrameWriter:
+    """Lado de la GUI: lo crea cada ManagedCamera y publica cada cuadro retirado."""
+
+    def __init__(self, index):
+        try:
+            self.shm = shared_memory.SharedMemory(shared_name(index), create=True,
+                                                  size=DATA_OFFSET + SHARED_FRAME_BYTES)
+        except FileExistsError:
+            # Bloque de una GUI anterior que no terminó bien: reemplazarlo
+            stale = shared_memory.SharedMemory(shared_name(index))
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(shared_name(index), create=True,
+                                                  size=DATA_OFFSET + SHARED_FRAME_BYTES)
+        self.sequence = 0
+        self.shm.buf[:DATA_OFFSET] = bytes(DATA_OFFSET)
+
+    def wanted(self, now_ns):
+        """True si algún detector leyó hace poco: entonces conviene retirar cada cuadro."""
+        return SHARED_FRAME_WANTED.unpack_from(self.shm.buf, WANTED_OFFSET)[0] > now_ns
+
+    def publish(self, jpeg, width, height, t_ns):
+        data = memoryview(jpeg).cast("B")
+        if len(data) > SHARED_FRAME_BYTES:
+            return
+        buf = self.shm.buf
+        self.sequence += 1  # Impar: los lectores descartan lo que copien ahora
+        struct.pack_into("<q", buf, 0, self.sequence)
+        buf[DATA_OFFSET:DATA_OFFSET + len(data)] = data
+        self.sequence += 1
+        SHARED_FRAME_HEADER.pack_into(buf, 0, self.sequence, t_ns, len(data), width, height)
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedFrameReader:
+    """Lado del detector, con la interfaz de CameraCapture que usa el trabajador (open/read_frame/release)."""
+
+    def __init__(self, index):
+        self.index = index
+        self.shm = None
+        self.sequence = 0
+
+    def open(self):
+        """True si la GUI tiene esta cámara abierta y está publicando cuadros."""
+        try:
+            self.shm = shared_memory.SharedMemory(shared_name(self.index))
+        except FileNotFoundError:
+            return False
+        # El bloque es de la GUI: que el rastreador de este proceso no lo borre al salir
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        # Solo cuenta un cuadro publicado después de abrir: el que ya está puede ser de una GUI que murió
+        self.sequence = SHARED_FRAME_HEADER.unpack_from(self.shm.buf, 0)[0]
+        if self.wait_frame() is None:  # Bloque abandonado o cámara sin cuadros
+            self.release()
+            return False
+        return True
+
+    def wait_frame(self):
+        deadline = time.monotonic() + SHARED_FRAME_TIMEOUT
+        buf = self.shm.buf
+        while time.monotonic() < deadline:
+            SHARED_FRAME_WANTED.pack_into(buf, WANTED_OFFSET, time.monotonic_ns() + int(SHARED_FRAME_LEASE * 1e9))
+            sequence, t_ns, length, width, height = SHARED_FRAME_HEADER.unpack_from(buf, 0)
+            if sequence % 2 == 0 and sequence > self.sequence:
+                jpeg = np.frombuffer(bytes(buf[DATA_OFFSET:DATA_OFFSET + length]), dtype=np.uint8)
+                if struct.unpack_from("<q", buf, 0)[0] == sequence:  # Nadie escribió mientras se copiaba
+                    self.sequence = sequence
+                    return jpeg, width, height
+            time.sleep(SHARED_FRAME_POLL)
+        return None
+
+    def read_frame(self):
+        """El siguiente cuadro publicado como CameraFrame (JPEG a decodificar), o None si dejó de llegar."""
+        from cameraCapture import CameraFrame
+        shared = self.wait_frame()
+        if shared is None:
+            return None
+        jpeg, width, height = shared
+        return CameraFrame(jpeg=jpeg, size=(width, height))
+
+    def release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
@@ -8,67 +8,69 @@ import time
 import numpy as np
 import yaml
 import math
-import rospy
-from visualization_msgs.msg import Marker
-from geometry_msgs.msg import Point, PointStamped
-import tf2_ros
-import tf2_geometry_msgs
+from rplidar import RPLidar, RPLidarException
 
-# -------------------- ROS COMMANDS AND CONTROL --------------------
+from slamEngine import SlamThread
+from markerLayer import MarkerLayer, MarkerStore, MapImageCache
 
-# Lista para almacenar los procesos lanzados (terminales)
-procesos = []
+# ROS solo se usa para recibir los markers de hazmat; el SLAM corre en este proceso
+try:
+    import rospy
+    from visualization_msgs.msg import Marker
+except ImportError:
+    rospy = None
 
+# -------------------- SLAM EN PROCESO --------------------
 
-def minimizar_terminal(title):
-    try:
-        out = subprocess.check_output(["xdotool", "search", "--name", title]).decode().strip()
-        if out:
-            window_id = out.split()[0]
-            subprocess.run(["xdotool", "windowminimize", window_id])
-            print(f"Terminal con título '{title}' minimizada.")
-    except Exception as e:
-        print(f"Error al minimizar terminal '{title}': {e}")
+LIDAR_PORT = '/dev/ttyUSB0'
+LIDAR_BAUD_RATE = 256000
+LIDAR_TIMEOUT = 0.05
+LIDAR_SCAN_BUFFER = 25000
+MAP_BASE_PATH = os.path.expanduser("~/catkin_ws/mapa_guardado")
 
+slam = SlamThread()
+lidar = None
+lidar_activo = threading.Event()
 
-def ejecutar_en_nueva_terminal(comando, title):
-    full_command = f'echo -ne "\033]0;{title}\007"; {comando}; exec bash'
-    print(f"Ejecutando en nueva terminal: {full_command} con título '{title}'")
-    proceso = subprocess.Popen(
-        ['gnome-terminal', '--', 'bash', '-c', full_command],
-        preexec_fn=os.setsid
-    )
-    procesos.append(proceso)
-    time.sleep(2)
-    minimizar_terminal(title)
 
-
-def cerrar_procesos_ros():
-    print("Cerrando procesos ROS...")
-    subprocess.run("pkill -f '/home/nix/catkin_ws/src/rplidar_ros/launch/rplidar_a2m12.launch'", shell=True)
-    subprocess.run("pkill -f '/home/nix/catkin_ws/src/hector_slam/hector_slam_launch/launch/tutorial.launch'",
-                   shell=True)
-    print("Procesos ROS cerrados.")
+def leer_escaneos():
+    """Lee escaneos del RPLidar y los entrega al motor SLAM (siempre el más reciente)."""
+    try:
+        for scan in lidar.iter_scans(max_buf_meas=LIDAR_SCAN_BUFFER, min_len=3):
+            if not lidar_activo.is_set():
+                break
+            scan = np.asarray(scan, dtype=np.float32)
+            slam.submit(np.radians(scan[:, 1]), scan[:, 2])
+    except RPLidarException as e:
+        print(f"Error leyendo el LIDAR: {e}")
+
+
+def detener_slam():
+    print("Deteniendo SLAM...")
+    lidar_activo.clear()
+    slam.stop()
+    if lidar:
+        try:
+            lidar.stop()
+            lidar.stop_motor()
+            lidar.disconnect()
+        except Exception as e:
+            print(f"Error al apagar el LIDAR: {e}")
+    print("SLAM detenido.")
 
 
 def ejecutar_comandos():
+    global lidar
     print("Ejecutando comando 1: sudo chmod 666 /dev/ttyUSB0")
     contrasena = "nix123"  # Evita dejar contraseñas en claro en producción
-    subprocess.run(f'echo {contrasena} | sudo -S chmod 666 /dev/ttyUSB0', shell=True)
+    subprocess.run(f'echo {contrasena} | sudo -S chmod 666 {LIDAR_PORT}', shell=True)
 
-    print("Ejecutando comando 2: cd ~/catkin_ws/")
-    os.chdir(os.path.expanduser("~/catkin_ws"))
-
-    print("Ejecutando comando 3: roslaunch rplidar_ros rplidar_a2m12.launch")
-    ejecutar_en_nueva_terminal("roslaunch /home/nix/catkin_ws/src/rplidar_ros/launch/rplidar_a2m12.launch",
-                               "Terminal_RPLidar")
-
-    time.sleep(5)
-
-    print("Ejecutando comando 4: roslaunch hector_slam_launch tutorial.launch")
-    ejecutar_en_nueva_terminal(
-        "roslaunch /home/nix/catkin_ws/src/hector_slam/hector_slam_launch/launch/tutorial.launch",
-        "Terminal_HectorSLAM")
+    print("Iniciando LIDAR y SLAM en proceso")
+    lidar = RPLidar(port=LIDAR_PORT, baudrate=LIDAR_BAUD_RATE, timeout=LIDAR_TIMEOUT)
+    lidar.start_motor()
+    slam.start()
+    lidar_activo.set()
+    leer_escaneos()
 
 
 def iniciar_comandos_en_hilo():
@@ -81,70 +83,63 @@ def iniciar_comandos_en_hilo():
 
 # -------------------- Marker Subscriber and Overlay --------------------
 
-# Global para almacenar los markers recibidos
-# Estructura: clave = marker id, valor = dict con { 'x', 'y', 'color', 'text' }
-global_markers = {}
+def actualizar_capa(marker_id, data):
+    if data is None:
+        marker_layer.remove_marker(marker_id)
+    else:
+        marker_layer.set_marker(marker_id, data['x'], data['y'], data['color'], data['text'])
+
+
+# Markers recibidos: detecciones cercanas de la misma señal se fusionan, con tope de tamaño.
+# El callback de ROS escribe; la capa y la exportación leen instantáneas sin bloquearlo.
+marker_store = MarkerStore(on_change=actualizar_capa)
+
+# Capa de markers en vivo (misma geometría que el mapa del SLAM) y mapa base en caché
+marker_layer = MarkerLayer.from_grid(slam.engine.grid)
+map_cache = MapImageCache()
 
 
 def marker_callback(msg):
-    global global_markers
     if msg.ns == "hazmat":
-        global_markers[msg.id] = {
-            'x': msg.pose.position.x,
-            'y': msg.pose.position.y,
-            'color': (msg.color.r, msg.color.g, msg.color.b),
-            'text': global_markers.get(msg.id, {}).get('text', "")
-        }
+        marker_store.update(msg.id, x=msg.pose.position.x, y=msg.pose.position.y,
+                            color=(msg.color.r, msg.color.g, msg.color.b))
     elif msg.ns == "hazmat_text":
-        if msg.id in global_markers:
-            global_markers[msg.id]['text'] = msg.text
-        else:
-            global_markers[msg.id] = {
-                'x': msg.pose.position.x,
-                'y': msg.pose.position.y,
-                'color': (1.0, 1.0, 1.0),
-                'text': msg.text
-            }
+        marker_store.update_text(msg.id, msg.text, msg.pose.position.x, msg.pose.position.y)
 
 
 def overlay_markers_on_map(yaml_path, image_path, output_path):
-    # Cargar información del mapa (.yaml) para obtener resolución y origen
-    with open(yaml_path, 'r') as f:
-        map_info = yaml.safe_load(f)
-    resolution = map_info["resolution"]
-    origin = map_info["origin"]  # [origin_x, origin_y, theta]
-
-    # Cargar la imagen del mapa (.pgm)
-    img = cv2.imread(image_path)
+    global marker_layer
+    # Cargar información del mapa (.yaml) y la imagen (.pgm) solo si cambiaron en disco
+    map_info, img, map_key = map_cache.load(yaml_path, image_path)
     if img is None:
         print("Error al cargar la imagen del mapa.")
         return
+    resolution = map_info["resolution"]
+    origin = map_info["origin"]  # [origin_x, origin_y, theta]
     height, width, _ = img.shape
 
-    # Para cada marker, calcular posición en píxeles y dibujar
-    for marker_id, data in global_markers.items():
-        marker_x = data['x']
-        marker_y = data['y']
-        pixel_x = int((marker_x - origin[0]) / resolution)
-        pixel_y = int(height - ((marker_y - origin[1]) / resolution))
-        color = data['color']
-        color_bgr = (int(color[2] * 255), int(color[1] * 255), int(color[0] * 255))
-        cv2.circle(img, (pixel_x, pixel_y), 5, color_bgr, -1)
-        if data['text']:
-            cv2.putText(img, data['text'], (pixel_x + 5, pixel_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color_bgr, 1)
-
-    cv2.imwrite(output_path, img)
+    # Si el mapa tiene otra geometría, la capa se reconstruye con todos los markers
+    if not marker_layer.matches(resolution, origin[:2], width, height):
+        marker_layer = MarkerLayer(resolution, origin[:2], width, height)
+        for marker_id, data in marker_store.snapshot().items():
+            marker_layer.set_marker(marker_id, data['x'], data['y'], data['color'], data['text'])
+
+    # Solo se rasterizan los markers nuevos o cambiados; la composición se reutiliza
+    marker_layer.export_jpg(output_path, img, map_key)
     print(f"Mapa con markers guardado en: {output_path}")
 
 
 # -------------------- Ventana de Control --------------------
 
 def ventana_control():
-    # Inicializar el nodo ROS si no lo está
-    if not rospy.core.is_initialized():
-        rospy.init_node('control_node', anonymous=True)
-    # Suscribirse al tópico de markers
-    rospy.Subscriber('/hazmat_marker', Marker, marker_callback)
+    if rospy is not None:
+        # Inicializar el nodo ROS si no lo está
+        if not rospy.core.is_initialized():
+            rospy.init_node('control_node', anonymous=True)
+        # Suscribirse al tópico de markers
+        rospy.Subscriber('/hazmat_marker', Marker, marker_callback)
+    else:
+        print("rospy no disponible: el mapa se guardará sin markers de hazmat.")
 
     cv2.namedWindow("Control Hector SLAM")
     img = np.zeros((300, 500, 3), dtype="uint8")
@@ -156,20 +151,18 @@ def ventana_control():
         key = cv2.waitKey(1) & 0xFF
 
         if key == ord('q') or key == 27:  # 'q' o Esc para salir
-            cerrar_procesos_ros()
+            detener_slam()
             os._exit(0)
         elif key == ord('m'):
             print("Guardando el mapeo...")
-            # Guardar el mapa usando map_saver
-            subprocess.run("rosrun map_server map_saver -f ~/catkin_ws/mapa_guardado", shell=True)
+            # Guardar el mapa directamente desde el motor SLAM (formato map_server)
+            with slam.lock:
+                yaml_path, pgm_path = slam.engine.save_map(MAP_BASE_PATH)
             print("Mapeo guardado. Ahora se sobrepone la detección de señales en el mapa.")
-            time.sleep(2)  # Esperar a que se guarden los archivos
             mapa_jpg = os.path.expanduser("~/catkin_ws/mapa_guardado_con_señales.jpg")
-            overlay_markers_on_map(os.path.expanduser("~/catkin_ws/mapa_guardado.yaml"),
-                                   os.path.expanduser("~/catkin_ws/mapa_guardado.pgm"),
-                                   mapa_jpg)
+            overlay_markers_on_map(yaml_path, pgm_path, mapa_jpg)
             subprocess.run("xdg-open " + mapa_jpg, shell=True)
-            cerrar_procesos_ros()
+            detener_slam()
             os._exit(0)
 
     cv2.destroyAllWindows()
@@ -178,7 +171,7 @@ def ventana_control():
 # -------------------- Función Principal --------------------
 
 if __name__ == "__main__":
-    # Ejecutar los comandos ROS en un hilo separado
+    # Iniciar LIDAR y SLAM en un hilo separado
     hilo_comandos = threading.Thread(target=iniciar_comandos_en_hilo, daemon=True)
     hilo_comandos.start()
 
@@ -0,0 +1,350 @@
+import argparse
+import math
+import threading
+import time
+
+import numpy as np
+
+from instrumentation import measure
+
+# Parámetros equivalentes a los de hector_mapping (tutorial.launch)
+MAP_SIZE: int = 2048  # celdas por lado en el nivel más fino
+MAP_RESOLUTION: float = 0.05  # metros por celda
+MAP_LEVELS: int = 3  # niveles de la pirámide de mapas (cada uno a la mitad de resolución)
+MAP_UPDATE_DISTANCE: float = 0.4  # metros recorridos para volver a integrar el escaneo
+MAP_UPDATE_ANGLE: float = 0.06  # radianes girados para volver a integrar el escaneo
+LASER_MIN_DIST: float = 0.02  # metros
+LASER_MAX_DIST: float = 5.0  # metros
+
+# Actualizaciones de log-odds (probabilidades 0.9 ocupado / 0.4 libre, como hector)
+LOG_ODDS_OCCUPIED: float = math.log(0.9 / 0.1)
+LOG_ODDS_FREE: float = math.log(0.4 / 0.6)
+LOG_ODDS_LIMIT: float = 10.0
+
+MAP_TILE_SIZE: int = 128  # celdas por lado de cada tile para el seguimiento de cambios
+
+MATCH_ITERATIONS = (5, 3, 3)  # iteraciones de Gauss-Newton por nivel (fino -> grueso)
+
+
+class OccupancyGrid:
+    """Mapa de ocupación 2D con log-odds y consultas bilineales con gradiente.
+
+    La celda (fila, columna) cubre [origin + col * res, origin + (col + 1) * res)
+    en x, e igual para filas en y.
+    """
+
+    def __init__(self, size, resolution, origin=None):
+        self.size = size
+        self.resolution = resolution
+        if origin is None:
+            origin = (-size * resolution / 2, -size * resolution / 2)
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.log_odds = np.zeros((size, size), dtype=np.float32)
+        # Memoria auxiliar para deduplicar celdas por escaneo sin ordenar
+        self.stamp = np.zeros(size * size, dtype=np.int32)
+        # Tiles modificados desde la última vez que la vista del mapa los consumió
+        tiles = -(-size // MAP_TILE_SIZE)
+        self.dirty_tiles = np.zeros((tiles, tiles), dtype=bool)
+
+    def world_to_map(self, wx, wy):
+        """Coordenadas continuas de mapa (en celdas) de puntos del mundo."""
+        return (wx - self.origin[0]) / self.resolution, (wy - self.origin[1]) / self.resolution
+
+    def interpolate(self, wx, wy):
+        """Probabilidad de ocupación interpolada y su gradiente (por metro) en puntos del mundo.
+
+        Returns:
+            tuple: (valor, d/dx, d/dy, válidos); los puntos fuera del mapa valen 0.
+        """
+        mx, my = self.world_to_map(wx, wy)
+        # Los valores viven en el centro de cada celda
+        u = mx - 0.5
+        v = my - 0.5
+        x0 = np.floor(u).astype(np.int64)
+        y0 = np.floor(v).astype(np.int64)
+        fx = u - x0
+        fy = v - y0
+        valid = (x0 >= 0) & (y0 >= 0) & (x0 < self.size - 1) & (y0 < self.size - 1)
+        x0 = np.where(valid, x0, 0)
+        y0 = np.where(valid, y0, 0)
+
+        # Solo se convierten a probabilidad las 4 celdas vecinas de cada punto
+        corners = self.log_odds[np.stack((y0, y0, y0 + 1, y0 + 1)), np.stack((x0, x0 + 1, x0, x0 + 1))]
+        p00, p10, p01, p11 = 1.0 - 1.0 / (1.0 + np.exp(corners))
+
+        value = (1 - fy) * ((1 - fx) * p00 + fx * p10) + fy * ((1 - fx) * p01 + fx * p11)
+        d_dx = ((1 - fy) * (p10 - p00) + fy * (p11 - p01)) / self.resolution
+        d_dy = ((1 - fx) * (p01 - p00) + fx * (p11 - p10)) / self.resolution
+        value[~valid] = 0.0
+        d_dx[~valid] = 0.0
+        d_dy[~valid] = 0.0
+        return value, d_dx, d_dy, valid
+
+    def integrate_scan(self, origin_xy, wx, wy):
+        """Integra un escaneo completo de una sola vez.
+
+        Todos los rayos se recorren en lote (DDA vectorizado: un paso de celda
+        sobre el eje dominante de cada rayo) y cada celda recibe como mucho una
+        actualización por escaneo: ocupado si es impacto, libre si solo fue
+        atravesada. Las actualizaciones de log-odds se aplican con np.add.at.
+        """
+        ox, oy = self.world_to_map(origin_xy[0], origin_xy[1])
+        ex, ey = self.world_to_map(np.asarray(wx, dtype=np.float64), np.asarray(wy, dtype=np.float64))
+        if ex.size == 0:
+            return
+
+        # Pasos por rayo y posición de cada muestra dentro de su rayo
+        dx = ex - ox
+        dy = ey - oy
+        steps = np.ceil(np.maximum(np.abs(dx), np.abs(dy))).astype(np.int64)
+        steps = np.maximum(steps, 1)
+        ray = np.repeat(np.arange(steps.size), steps)
+        first = np.cumsum(steps) - steps
+        t = (np.arange(ray.size) - first[ray]) / steps[ray]  # en [0, 1): excluye el impacto
+        free_cols = np.floor(ox + t * dx[ray]).astype(np.int64)
+        free_rows = np.floor(oy + t * dy[ray]).astype(np.int64)
+
+        free = self.linear_indices(free_rows, free_cols)
+        hits = self.linear_indices(np.floor(ey).astype(np.int64), np.floor(ex).astype(np.int64))
+
+        # Deduplicación O(n) sin ordenar: cada celda se queda con su última aparición.
+        # Los impactos van al final para que una celda impactada no cuente como libre.
+        cells = np.concatenate((free, hits))
+        order = np.arange(cells.size, dtype=np.int32)
+        self.stamp[cells] = order
+        keep = self.stamp[cells] == order
+        cells = cells[keep]
+        updates = np.where(order[keep] >= free.size, LOG_ODDS_OCCUPIED, LOG_ODDS_FREE).astype(np.float32)
+
+        flat = self.log_odds.reshape(-1)
+        np.add.at(flat, cells, updates)
+        flat[cells] = np.clip(flat[cells], -LOG_ODDS_LIMIT, LOG_ODDS_LIMIT)
+
+        rows, cols = np.divmod(cells, self.size)
+        self.dirty_tiles[rows // MAP_TILE_SIZE, cols // MAP_TILE_SIZE] = True
+
+    def linear_indices(self, rows, cols):
+        """Índices lineales de las celdas dentro del mapa (las de fuera se descartan)."""
+        inside = (rows >= 0) & (cols >= 0) & (rows < self.size) & (cols < self.size)
+        return rows[inside] * self.size + cols[inside]
+
+
+def scan_to_points(angles, distances):
+    """Convierte un escaneo del RPLidar (radianes horarios, mm) a puntos (m) en el marco del sensor."""
+    distances = np.asarray(distances, dtype=np.float64) / 1000.0
+    angles = np.asarray(angles, dtype=np.float64)
+    keep = (distances > LASER_MIN_DIST) & (distances < LASER_MAX_DIST)
+    distances = distances[keep]
+    angles = angles[keep]
+    # El RPLidar mide en sentido horario; el marco del robot es antihorario (x al frente)
+    return np.column_stack((distances * np.cos(angles), -distances * np.sin(angles)))
+
+
+def transform_points(pose, points):
+    c, s = math.cos(pose[2]), math.sin(pose[2])
+    wx = c * points[:, 0] - s * points[:, 1] + pose[0]
+    wy = s * points[:, 0] + c * points[:, 1] + pose[1]
+    return wx, wy
+
+
+class SlamEngine:
+    """SLAM 2D por correlación de escaneos al estilo hector_slam, en el mismo proceso.
+
+    Mantiene una pirámide de mapas de ocupación; cada escaneo se alinea por
+    Gauss-Newton del nivel más grueso al más fino y solo se integra en los
+    mapas cuando el robot se movió más que los umbrales de actualización.
+    """
+
+    def __init__(self, size=MAP_SIZE, resolution=MAP_RESOLUTION, levels=MAP_LEVELS):
+        self.grids = [OccupancyGrid(size >> k, resolution * (1 << k)) for k in range(levels)]
+        self.pose = np.zeros(3)
+        self.last_update_pose = None
+        self.scan_count = 0
+
+    @property
+    def grid(self):
+        return self.grids[0]
+
+    def match(self, points, pose):
+        pose = np.array(pose, dtype=np.float64)
+        for level in reversed(range(len(self.grids))):
+            grid = self.grids[level]
+            for _ in range(MATCH_ITERATIONS[min(level, len(MATCH_ITERATIONS) - 1)]):
+                c, s = math.cos(pose[2]), math.sin(pose[2])
+                wx, wy = transform_points(pose, points)
+                value, d_dx, d_dy, valid = grid.interpolate(wx, wy)
+                if not valid.any():
+                    return pose
+
+                residual = 1.0 - value[valid]
+                jacobian = np.column_stack((
+                    d_dx[valid],
+                    d_dy[valid],
+                    d_dx[valid] * (-s * points[valid, 0] - c * points[valid, 1])
+                    + d_dy[valid] * (c * points[valid, 0] - s * points[valid, 1]),
+                ))
+                hessian = jacobian.T @ jacobian
+                if abs(np.linalg.det(hessian)) < 1e-9:
+                    break
+                delta = np.linalg.solve(hessian, jacobian.T @ residual)
+                # Paso angular acotado como en hector para evitar saltos
+                delta[2] = max(-0.2, min(0.2, delta[2]))
+                pose += delta
+        return pose
+
+    def process_scan(self, angles, distances):
+        """Procesa un escaneo del RPLidar y devuelve la pose estimada (x, y, theta)."""
+        points = scan_to_points(angles, distances)
+        if len(points) < 10:
+            return self.pose
+
+        if self.scan_count > 0:
+            self.pose = self.match(points, self.pose)
+        self.scan_count += 1
+
+        if self.needs_map_update():
+            wx, wy = transform_points(self.pose, points)
+            for grid in self.grids:
+                grid.integrate_scan(self.pose[:2], wx, wy)
+            self.last_update_pose = self.pose.copy()
+        return self.pose
+
+    def needs_map_update(self):
+        if self.last_update_pose is None:
+            return True
+        delta = self.pose - self.last_update_pose
+        angle = abs((delta[2] + math.pi) % (2 * math.pi) - math.pi)
+        return math.hypot(delta[0], delta[1]) > MAP_UPDATE_DISTANCE or angle > MAP_UPDATE_ANGLE
+
+    def save_map(self, base_path):
+        """Guarda el mapa fino en formato map_server (.pgm + .yaml) y devuelve las rutas."""
+        import cv2
+
+        grid = self.grid
+        image = np.full(grid.log_odds.shape, 205, dtype=np.uint8)  # desconocido
+        image[grid.log_odds > 0.0] = 0  # ocupado
+        image[grid.log_odds < 0.0] = 254  # libre
+        pgm_path = f"{base_path}.pgm"
+        yaml_path = f"{base_path}.yaml"
+        # La fila 0 de la imagen es el extremo superior (y máxima) del mapa
+        cv2.imwrite(pgm_path, np.flipud(image))
+        with open(yaml_path, "w") as f:
+            f.write(f"image: {pgm_path}\n")
+            f.write(f"resolution: {grid.resolution}\n")
+            f.write(f"origin: [{grid.origin[0]}, {grid.origin[1]}, 0.0]\n")
+            f.write("negate: 0\noccupied_thresh: 0.65\nfree_thresh: 0.196\n")
+        return yaml_path, pgm_path
+
+
+class SlamThread:
+    """Ejecuta un SlamEngine en un hilo propio, procesando siempre el escaneo más reciente.
+
+    `submit` no bloquea: si el motor va atrasado, los escaneos intermedios se
+    descartan en lugar de acumularse.
+    """
+
+    def __init__(self, engine=None, on_update=None):
+        self.engine = engine if engine is not None else SlamEngine()
+        self.on_update = on_update  # Se llama (en este hilo) tras procesar cada escaneo
+        self.pending = None
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()  # Protege al motor frente a lecturas de la GUI
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+
+    def submit(self, angles, distances):
+        with self.condition:
+            self.pending = (angles, distances)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                angles, distances = self.pending
+                self.pending = None
+            with self.lock, measure("slam.escaneo"):
+                self.engine.process_scan(angles, distances)
+            if self.on_update is not None:
+                self.on_update()
+
+
+def save_scans(path, scans, timestamps=None):
+    """Guarda escaneos [(ángulos rad, distancias mm), ...] en un .npz para pruebas sin LIDAR."""
+    lengths = np.array([len(a) for a, _ in scans], dtype=np.int64)
+    np.savez_compressed(
+        path,
+        angles=np.concatenate([np.asarray(a, dtype=np.float32) for a, _ in scans]),
+        distances=np.concatenate([np.asarray(d, dtype=np.float32) for _, d in scans]),
+        offsets=np.concatenate(([0], np.cumsum(lengths))),
+        timestamps=np.asarray(timestamps if timestamps is not None else np.zeros(len(scans))),
+    )
+
+
+def load_scans(path):
+    data = np.load(path)
+    offsets = data["offsets"]
+    return [(data["angles"][a:b], data["distances"][a:b]) for a, b in zip(offsets[:-1], offsets[1:])]
+
+
+def run_offline(scans_path, map_base=None):
+    """Corre el SLAM sobre escaneos grabados e imprime la trayectoria y el tiempo por escaneo."""
+    engine = SlamEngine()
+    scans = load_scans(scans_path)
+    start = time.perf_counter()
+    for i, (angles, distances) in enumerate(scans):
+        x, y, theta = engine.process_scan(angles, distances)
+        print(f"{i:5d}  x={x:+.3f}  y={y:+.3f}  theta={math.degrees(theta):+.1f}°")
+    elapsed = time.perf_counter() - start
+    if scans:
+        print(f"{len(scans)} escaneos en {elapsed:.2f} s ({elapsed / len(scans) * 1000:.1f} ms/escaneo)")
+    if map_base:
+        print("Mapa guardado en: {} / {}".format(*engine.save_map(map_base)))
+    return engine
+
+
+def benchmark_integration(scans, size=2000, resolution=MAP_RESOLUTION, repeats=3):
+    """Mide el tiempo de integrar cada escaneo en un mapa de size x size celdas.
+
+    Returns:
+        np.ndarray: Tiempos por escaneo en milisegundos.
+    """
+    grid = OccupancyGrid(size, resolution)
+    times = []
+    for _ in range(repeats):
+        for angles, distances in scans:
+            points = scan_to_points(angles, distances)
+            start = time.perf_counter()
+            grid.integrate_scan((0.0, 0.0), points[:, 0], points[:, 1])
+            times.append((time.perf_counter() - start) * 1000)
+    return np.array(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SLAM 2D sin ROS sobre escaneos grabados")
+    parser.add_argument("scans", help="Archivo .npz generado con save_scans")
+    parser.add_argument("--map", help="Ruta base para guardar el mapa (.pgm/.yaml)")
+    parser.add_argument("--bench", action="store_true", help="Solo medir la integración de escaneos en el mapa")
+    args = parser.parse_args()
+    if args.bench:
+        times = benchmark_integration(load_scans(args.scans))
+        print(f"Integración de escaneo (2000x2000): p50={np.percentile(times, 50):.2f} ms  "
+              f"p95={np.percentile(times, 95):.2f} ms  max={times.max():.2f} ms")
+    else:
+        run_offline(args.scans, args.map)
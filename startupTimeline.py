@@ -0,0 +1,60 @@
+import contextlib
+import os
+import threading
+import time
+
+
+def process_age():
+    """Segundos desde que el sistema lanzó este proceso (incluye el arranque del intérprete)."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+class StartupTimeline:
+    """Línea de tiempo del arranque de la GUI.
+
+    Los eventos se miden desde el lanzamiento del proceso: al crearse toma
+    la edad del proceso leída de /proc, así el informe también cuenta el
+    arranque del intérprete y los imports previos. `mark` registra un
+    instante y `span` la duración de un bloque; se pueden usar desde los
+    hilos de inicialización en segundo plano.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter() - process_age()
+        self.events = []  # (inicio, fin, nombre, hilo)
+        self.lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter() - self.t0
+
+    def mark(self, name):
+        t = self.now()
+        with self.lock:
+            self.events.append((t, t, name, threading.current_thread().name))
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = self.now()
+        try:
+            yield
+        finally:
+            end = self.now()
+            with self.lock:
+                self.events.append((start, end, name, threading.current_thread().name))
+
+    def report(self):
+        """Texto con los eventos ordenados por inicio: inicio, duración, hilo y nombre."""
+        with self.lock:
+            events = sorted(self.events)
+        lines = ["Línea de tiempo de arranque (ms desde el lanzamiento del proceso):"]
+        for start, end, name, thread in events:
+            duration = f"{(end - start) * 1000:8.1f}" if end > start else " " * 8
+            lines.append(f"{start * 1000:8.1f} {duration}  [{thread}] {name}")
+        return "\n".join(lines)
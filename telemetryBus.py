@@ -0,0 +1,41 @@
+import threading
+import time
+
+# Canal comodín: recibe todas las publicaciones
+ALL_CHANNELS = "*"
+
+
+class TelemetryBus:
+    """Bus de telemetría numérica publicar/suscribir.
+
+    Los productores (lector serial, LIDAR, cámaras, encoders) publican valores
+    por nombre de canal; los consumidores (historial, gráficas) se suscriben.
+    Los callbacks se ejecutan en el hilo del productor, así que deben ser
+    rápidos y no tocar widgets de Tk directamente.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel, callback):
+        """Registra `callback(channel, value, t)` para un canal o para ALL_CHANNELS."""
+        with self.lock:
+            # Copia al escribir: publish itera la lista sin tomar el lock
+            self.subscribers[channel] = self.subscribers.get(channel, []) + [callback]
+
+    def unsubscribe(self, channel, callback):
+        with self.lock:
+            callbacks = [cb for cb in self.subscribers.get(channel, []) if cb != callback]
+            if callbacks:
+                self.subscribers[channel] = callbacks
+            else:
+                self.subscribers.pop(channel, None)
+
+    def publish(self, channel, value, t=None):
+        if t is None:
+            t = time.monotonic()
+        for callback in self.subscribers.get(channel, ()):
+            callback(channel, value, t)
+        for callback in self.subscribers.get(ALL_CHANNELS, ()):
+            callback(channel, value, t)
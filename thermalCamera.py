@@ -1,14 +1,18 @@
 import time
-import board
-import busio
 import numpy as np
-import adafruit_mlx90640
 import cv2  # Usaremos OpenCV para manejar la webcam y mostrar imágenes
-import smbus
+
+from cameraCapture import CameraCapture
+from processSupervisor import heartbeat
 
 # Inicializa el bus I2C para el multiplexor PCA9548A
 # Inicializa el sensor térmico MLX90640
 def initialize_sensor():
+    # Librerías del hardware aquí: el resto del módulo se puede importar (y medir) sin el sensor
+    import board
+    import busio
+    import adafruit_mlx90640
+
     i2c = busio.I2C(board.SCL, board.SDA)
     mlx = adafruit_mlx90640.MLX90640(i2c)
     mlx.refresh_rate = adafruit_mlx90640.RefreshRate.REFRESH_16_HZ
@@ -46,6 +50,27 @@ def apply_virtual_zoom(frame, zoom_factor):
     cropped_frame = frame[y1:y2, x1:x2]
     return cv2.resize(cropped_frame, (width, height))
 
+# Superpone la imagen térmica sobre la de la webcam
+def compose_overlay(webcam_frame, thermal_frame, output_size, zoom_factor):
+    # Redimensionar y reflejar la imagen de la webcam
+    webcam_frame = cv2.resize(webcam_frame, output_size)
+    if thermal_frame is None:
+        # Si no se obtiene el frame térmico, solo la webcam
+        return webcam_frame
+
+    # Normaliza la imagen térmica
+    thermal_image = normalize_thermal_data(thermal_frame)
+
+    # Aplica zoom virtual a la imagen térmica
+    thermal_image = apply_virtual_zoom(thermal_image, zoom_factor)
+
+    # Redimensiona y aplica un colormap
+    thermal_image = cv2.applyColorMap(cv2.resize(thermal_image, output_size), cv2.COLORMAP_JET)
+    thermal_image = cv2.flip(thermal_image, 1)  # Reflejo horizontal
+
+    # Fusiona las imágenes (50% de opacidad cada una)
+    return cv2.addWeighted(webcam_frame, 0.5, thermal_image, 0.8, 0)
+
 # Función principal que ejecuta la lógica de captura
 def main():
     # Inicializa el multiplexo
@@ -54,47 +79,27 @@ def main():
     mlx = initialize_sensor()
 
     # Inicializa la webcam
-    cap = cv2.VideoCapture(4)
-    if not cap.isOpened():
+    # Configura el tamaño de la salida; la webcam se pide en ese mismo modo
+    output_size = (640, 480)
+    cap = CameraCapture(4, *output_size)
+    if not cap.open():
         print("Error: No se pudo acceder a la webcam.")
         return
-
-    # Configura el tamaño de la salida
-    output_size = (640, 480)
     zoom_factor = 1.5  # Ajustar este valor para el nivel de zoom deseado
 
     try:
         while True:
+            heartbeat()
             # Captura de la webcam
             ret, webcam_frame = cap.read()
             if not ret:
                 print("Error al leer la imagen de la webcam.")
                 break
 
-            # Redimensionar y reflejar la imagen de la webcam
-            webcam_frame = cv2.resize(webcam_frame, output_size)
-
-            # Captura de la cámara térmica
+            # Captura de la cámara térmica y superposición sobre la webcam
             thermal_frame = get_thermal_frame(mlx)
-            if thermal_frame is not None:
-                # Normaliza la imagen térmica
-                thermal_image = normalize_thermal_data(thermal_frame)
-
-                # Aplica zoom virtual a la imagen térmica
-                thermal_image = apply_virtual_zoom(thermal_image, zoom_factor)
-
-                # Redimensiona y aplica un colormap
-                thermal_image = cv2.applyColorMap(cv2.resize(thermal_image, output_size), cv2.COLORMAP_JET)
-                thermal_image = cv2.flip(thermal_image, 1)  # Reflejo horizontal
-
-                # Fusiona las imágenes (50% de opacidad cada una)
-                combined_image = cv2.addWeighted(webcam_frame, 0.5, thermal_image, 0.8, 0)
-
-                # Muestra la imagen combinada
-                cv2.imshow('Thermal + Webcam (Overlay)', combined_image)
-            else:
-                # Si no se obtiene el frame térmico, muestra solo la webcam
-                cv2.imshow('Thermal + Webcam (Overlay)', webcam_frame)
+            cv2.imshow('Thermal + Webcam (Overlay)',
+                       compose_overlay(webcam_frame, thermal_frame, output_size, zoom_factor))
 
             # Salir si se presiona 'q'
             if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -0,0 +1,299 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+from processSupervisor import CLOCK_TICKS, SAMPLE_INTERVAL, STOP_TIMEOUT, proc_usage
+
+# Módulos pesados que el forkserver importa una sola vez; cada trabajador nace
+# de un fork de ese proceso y los hereda ya cargados. Los que falten en la
+# máquina se ignoran (el forkserver descarta los ImportError de la precarga).
+WORKER_PRELOAD = ["numpy", "cv2", "torch", "supervision", "ultralytics"]
+
+# Detectores que viven en el pool (nombre del botón, módulo, clase, índice de cámara)
+WORKER_DETECTORS = [
+    ("Detectar Movimiento", "movementDetection", "MotionDetector", 0),
+    ("Detector QR", "qrDetector", "QrDetector", 0),
+    ("YOLOv10", "runyolov10", "YoloDetector", 0),
+]
+
+STATUS_POLL_INTERVAL = 0.2  # segundos entre lecturas de la cola de estados
+
+# Órdenes de la GUI al pool y del pool a cada trabajador
+ACTIVATE = "activar"
+DEACTIVATE = "desactivar"
+EXIT = "salir"
+
+
+def detector_worker(name, module_name, class_name, camera_index, commands, statuses):
+    """Bucle de un trabajador: carga su detector una vez y espera órdenes.
+
+    Mientras está inactivo se bloquea en la cola de órdenes sin consumir CPU ni
+    la cámara; al activarse toma los cuadros que publica la GUI (o abre la
+    cámara si la GUI no la tiene) y los procesa revisando la cola sin
+    bloquear en cada vuelta, así activar o desactivar tarda milisegundos.
+    """
+    import cv2
+    from cameraCapture import CameraCapture, DETECTOR_CAPTURE_SIZE
+    from sharedFrames import SharedFrameReader
+
+    try:
+        module = importlib.import_module(module_name)
+        detector = getattr(module, class_name)()  # Aquí se cargan los pesos del modelo
+    except Exception as e:
+        statuses.put((name, "error: " + " ".join(str(e).split())))
+        return
+    statuses.put((name, "listo"))
+
+    cap = None
+    while True:
+        try:
+            command = commands.get_nowait() if cap is not None else commands.get()
+        except queue.Empty:
+            command = None
+
+        if command == ACTIVATE and cap is None:
+            # Si la GUI ya muestra esta cámara, leer sus cuadros en vez de disputarle el dispositivo
+            cap = SharedFrameReader(camera_index)
+            if not cap.open():
+                cap = CameraCapture(camera_index, *DETECTOR_CAPTURE_SIZE, raw=True)
+                if not cap.open():
+                    cap = None
+            if cap is None:
+                print(f"{name}: no se puede acceder a la cámara {camera_index}.")
+                statuses.put((name, "sin cámara"))
+                continue
+            detector.reset()
+            cv2.namedWindow(detector.window_name, cv2.WINDOW_NORMAL)
+            statuses.put((name, "activo"))
+        elif command in (DEACTIVATE, EXIT) and cap is not None:
+            cap.release()
+            cap = None
+            cv2.destroyWindow(detector.window_name)
+            cv2.waitKey(1)
+            statuses.put((name, "listo"))
+        if command == EXIT:
+            return
+        if cap is None:
+            continue
+
+        frame = cap.read_frame()
+        if frame is None:
+            print(f"{name}: error al capturar el frame.")
+            commands.put(DEACTIVATE)
+            continue
+        # Los detectores trabajan a resolución completa: el mismo JPEG que la GUI muestra reducido, entero
+        cv2.imshow(detector.window_name, detector.process(frame.image()))
+        # La tecla 'q' en la ventana del detector lo devuelve al estado listo
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            commands.put(DEACTIVATE)
+
+
+def serve(detectors=WORKER_DETECTORS, preload=WORKER_PRELOAD):
+    """Proceso anfitrión del pool (se ejecuta como `python workerPool.py`).
+
+    Vive aparte de la GUI para que el forkserver no vuelva a importar main.py
+    (con su puerto serie y sus hilos) en cada trabajador. Lee órdenes
+    "activar|desactivar <nombre>" por stdin y escribe por stdout líneas
+    "<nombre>\\t<estado>\\t<%CPU>\\t<MB RSS>". Si la GUI muere, stdin se cierra
+    y el pool se apaga con ella.
+    """
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(preload)  # sin '__main__': solo los módulos pesados
+    statuses = ctx.Queue()
+    cameras = {name: camera for name, _, _, camera in detectors}
+    commands = {name: ctx.Queue() for name in cameras}
+    processes = {}
+    for name, module, cls, camera in detectors:
+        processes[name] = ctx.Process(target=detector_worker, name=f"rrl-{module}", daemon=True,
+                                      args=(name, module, cls, camera, commands[name], statuses))
+        processes[name].start()
+    state = {name: "cargando" for name in cameras}
+    usage = {name: (0.0, 0.0) for name in cameras}
+    active = set()
+    lock = threading.Lock()
+
+    def report(name):
+        print(f"{name}\t{state[name]}\t{usage[name][0]:.1f}\t{usage[name][1]:.1f}", flush=True)
+
+    def read_commands():
+        for line in sys.stdin:
+            command, _, name = line.strip().partition(" ")
+            if name not in commands:
+                continue
+            with lock:
+                if command == ACTIVATE:
+                    # Liberar la cámara si otro detector la tiene
+                    for other in list(active):
+                        if other != name and cameras[other] == cameras[name]:
+                            commands[other].put(DEACTIVATE)
+                            active.discard(other)
+                    active.add(name)
+                elif command == DEACTIVATE:
+                    active.discard(name)
+                commands[name].put(command)
+        for q in commands.values():
+            q.put(EXIT)
+        statuses.put(None)
+
+    threading.Thread(target=read_commands, daemon=True).start()
+    for name in cameras:
+        report(name)
+
+    ticks = {}
+    last_sample = time.monotonic()
+    while True:
+        try:
+            item = statuses.get(timeout=STATUS_POLL_INTERVAL)
+            if item is None:
+                break
+            name, state[name] = item
+            with lock:
+                if state[name] == "activo":
+                    active.add(name)
+                else:  # "listo" incluido: el trabajador se desactiva solo con la tecla q o si pierde la cámara
+                    active.discard(name)
+            report(name)
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        if now - last_sample >= SAMPLE_INTERVAL:
+            for name, process in processes.items():
+                sample = proc_usage(process.pid) if process.is_alive() else None
+                if sample is None:
+                    usage[name] = (0.0, 0.0)
+                    if not state[name].startswith(("error", "terminado")):
+                        state[name] = f"terminado ({process.exitcode})"
+                else:
+                    cpu = (sample[0] - ticks.get(name, sample[0])) / CLOCK_TICKS / (now - last_sample) * 100
+                    ticks[name] = sample[0]
+                    usage[name] = (cpu, sample[1])
+                report(name)
+            last_sample = now
+
+    for process in processes.values():
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+
+
+class DetectorPool:
+    """Pool de detectores precargados, uno por herramienta, visto desde la GUI.
+
+    `start()` lanza el anfitrión; los trabajadores cargan módulos y pesos una
+    sola vez y luego activar o desactivar una herramienta solo envía una
+    línea por stdin. Los que usan la misma cámara se excluyen entre sí. El
+    anfitrión y la lectura de sus estados son tareas del núcleo de E/S (`io`,
+    un IoCore). Expone `states()` con el mismo formato que ProcessSupervisor
+    para mostrarlo en la misma barra. `on_change()` se llama desde el hilo de
+    E/S.
+    """
+
+    def __init__(self, io, detectors=WORKER_DETECTORS, on_change=None):
+        self.io = io
+        self.names = [name for name, _, _, _ in detectors]
+        self.on_change = on_change
+        self.process = None
+        self.state = {name: ("detenido", 0.0, 0.0) for name in self.names}
+        self.requested = set()  # Herramientas que la GUI pidió activar
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Arranca el anfitrión del pool; bloquea solo al hilo que llama, no al bucle de E/S."""
+        self.io.submit(self.run()).result()
+
+    async def run(self):
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workerPool.py")
+        try:
+            self.process = await asyncio.create_subprocess_exec(sys.executable, script,
+                                                                stdin=asyncio.subprocess.PIPE,
+                                                                stdout=asyncio.subprocess.PIPE,
+                                                                start_new_session=True)
+        except OSError as e:
+            print(f"Error al iniciar el pool de detectores: {e}")
+            return
+        self.io.submit(self.read_states())
+
+    def send(self, command, name):
+        self.io.call_soon(self.write_command, command, name)
+
+    def write_command(self, command, name):
+        if self.process is None or self.process.returncode is not None:
+            print(f"{name} no está disponible: el pool de detectores no está en ejecución.")
+            return
+        try:
+            self.process.stdin.write(f"{command} {name}\n".encode())
+        except (OSError, RuntimeError) as e:
+            print(f"Error al enviar '{command}' a {name}: {e}")
+
+    def activate(self, name):
+        with self.lock:
+            self.requested.add(name)
+        self.send(ACTIVATE, name)
+
+    def deactivate(self, name):
+        with self.lock:
+            self.requested.discard(name)
+        self.send(DEACTIVATE, name)
+
+    def toggle(self, name):
+        if name in self.requested:
+            self.deactivate(name)
+        else:
+            self.activate(name)
+
+    def shutdown(self):
+        """Cierra stdin del anfitrión para que detenga sus trabajadores (al cerrar la GUI); bloquea hasta terminar."""
+        async def stop_host():
+            if self.process is None:
+                return
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), STOP_TIMEOUT * 2)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+            self.process = None
+
+        try:
+            self.io.submit(stop_host()).result(STOP_TIMEOUT * 3)
+        except Exception as e:
+            print(f"Error al detener el pool de detectores: {e}")
+
+    def states(self):
+        """Instantánea {nombre: (estado, %CPU, MB RSS)} para la GUI."""
+        with self.lock:
+            return dict(self.state)
+
+    async def read_states(self):
+        async for raw in self.process.stdout:
+            try:
+                name, state, cpu, rss = raw.decode(errors="replace").rstrip("\n").split("\t")
+                entry = (state, float(cpu), float(rss))
+            except ValueError:
+                continue  # Salida suelta de un detector, no un estado
+            with self.lock:
+                if name not in self.state:
+                    continue
+                previous = self.state[name]
+                self.state[name] = entry
+                if state == "activo":
+                    self.requested.add(name)
+                elif previous[0] == "activo" or state not in ("cargando", "listo"):
+                    # Se desactivó solo (otra herramienta tomó la cámara, 'q', cámara perdida) o falló
+                    self.requested.discard(name)
+            if entry != previous:
+                self.notify()
+
+    def notify(self):
+        if self.on_change is not None:
+            self.on_change()
+
+
+if __name__ == "__main__":
+    serve()